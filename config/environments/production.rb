@@ -39,7 +39,11 @@ module OptimizerWrapper
   ORTOOLS_EXEC =
     'LD_LIBRARY_PATH=../or-tools/dependencies/install/lib/:../or-tools/lib/ ../optimizer-ortools/tsp_simple'.freeze
   ORTOOLS = Wrappers::Ortools.new(tmp_dir: TMP_DIR, exec_ortools: ORTOOLS_EXEC, threads: 4)
-  UNCONSTRAINED_INITIALIZATION = Wrappers::UnconstrainedInitialization.new(tmp: TMP_DIR)
+  UNCONSTRAINED_INITIALIZATION = Wrappers::UnconstrainedInitialization.new(
+    tmp: TMP_DIR,
+    worker_socket: ENV['UNCONSTRAINED_INITIALIZATION_SOCKET'],
+    kernel_cache_dir: ENV['UNCONSTRAINED_INITIALIZATION_CACHE_DIR']
+  )
 
   PARAMS_LIMIT = { points: 100000, vehicles: 1000 }.freeze
   QUOTAS = [{ daily: 100000, monthly: 1000000 }].freeze # Only taken into account if REDIS_COUNT
@@ -0,0 +1,63 @@
+"""Benchmark of the balanced clustering of ProcessClusteringInitialPaths
+
+Clusters random services with k_medoids, then with balanced_k_medoids from the
+same medoids, and reports how far the initial paths are from the vehicle limits :
+the volume above capacity and the service time above the working time, summed
+over the vehicles, along with the total travel time of nearest neighbour tours
+from the depot (the price of the balance).
+
+The fleet capacity and working time are the total demand times -slack.
+
+Usage (from unconstrained-initialization):
+    python3 benchmarks/balanced_clustering_benchmark.py [-sizes 1000 5000] [-vehicles 50] [-slack 1.1]
+"""
+import argparse
+
+import numpy
+
+from instances import random_points, time_matrix, nearest_neighbour_cost, timed, Table
+from heuristics.clustering import time_distances, k_medoids
+from heuristics.balancing import balanced_k_medoids
+
+
+def report(table, size, name, elapsed, matrix, labels, num_vehicles, volumes, durations, capacity, working_time):
+    overload = 0
+    overtime = 0
+    tours = 0
+    for vehicle in range(num_vehicles):
+        members = numpy.flatnonzero(labels == vehicle)
+        overload += max(volumes[members].sum() - capacity, 0)
+        overtime += max(durations[members].sum() - working_time, 0)
+        tours += nearest_neighbour_cost(matrix, members, size)
+    table.row(size, name, elapsed, overload, overtime / 3600, tours / 3600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("-vehicles", type=int, default=50)
+    parser.add_argument("-slack", type=float, default=1.1)
+    args = parser.parse_args()
+
+    table = Table([("services", 8, ""), ("method", 10, ""), ("time (s)", 10, ".2f"), ("overload", 10, ".0f"),
+                   ("overtime (h)", 14, ".1f"), ("tours (h)", 10, ".0f")])
+    for size in args.sizes:
+        generator = numpy.random.default_rng(size)
+        matrix = time_matrix(random_points(size, seed=size, side=10000))
+        volumes = generator.integers(1, 10, size).astype(numpy.float64)
+        durations = generator.integers(300, 900, size).astype(numpy.float64)
+        capacity = args.slack * volumes.sum() / args.vehicles
+        working_time = args.slack * durations.sum() / args.vehicles
+        distances = time_distances(matrix, numpy.arange(size))
+
+        (labels, medoids), elapsed = timed(k_medoids, distances, size, args.vehicles)
+        report(table, size, "kmedoids", elapsed, matrix, labels, args.vehicles, volumes, durations, capacity, working_time)
+
+        (labels, _), elapsed = timed(balanced_k_medoids, distances, size, medoids, volumes[:, None],
+                                     numpy.full((args.vehicles, 1), capacity), durations,
+                                     numpy.full(args.vehicles, working_time))
+        report(table, size, "balanced", elapsed, matrix, labels, args.vehicles, volumes, durations, capacity, working_time)
+
+
+if __name__ == "__main__":
+    main()
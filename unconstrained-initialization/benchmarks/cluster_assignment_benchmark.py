@@ -0,0 +1,68 @@
+"""Benchmark of the cluster to vehicle assignment and of the depot seeding on
+multi-depot fleets
+
+Services are spread around -depots cities, each with its own depot, and vehicles
+are spread over the depots. Clusters from k_medoids are given to the vehicles
+either by label (cluster i to vehicle i) or by assign_clusters ; depot_k_medoids
+builds clusters bound to the vehicle depots. The total travel time of nearest
+neighbour tours from every vehicle depot is reported.
+
+Usage (from unconstrained-initialization):
+    python3 benchmarks/cluster_assignment_benchmark.py [-services 2000] [-vehicles 40] [-depots 4]
+"""
+import argparse
+
+import numpy
+
+from instances import time_matrix, nearest_neighbour_cost, load_modules, timed, Table
+from heuristics.clustering import time_distances, k_medoids, depots_times, depot_k_medoids
+from heuristics.assignment import cluster_depot_times, assignment_costs, assign_clusters
+
+
+def tours_cost(matrix, labels, depots):
+    return sum(nearest_neighbour_cost(matrix, numpy.flatnonzero(labels == vehicle), depot) for vehicle, depot in enumerate(depots))
+
+
+def assigned_labels(labels, num_vehicles, services_matrix_index, matrix, vehicles_matrix_index, depots):
+    zeros = numpy.zeros((num_vehicles, num_vehicles))
+    depot_times = cluster_depot_times(labels, num_vehicles, services_matrix_index, matrix[None], vehicles_matrix_index, depots, depots)
+    return assign_clusters(assignment_costs(depot_times, zeros, zeros, zeros))[labels]
+
+
+def depot_labels(distances, num_services, services_matrix_index, matrix, vehicles_matrix_index, depots):
+    depot_times, vehicle_depot = depots_times(matrix[None], services_matrix_index, vehicles_matrix_index, depots, depots)
+    labels, _ = depot_k_medoids(distances, num_services, depot_times, vehicle_depot)
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-services", type=int, default=2000)
+    parser.add_argument("-vehicles", type=int, default=40)
+    parser.add_argument("-depots", type=int, default=4)
+    args = parser.parse_args()
+    load_modules("scipy.optimize")
+
+    generator = numpy.random.default_rng(0)
+    cities = generator.random((args.depots, 2)) * 200000
+    points = cities[generator.integers(args.depots, size=args.services)] + generator.normal(0, 5000, (args.services, 2))
+    matrix = time_matrix(numpy.concatenate([points, cities]))
+    services_matrix_index = numpy.arange(args.services)
+    depots = args.services + numpy.arange(args.vehicles) % args.depots
+
+    distances = time_distances(matrix, services_matrix_index)
+    vehicles_matrix_index = numpy.zeros(args.vehicles, dtype=int)
+
+    table = Table([("clustering", 14, ""), ("time (s)", 10, ".2f"), ("tours (h)", 10, ".0f")])
+    (labels, _), elapsed = timed(k_medoids, distances, args.services, args.vehicles)
+    table.row("by label", elapsed, tours_cost(matrix, labels, depots) / 3600)
+
+    assigned, assignment_elapsed = timed(assigned_labels, labels, args.vehicles, services_matrix_index, matrix, vehicles_matrix_index, depots)
+    table.row("matching", elapsed + assignment_elapsed, tours_cost(matrix, assigned, depots) / 3600)
+
+    labels, elapsed = timed(depot_labels, distances, args.services, services_matrix_index, matrix, vehicles_matrix_index, depots)
+    table.row("depot seeding", elapsed, tours_cost(matrix, labels, depots) / 3600)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark of the clustering backends of ProcessClusteringInitialPaths
+
+For every size, clusters random services with AgglomerativeClustering (complete
+linkage on the dense services matrix) and with k_medoids. The quality of the
+initial paths is estimated by the total travel time of a nearest neighbour tour
+from the depot in every cluster, the solver not being needed.
+
+Usage (from unconstrained-initialization):
+    python3 benchmarks/clustering_benchmark.py [-sizes 1000 5000 20000] [-vehicles 50] [-agglomerative_max_size 5000]
+"""
+import argparse
+
+import numpy
+
+from instances import random_points, time_matrix, nearest_neighbour_cost, load_modules, Table
+from controller.controller import measure
+from heuristics.clustering import time_distances, k_medoids
+from lazy_imports import timed_import
+from knowledge_sources.process_clustering_initial_paths import services_time_matrix
+
+
+def agglomerative_labels(matrix, services_matrix_index, num_clusters):
+    services_matrix = services_time_matrix(matrix, services_matrix_index)
+    AgglomerativeClustering = timed_import("sklearn.cluster").AgglomerativeClustering
+    return AgglomerativeClustering(n_clusters=num_clusters, metric='precomputed', linkage='complete').fit(services_matrix).labels_
+
+
+def kmedoids_labels(matrix, services_matrix_index, num_clusters):
+    distances = time_distances(matrix, services_matrix_index)
+    labels, _ = k_medoids(distances, services_matrix_index.size, num_clusters)
+    return labels
+
+
+def paths_cost(matrix, labels, num_clusters, depot):
+    return sum(nearest_neighbour_cost(matrix, numpy.flatnonzero(labels == cluster), depot) for cluster in range(num_clusters))
+
+
+def run(method, matrix, services_matrix_index, num_clusters):
+    labels, measures = measure(lambda: method(matrix, services_matrix_index, num_clusters))
+    peak_increment = (measures["peak_rss"] - measures["rss_before"]) / 2 ** 20 if measures["peak_rss"] is not None else "-"
+    cost = paths_cost(matrix, labels, num_clusters, services_matrix_index.size)
+    return measures["wall_time"], peak_increment, cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("-vehicles", type=int, default=50)
+    parser.add_argument("-agglomerative_max_size", type=int, default=5000,
+                        help="Largest size for which AgglomerativeClustering is run")
+    args = parser.parse_args()
+    load_modules("sklearn.cluster")
+
+    table = Table([("services", 8, ""), ("method", 14, ""), ("time (s)", 10, ".2f"), ("peak +MB", 10, ".0f"), ("tours cost", 14, ".0f")])
+    for size in args.sizes:
+        matrix = time_matrix(random_points(size, seed=size))
+        services_matrix_index = numpy.arange(size)
+        methods = [("kmedoids", kmedoids_labels)]
+        if size <= args.agglomerative_max_size:
+            methods.insert(0, ("agglomerative", agglomerative_labels))
+        for name, method in methods:
+            elapsed, peak_increment, cost = run(method, matrix, services_matrix_index, args.vehicles)
+            table.row(size, name, elapsed, peak_increment, cost)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark of CreateMatricesFromProblem
+
+Compares the former element by element construction of the 3D matrices with the
+bulk reshape used by CreateMatricesFromProblem.
+
+Usage (from unconstrained-initialization):
+    python3 benchmarks/create_matrices_benchmark.py [-sizes 1000 5000 10000] [-legacy_max_size 5000]
+"""
+import argparse
+from types import SimpleNamespace
+
+import numpy
+
+from instances import timed, Table
+from knowledge_sources.create_matrices_from_problem import CreateMatricesFromProblem
+
+
+def legacy_process(problem):
+    matrices = problem["matrices"]
+    matrix_size = int(numpy.sqrt(len(matrices[0]["time"])))
+    time_matrices = numpy.zeros((len(matrices), matrix_size, matrix_size), dtype=numpy.float64)
+    distance_matrices = numpy.zeros((len(matrices), matrix_size, matrix_size), dtype=numpy.float64)
+    for matrix_index, matrix in enumerate(matrices):
+        for point_from in range(matrix_size):
+            for point_to in range(matrix_size):
+                time_matrices[matrix_index, point_from, point_to] = matrix["time"][point_from * matrix_size + point_to]
+        for point_from in range(matrix_size):
+            for point_to in range(matrix_size):
+                distance_matrices[matrix_index, point_from, point_to] = matrix["distance"][point_from * matrix_size + point_to]
+    return time_matrices, distance_matrices
+
+
+def random_problem(size):
+    generator = numpy.random.default_rng(size)
+    return {
+        "matrices": [{
+            "size": size,
+            "time": generator.random(size * size, dtype=numpy.float32) * 3600,
+            "distance": generator.random(size * size, dtype=numpy.float32) * 50000,
+        }]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("-legacy_max_size", type=int, default=5000,
+                        help="Largest size for which the legacy loops are run (they are quadratic in python)")
+    args = parser.parse_args()
+
+    table = Table([("points", 8, ""), ("legacy (s)", 12, ".3f"), ("bulk (s)", 10, ".4f"), ("speedup", 10, "")])
+    for size in args.sizes:
+        problem = random_problem(size)
+        blackboard = SimpleNamespace(problem=problem)
+        _, bulk = timed(CreateMatricesFromProblem(blackboard).process)
+
+        if size <= args.legacy_max_size:
+            (time_matrices, distance_matrices), legacy = timed(legacy_process, problem)
+            assert (time_matrices == blackboard.time_matrices).all()
+            assert (distance_matrices == blackboard.distance_matrices).all()
+            table.row(size, legacy, bulk, f"{legacy / bulk:.0f}x")
+        else:
+            table.row(size, "skipped", bulk, "-")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Synthetic instances and measure helpers shared by the benchmarks
+
+Services are points in a square around a central depot (last matrix index), travel
+times are manhattan distances.
+
+Importing this module puts unconstrained-initialization on the path, the benchmarks
+import it before the package modules.
+"""
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lazy_imports import import_modules
+
+
+def load_modules(*names):
+    """Import modules before the measures, so that the first one does not include them"""
+    import_modules(names)
+
+
+def timed(function, *args, **kwargs):
+    """Call function
+
+    Returns
+    -------
+        (object, float) : its result and its wall time in seconds
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class Table(object):
+    """Results table, printed row by row
+
+    Attributes
+    ----------
+        columns (list): (header, width, format) of every column, the format applies to numbers
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        print(" ".join(f"{header:>{width}}" for header, width, _ in columns))
+
+    def row(self, *values):
+        print(" ".join(
+            f"{value:>{width}}" if isinstance(value, str) else f"{value:>{width}{value_format}}"
+            for value, (_, width, value_format) in zip(values, self.columns)
+        ))
+
+
+def random_points(num_services, seed=0, side=50000):
+    generator = numpy.random.default_rng(seed)
+    points = generator.random((num_services + 1, 2)) * side
+    points[num_services] = side / 2
+    return points
+
+
+def time_matrix(points, dtype=numpy.float32):
+    """Manhattan distances between points, computed by blocks of rows"""
+    matrix = numpy.empty((points.shape[0], points.shape[0]), dtype=dtype)
+    for start in range(0, points.shape[0], 1024):
+        block = points[start:start + 1024]
+        matrix[start:start + 1024] = numpy.abs(block[:, None, :] - points[None, :, :]).sum(axis=2)
+    return matrix
+
+
+def nearest_neighbour_cost(time_matrix, path, depot):
+    """Travel time of the tour depot -> services in nearest neighbour order -> depot"""
+    remaining = list(path)
+    current = depot
+    cost = 0
+    while remaining:
+        times = time_matrix[current, remaining]
+        nearest = int(numpy.argmin(times))
+        cost += times[nearest]
+        current = remaining.pop(nearest)
+    return cost + time_matrix[current, depot]
@@ -0,0 +1,100 @@
+"""Benchmark of the spatio-temporal clustering distance on time window instances
+
+The day is split in -shifts shifts, the vehicles work one of them and every
+service gets a random -tw_length window inside one shift. Clusters from k_medoids
+with the travel time distance and with time_window_distances are given to the
+vehicles by assign_clusters, then scheduled by every vehicle from its shift start
+in time window start order (wait until the window opens, late if it is closed).
+The total lateness, waiting and travel times are reported.
+
+The solver is not needed : the schedule stands for the starting point the
+optimizer would have to repair.
+
+With a single shift the time window gap gathers the services of the same hours
+in the same clusters, which are then late : the distance is meant for fleets
+whose vehicles do not all work the whole day.
+
+Usage (from unconstrained-initialization):
+    python3 benchmarks/time_window_clustering_benchmark.py [-services 500] [-vehicles 50] [-shifts 2] [-tw_length 7200]
+"""
+import argparse
+
+import numpy
+
+from instances import random_points, time_matrix, load_modules, timed, Table
+from heuristics.clustering import time_distances, time_window_distances, k_medoids
+from heuristics.assignment import cluster_depot_times, shift_incompatibilities, assignment_costs, assign_clusters
+
+DAY_START = 8 * 3600
+DAY_END = 18 * 3600
+
+
+def schedule(matrix, labels, vehicles_starts, start_tw, end_tw, durations):
+    """Lateness, waiting and travel of every cluster served in time window start order"""
+    depot = labels.size
+    lateness = waiting = travel = 0
+    for vehicle, vehicle_start in enumerate(vehicles_starts):
+        members = numpy.flatnonzero(labels == vehicle)
+        current, clock = depot, vehicle_start
+        for service in members[numpy.argsort(start_tw[members], kind="stable")]:
+            travel += matrix[current, service]
+            clock += matrix[current, service]
+            waiting += max(start_tw[service] - clock, 0)
+            clock = max(clock, start_tw[service])
+            lateness += max(clock - end_tw[service], 0)
+            clock += durations[service]
+            current = service
+        travel += matrix[current, depot]
+    return lateness, waiting, travel
+
+
+def assigned_labels(distances, num_services, num_vehicles, matrix, start_tw, end_tw, vehicles_starts, vehicles_ends):
+    """k_medoids clusters given to the vehicles whose shift fits them"""
+    labels, _ = k_medoids(distances, num_services, num_vehicles)
+    zeros = numpy.zeros((num_vehicles, num_vehicles))
+    depots = numpy.full(num_vehicles, num_services)
+    return assign_clusters(assignment_costs(
+        cluster_depot_times(labels, num_vehicles, numpy.arange(num_services), matrix[None], numpy.zeros(num_vehicles, dtype=int), depots, depots),
+        zeros,
+        shift_incompatibilities(labels, num_vehicles, start_tw[:, None], end_tw[:, None], vehicles_starts, vehicles_ends),
+        zeros
+    ))[labels]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-services", type=int, default=500)
+    parser.add_argument("-vehicles", type=int, default=50)
+    parser.add_argument("-shifts", type=int, default=2)
+    parser.add_argument("-tw_length", type=int, default=7200)
+    parser.add_argument("-weights", type=float, nargs="+", default=[0.1, 0.5, 1])
+    args = parser.parse_args()
+    load_modules("scipy.optimize")
+
+    generator = numpy.random.default_rng(0)
+    matrix = time_matrix(random_points(args.services, side=3600))
+    services_matrix_index = numpy.arange(args.services)
+    shift_length = (DAY_END - DAY_START) // args.shifts
+    vehicles_starts = DAY_START + shift_length * (numpy.arange(args.vehicles) % args.shifts)
+    vehicles_ends = vehicles_starts + shift_length
+    services_shifts = generator.integers(args.shifts, size=args.services)
+    start_tw = DAY_START + shift_length * services_shifts \
+        + generator.integers(0, max(shift_length - args.tw_length, 1), args.services)
+    start_tw = start_tw.astype(numpy.float64)
+    end_tw = start_tw + args.tw_length
+    durations = generator.integers(300, 900, args.services).astype(numpy.float64)
+
+    table = Table([("distance", 12, ""), ("time (s)", 10, ".2f"), ("lateness (h)", 14, ".1f"), ("waiting (h)", 12, ".1f"), ("travel (h)", 12, ".1f")])
+    candidates = [("travel", time_distances(matrix, services_matrix_index))]
+    for weight in args.weights:
+        candidates.append((f"tw x{weight:g}", time_window_distances(matrix, services_matrix_index, start_tw[:, None],
+                                                                    end_tw[:, None], durations, weight)))
+    for name, distances in candidates:
+        labels, elapsed = timed(assigned_labels, distances, args.services, args.vehicles, matrix, start_tw, end_tw,
+                                vehicles_starts, vehicles_ends)
+        lateness, waiting, travel = schedule(matrix, labels, vehicles_starts, start_tw, end_tw, durations)
+        table.row(name, elapsed, lateness / 3600, waiting / 3600, travel / 3600)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark of the clustering with the matrix of every vehicle on mixed fleets
+
+Half of the fleet are trucks, half bikes. Bikes are -bike_slowdown times slower
+than trucks everywhere, trucks are -center_slowdown times slower than usual in the
+city center (a disk around the depot). Clusters are built either with the first
+matrix (trucks) then given to the vehicles by assign_clusters, or with
+bound_k_medoids measuring every cluster with the matrix of its vehicle. The total
+time of nearest neighbour tours, each with the matrix of its vehicle, is reported.
+
+Usage (from unconstrained-initialization):
+    python3 benchmarks/vehicles_matrices_benchmark.py [-services 2000] [-vehicles 40]
+"""
+import argparse
+
+import numpy
+
+from instances import random_points, time_matrix, nearest_neighbour_cost, load_modules, timed, Table
+from heuristics.clustering import time_distances, k_medoids, bound_k_medoids
+from heuristics.assignment import cluster_depot_times, assignment_costs, assign_clusters
+
+
+def tours_cost(time_matrices, labels, vehicles_matrix_index, depot):
+    return sum(
+        nearest_neighbour_cost(time_matrices[matrix_index], numpy.flatnonzero(labels == vehicle), depot)
+        for vehicle, matrix_index in enumerate(vehicles_matrix_index)
+    )
+
+
+def first_matrix_labels(time_matrices, services_matrix_index, vehicles_matrix_index, depots):
+    """Clusters of the first matrix given to the vehicles by assign_clusters"""
+    num_vehicles = vehicles_matrix_index.size
+    labels, _ = k_medoids(time_distances(time_matrices[0], services_matrix_index), services_matrix_index.size, num_vehicles)
+    zeros = numpy.zeros((num_vehicles, num_vehicles))
+    depot_times = cluster_depot_times(labels, num_vehicles, services_matrix_index, time_matrices, vehicles_matrix_index, depots, depots)
+    return assign_clusters(assignment_costs(depot_times, zeros, zeros, zeros))[labels]
+
+
+def own_matrix_labels(time_matrices, services_matrix_index, vehicles_matrix_index):
+    """Clusters measured with the matrix of their vehicle"""
+    profiles_distances = [time_distances(matrix, services_matrix_index) for matrix in time_matrices]
+    labels, _ = bound_k_medoids(profiles_distances, services_matrix_index.size, vehicles_matrix_index, num_starts=3)
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-services", type=int, default=2000)
+    parser.add_argument("-vehicles", type=int, default=40)
+    parser.add_argument("-bike_slowdown", type=float, default=2)
+    parser.add_argument("-center_slowdown", type=float, default=6)
+    args = parser.parse_args()
+    load_modules("scipy.optimize")
+
+    points = random_points(args.services, side=20000)
+    center = numpy.linalg.norm(points - points[args.services], axis=1) < 5000
+    trucks = time_matrix(points)
+    trucks[center[:, None] | center[None, :]] *= args.center_slowdown
+    bikes = time_matrix(points) * args.bike_slowdown
+    time_matrices = numpy.stack([trucks, bikes])
+    services_matrix_index = numpy.arange(args.services)
+    vehicles_matrix_index = numpy.arange(args.vehicles) % 2
+    depots = numpy.full(args.vehicles, args.services)
+
+    table = Table([("clustering", 14, ""), ("time (s)", 10, ".2f"), ("tours (h)", 10, ".0f")])
+    labels, elapsed = timed(first_matrix_labels, time_matrices, services_matrix_index, vehicles_matrix_index, depots)
+    table.row("first matrix", elapsed, tours_cost(time_matrices, labels, vehicles_matrix_index, args.services) / 3600)
+
+    labels, elapsed = timed(own_matrix_labels, time_matrices, services_matrix_index, vehicles_matrix_index)
+    table.row("own matrix", elapsed, tours_cost(time_matrices, labels, vehicles_matrix_index, args.services) / 3600)
+
+
+if __name__ == "__main__":
+    main()
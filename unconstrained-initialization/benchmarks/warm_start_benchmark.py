@@ -0,0 +1,77 @@
+"""Benchmark of the warm start of ProcessClusteringInitialPaths from given routes
+
+Compares the former search of every service in the paths (numpy.isin per service)
+with the single pass marking the routed services.
+
+Usage (from unconstrained-initialization):
+    python3 benchmarks/warm_start_benchmark.py [-sizes 1000 5000 20000] [-vehicles 50] [-legacy_max_size 5000]
+"""
+import argparse
+from types import SimpleNamespace
+
+import numpy
+
+from instances import timed, Table
+from knowledge_sources.process_clustering_initial_paths import ProcessClusteringInitialPaths
+
+
+def legacy_process(blackboard):
+    routes = blackboard.problem["routes"]
+    service_id_to_index = {value: key for key, value in blackboard.service_index_to_id.items()}
+    unassigned_services = numpy.full(blackboard.num_services + 1, -1, dtype=numpy.int32)
+    paths = numpy.full((blackboard.num_vehicle, blackboard.num_services + 1), -1, dtype=numpy.int32)
+    for route in routes:
+        vehicle_index = blackboard.vehicle_id_index[route.get("vehicleId")]
+        for service_index_in_route, service_id in enumerate(route.get("serviceIds")):
+            paths[vehicle_index, service_index_in_route] = service_id_to_index[service_id]
+    for service_index in range(blackboard.num_services):
+        if not numpy.any(numpy.isin(paths, service_index)):
+            unassigned_services[service_index] = service_index
+    mask = unassigned_services == -1
+    return paths, numpy.concatenate((unassigned_services[~mask], unassigned_services[mask]))
+
+
+def warm_start_blackboard(num_services, num_vehicles, routed_fraction=0.9):
+    generator = numpy.random.default_rng(num_services)
+    routed = generator.permutation(num_services)[:int(num_services * routed_fraction)]
+    routes = [
+        {"vehicleId": f"vehicle_{vehicle}", "serviceIds": [f"service_{service}" for service in services]}
+        for vehicle, services in enumerate(numpy.array_split(routed, num_vehicles))
+    ]
+    service_index_to_id = {index: f"service_{index}" for index in range(num_services)}
+    return SimpleNamespace(
+        problem={"services": [{}] * num_services, "routes": routes},
+        num_services=num_services,
+        num_vehicle=num_vehicles,
+        vehicle_id_index={f"vehicle_{vehicle}": vehicle for vehicle in range(num_vehicles)},
+        service_index_to_id=service_index_to_id,
+        service_id_to_index={service_id: index for index, service_id in service_index_to_id.items()},
+        # The legacy search leaves the unrouted services unassigned
+        insert_unrouted=False,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("-vehicles", type=int, default=50)
+    parser.add_argument("-legacy_max_size", type=int, default=5000,
+                        help="Largest size for which the legacy search is run (it is quadratic)")
+    args = parser.parse_args()
+
+    table = Table([("services", 8, ""), ("legacy (s)", 12, ".3f"), ("bulk (s)", 10, ".4f"), ("speedup", 10, "")])
+    for size in args.sizes:
+        blackboard = warm_start_blackboard(size, args.vehicles)
+        _, bulk = timed(ProcessClusteringInitialPaths(blackboard).process)
+
+        if size <= args.legacy_max_size:
+            (paths, unassigned_services), legacy = timed(legacy_process, blackboard)
+            assert (paths == blackboard.paths).all()
+            assert (unassigned_services == blackboard.unassigned_services).all()
+            table.row(size, legacy, bulk, f"{legacy / bulk:.0f}x")
+        else:
+            table.row(size, "skipped", bulk, "-")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+from heuristics.clustering import CLUSTERING_AUTO, DEFAULT_CLUSTERING_THRESHOLD, DEFAULT_TIME_WINDOW_WEIGHT
+from heuristics.decomposition import DEFAULT_DECOMPOSITION_ROUTES
+from parallel import DEFAULT_MULTI_START_TIME_FRACTION
 
+# Value of profile to profile every knowledge source
+PROFILE_ALL = "all"
 
 # Result class that stores all results for futher calculations
 class Blackboard(object):
@@ -50,6 +55,7 @@ class Blackboard(object):
         self.service_matrix_index = None
         self.num_service = None
         self.service_id_to_index_in_problem = None
+        self.service_id_to_index = None
         self.service_sticky_vehicles = None
         self.force_start = None
         self.free_approach = None
@@ -57,6 +63,30 @@ class Blackboard(object):
         self.rests = None
         self.vehicle_id_index = None
         self.vehicle_time_window_margin = None
+        self.performance_report = None
+        self.profile = None
+        self.clustering_method = CLUSTERING_AUTO
+        self.clustering_threshold = DEFAULT_CLUSTERING_THRESHOLD
+        self.balanced_clustering = False
+        self.cluster_assignment = True
+        self.depot_seeding = False
+        self.insert_unrouted = True
+        self.time_window_clustering = False
+        self.time_window_weight = DEFAULT_TIME_WINDOW_WEIGHT
+        self.cores = None
+        self.multi_start = 1
+        self.multi_start_time_fraction = DEFAULT_MULTI_START_TIME_FRACTION
+        self.initial_candidates = None
+        self.decomposition = False
+        self.decomposition_routes = DEFAULT_DECOMPOSITION_ROUTES
+        self.portfolio = 1
+        self.portfolio_rounds = 1
+        self.ruin_recreate = False
+        self.no_solution_improvement_limit = None
+        self.minimum_duration = 0
+        self.time_out_multiplier = None
+        self.init_duration = None
+        self.only_first_solution = False
 
     def add_knowledge_source(self, knowledge_source):
         """Adds a new knowlegde source to the blackboard
@@ -1,30 +1,185 @@
+import cProfile
+import json
+import os
+import resource
+import time
 import logging as log
 log = log.getLogger("controller")
+from blackboard.blackboard import PROFILE_ALL
+
+PAGE_SIZE = resource.getpagesize()
+
+def current_rss():
+    """Resident set size of the process in bytes (None if not available)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+def reset_peak_rss():
+    """Reset the peak resident set size of the process (Linux only)
+
+    Returns
+    -------
+        bool : True if the peak was reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss():
+    """Peak resident set size in bytes since the last reset_peak_rss, since the
+    process start where it can not be reset"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def measure(function):
+    """Run function and measure its wall time, CPU time and memory
+
+    peak_rss is the peak of the function alone, None where the peak of the process
+    can not be reset (it would be the peak of everything run before).
+
+    Returns
+    -------
+        (object, dict) : the result of function and its measures
+    """
+    rss_before = current_rss()
+    peak_reset = reset_peak_rss()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = function()
+    measures = {
+        "wall_time": time.perf_counter() - wall_start,
+        "cpu_time": time.process_time() - cpu_start,
+        "rss_before": rss_before,
+        "rss_after": current_rss(),
+        "peak_rss": peak_rss() if peak_reset else None,
+    }
+    if rss_before is not None and measures["rss_after"] is not None:
+        measures["rss_increment"] = measures["rss_after"] - rss_before
+    return result, measures
 
 class Controller(object):
     """Controller that handles calling the knowledge sources
 
     CAUTION : The user does not need to make any changes in this file. 
 
+    Every verify() and process() is measured (wall time, CPU time, RSS). With the
+    -performance_report argument, the measures are written as JSON next to the
+    solution file (<solution_file>.performance.json).
+
+    With the -profile [knowledge source name] argument, the whole pipeline (or only the
+    named knowledge source) runs under cProfile and the stats are dumped next to
+    init_vrp.log (init_vrp_<name>_<pid>.prof, readable with python3 -m pstats).
+
     Attributes
     ----------
         balckboard (Blackboard): blackboard containing data and the knowledge sources
+        measures (list): measures of every verify and process run
     """
     
     def __init__(self, blackboard):
         self.blackboard = blackboard
+        self.measures = []
+        self.profiler = None
+        self.profile_checked = False
 
     def run_knowledge_sources(self):
         """For every knowledge source, run the Verify and Process methods
         """
-        for knowledge_source in self.blackboard.knowledge_sources:
-            ks_name = type(knowledge_source).__name__
-            log.info(f"Running knowledge source {ks_name}")
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        status = "failed"
+        try:
+            for knowledge_source in self.blackboard.knowledge_sources:
+                ks_name = type(knowledge_source).__name__
+                log.info(f"Running knowledge source {ks_name}")
 
-            # Verify that the knowledge source can be executed
-            assert knowledge_source.verify()
-            log.info(f"Verify {ks_name} : OK -> start processing")
+                # Verify that the knowledge source can be executed
+                verified, measures = measure(self.profiled(ks_name, knowledge_source.verify))
+                self.measures.append({"knowledge_source": ks_name, "step": "verify", **measures})
+                assert verified
+                log.info(f"Verify {ks_name} : OK -> start processing")
 
-            # Execute the knowledge source
-            knowledge_source.process()
-            log.info(f"End Processing {ks_name}")
\ No newline at end of file
+                # Execute the knowledge source
+                _, measures = measure(self.profiled(ks_name, knowledge_source.process))
+                self.measures.append({"knowledge_source": ks_name, "step": "process", **measures})
+                log.info(f"End Processing {ks_name} ({measures['wall_time']:.3f}s)")
+            status = "ok"
+        finally:
+            self.write_performance_report(status, time.perf_counter() - wall_start, time.process_time() - cpu_start)
+            self.write_profile()
+
+    def check_profile(self, profile):
+        """Warn when the profiled knowledge source is not in the pipeline (nothing would be profiled)
+        """
+        self.profile_checked = True
+        if profile == PROFILE_ALL:
+            return
+        ks_names = [type(knowledge_source).__name__ for knowledge_source in self.blackboard.knowledge_sources]
+        if profile not in ks_names:
+            log.warning(f"-profile {profile} matches no knowledge source, nothing will be profiled (expected one of {ks_names} or {PROFILE_ALL})")
+
+    def profiled(self, ks_name, function):
+        """Wrap function to run it under the profiler if its knowledge source is profiled
+        """
+        profile = getattr(self.blackboard, "profile", None)
+        # The profile is known once GetArguments ran
+        if isinstance(profile, str) and not self.profile_checked:
+            self.check_profile(profile)
+        if not isinstance(profile, str) or profile not in (PROFILE_ALL, ks_name):
+            return function
+
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+
+        def run_profiled():
+            self.profiler.enable()
+            try:
+                return function()
+            finally:
+                self.profiler.disable()
+        return run_profiled
+
+    def write_profile(self):
+        """Dump the profiler stats next to the log file
+        """
+        if self.profiler is None:
+            return
+        path = os.path.join(os.getcwd(), f"init_vrp_{self.blackboard.profile}_{os.getpid()}.prof")
+        self.profiler.dump_stats(path)
+        log.info(f"Profile written in {path}")
+
+    def run_peak_rss(self):
+        """Peak resident set size of the whole run : the steps reset the process one
+        """
+        peaks = [measures["peak_rss"] for measures in self.measures if measures["peak_rss"] is not None]
+        return max(peaks + [peak_rss()])
+
+    def write_performance_report(self, status, wall_time, cpu_time):
+        """Write the measures as JSON next to the solution file if requested
+        """
+        if not self.blackboard.performance_report or self.blackboard.output_file is None:
+            return
+        report = {
+            "status": status,
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            "peak_rss": self.run_peak_rss(),
+            "knowledge_sources": self.measures,
+        }
+        path = f"{self.blackboard.output_file}.performance.json"
+        with open(path, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        log.info(f"Performance report written in {path}")
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Assignment of the clusters to the vehicles
+
+Without it cluster i becomes the path of vehicle i whatever the vehicle depots,
+shift, capacities and sticky services. assign_clusters solves the cluster to
+vehicle assignment minimizing, for every pair :
+
+    depot time + penalty * (overload + shift incompatibility) + STICKY_PENALTY * penalty * sticky violations
+
+where depot time is the mean travel time from the vehicle start to the cluster
+services and from them to the vehicle end, overload the fraction of the cluster
+volume above the vehicle capacity (worst unit), shift incompatibility the fraction
+of the cluster services with no time window overlapping the vehicle time window
+and sticky violations the number of services of the cluster the vehicle can not
+serve. penalty is above any depot time so that a better fit always wins.
+"""
+import numpy
+
+from lazy_imports import timed_import
+
+# A sticky violation costs as much as a fully overloaded cluster
+STICKY_PENALTY = 1
+
+
+def cluster_sizes(labels, num_clusters):
+    return numpy.bincount(labels, minlength=num_clusters)
+
+
+def cluster_depot_times(labels, num_clusters, services_matrix_index, time_matrices, vehicles_matrix_index,
+                        vehicle_start_index, vehicle_end_index):
+    """Mean travel time between the start/end of every vehicle and the services of every cluster
+
+    Returns
+    -------
+        numpy.ndarray : num_clusters x num_vehicles times
+    """
+    num_vehicles = vehicle_start_index.shape[0]
+    sizes = numpy.maximum(cluster_sizes(labels, num_clusters), 1)
+    times = numpy.zeros((num_clusters, num_vehicles))
+    for vehicle in range(num_vehicles):
+        time_matrix = time_matrices[vehicles_matrix_index[vehicle]]
+        services_times = numpy.zeros(services_matrix_index.shape[0])
+        if vehicle_start_index[vehicle] >= 0:
+            services_times += time_matrix[vehicle_start_index[vehicle], services_matrix_index]
+        if vehicle_end_index[vehicle] >= 0:
+            services_times += time_matrix[services_matrix_index, vehicle_end_index[vehicle]]
+        times[:, vehicle] = numpy.bincount(labels, weights=services_times, minlength=num_clusters) / sizes
+    return times
+
+
+def cluster_overloads(labels, num_clusters, volumes, capacities):
+    """Fraction of the cluster volume above the vehicle capacity, worst unit
+
+    Attributes
+    ----------
+        capacities (numpy.ndarray): num_vehicles x num_units capacities, inf if unlimited
+
+    Returns
+    -------
+        numpy.ndarray : num_clusters x num_vehicles overloads in [0, 1]
+    """
+    loads = numpy.stack([
+        numpy.bincount(labels, weights=volumes[:, unit], minlength=num_clusters)
+        for unit in range(capacities.shape[1])
+    ], axis=1)
+    excess = numpy.maximum(loads[:, None, :] - capacities[None, :, :], 0)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        overloads = numpy.nan_to_num(excess / loads[:, None, :], nan=0)
+    return overloads.max(axis=2, initial=0)
+
+
+def shift_incompatibilities(labels, num_clusters, start_tw, end_tw, vehicles_TW_starts, vehicles_TW_ends):
+    """Fraction of the cluster services with no time window overlapping the vehicle one
+
+    Negative ends are open time windows. Time windows after the first one which are
+    [0, 0] are the padding of services with fewer time windows and are ignored.
+
+    Returns
+    -------
+        numpy.ndarray : num_clusters x num_vehicles incompatibilities in [0, 1]
+    """
+    valid = (start_tw != 0) | (end_tw != 0)
+    valid[:, 0] = True
+    vehicles_ends = numpy.where(vehicles_TW_ends < 0, numpy.inf, vehicles_TW_ends)
+    ends = numpy.where(end_tw < 0, numpy.inf, end_tw)
+    overlaps = valid[:, :, None] \
+        & (start_tw[:, :, None] <= vehicles_ends[None, None, :]) \
+        & (ends[:, :, None] >= vehicles_TW_starts[None, None, :])
+    incompatible = ~overlaps.any(axis=1)
+    sizes = numpy.maximum(cluster_sizes(labels, num_clusters), 1)
+    return numpy.stack([
+        numpy.bincount(labels, weights=incompatible[:, vehicle], minlength=num_clusters)
+        for vehicle in range(vehicles_TW_starts.shape[0])
+    ], axis=1) / sizes[:, None]
+
+
+def sticky_violations(labels, num_clusters, num_vehicles, sticky_vehicles):
+    """Number of services of every cluster a vehicle is not allowed to serve
+
+    Returns
+    -------
+        numpy.ndarray : num_clusters x num_vehicles counts
+    """
+    violations = numpy.zeros((num_clusters, num_vehicles))
+    for service, vehicles in sticky_vehicles.items():
+        if service < labels.shape[0] and len(vehicles) > 0:
+            forbidden = numpy.ones(num_vehicles, dtype=bool)
+            forbidden[vehicles[vehicles < num_vehicles]] = False
+            violations[labels[service]] += forbidden
+    return violations
+
+
+def assignment_costs(depot_times, overloads, incompatibilities, violations):
+    penalty = depot_times.max(initial=0) + 1
+    return depot_times + penalty * (overloads + incompatibilities + STICKY_PENALTY * violations)
+
+
+def assign_clusters(costs):
+    """Vehicle of every cluster minimizing the total cost (one cluster per vehicle)
+
+    Attributes
+    ----------
+        costs (numpy.ndarray): num_clusters x num_vehicles costs, num_clusters <= num_vehicles
+
+    Returns
+    -------
+        numpy.ndarray : vehicle of every cluster
+    """
+    linear_sum_assignment = timed_import("scipy.optimize").linear_sum_assignment
+    clusters, vehicles = linear_sum_assignment(costs)
+    cluster_vehicles = numpy.empty(costs.shape[0], dtype=numpy.int32)
+    cluster_vehicles[clusters] = vehicles
+    return cluster_vehicles
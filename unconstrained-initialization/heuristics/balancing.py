@@ -0,0 +1,144 @@
+"""Capacity and workload balanced clustering
+
+The clusters of the initial paths are bound to vehicles (the vehicle each cluster
+is assigned to). balanced_k_medoids forms them so that every vehicle receives at most
+its capacity, for every unit, and at most the working time available in its time
+window, rests excluded. Only the durations and setup durations of the services
+count in the working time : estimating the travel of every service by its time to
+the medoid proved to exhaust the budgets of the central vehicles and to scatter
+the remaining services over distant clusters, travel is left to the solver.
+
+Services which fit in no vehicle go where the relative overload is the smallest :
+every service stays in a path, the solver repairs what remains.
+"""
+import numpy
+
+from heuristics.clustering import ROWS_CHUNK_SIZE, update_medoids
+
+
+def capacity_limits(vehicle_capacities, num_units):
+    """Vehicle capacities per unit, negative (unlimited) capacities become inf"""
+    limits = numpy.full((vehicle_capacities.shape[0], num_units), numpy.inf)
+    if vehicle_capacities.ndim == 2:
+        units = min(num_units, vehicle_capacities.shape[1])
+        limits[:, :units] = numpy.where(vehicle_capacities[:, :units] < 0, numpy.inf, vehicle_capacities[:, :units])
+    return limits
+
+
+def working_time_budgets(vehicles_TW_starts, vehicles_TW_ends, vehicles_duration_max, rests_durations):
+    """Working time of every vehicle : time window length or maximum duration,
+    minus its rests. inf when the vehicle has neither
+
+    Attributes
+    ----------
+        rests_durations (numpy.ndarray): total rest duration of every vehicle
+    """
+    budgets = numpy.where(vehicles_TW_ends < 0, numpy.inf, vehicles_TW_ends - vehicles_TW_starts)
+    budgets = numpy.minimum(budgets, numpy.where(vehicles_duration_max < 0, numpy.inf, vehicles_duration_max))
+    return budgets - rests_durations
+
+
+def medoids_distances(distances, num_services, medoids):
+    """Dense num_services x len(medoids) block of distances"""
+    block = numpy.empty((num_services, medoids.size), dtype=numpy.float32)
+    for start in range(0, num_services, ROWS_CHUNK_SIZE):
+        rows = numpy.arange(start, min(start + ROWS_CHUNK_SIZE, num_services))
+        block[rows] = distances(rows, medoids)
+    return block
+
+
+def balanced_assignment(costs, volumes, capacities, workloads, budgets, sticky_vehicles=None):
+    """Assign every service to a vehicle without exceeding capacities and budgets
+
+    Services are assigned by decreasing regret (difference between their second and
+    first cheapest vehicles), sticky services first, each one to its cheapest vehicle with enough capacity
+    and working time left.
+
+    Attributes
+    ----------
+        costs (numpy.ndarray): num_services x num_vehicles cost of a service in a vehicle
+        volumes (numpy.ndarray): num_services x num_units quantities
+        capacities (numpy.ndarray): num_vehicles x num_units capacities, inf if unlimited
+        workloads (numpy.ndarray): working time of every service (duration and setup duration)
+        budgets (numpy.ndarray): working time of every vehicle, inf if unlimited
+        sticky_vehicles (dict): service index -> allowed vehicles (empty for all)
+
+    Returns
+    -------
+        numpy.ndarray : vehicle of every service
+    """
+    num_services, num_vehicles = costs.shape
+    if num_vehicles > 1:
+        cheapest = numpy.partition(costs, 1, axis=1)
+        regrets = cheapest[:, 1] - cheapest[:, 0]
+    else:
+        regrets = numpy.zeros(num_services)
+    if sticky_vehicles is not None:
+        # Services restricted to some vehicles are placed first
+        for service, vehicles in sticky_vehicles.items():
+            if service < num_services and len(vehicles) > 0:
+                regrets[service] = numpy.inf
+    loads = numpy.zeros(capacities.shape)
+    work = numpy.zeros(num_vehicles)
+    labels = numpy.empty(num_services, dtype=numpy.int32)
+    allowed = numpy.ones(num_vehicles, dtype=bool)
+
+    for service in numpy.argsort(-regrets, kind="stable"):
+        service_costs = costs[service].astype(numpy.float64)
+        new_loads = loads + volumes[service]
+        new_work = work + workloads[service]
+        allowed[:] = True
+        if sticky_vehicles is not None and len(sticky_vehicles.get(service, [])) > 0:
+            allowed[:] = False
+            allowed[sticky_vehicles[service][sticky_vehicles[service] < num_vehicles]] = True
+        fits = allowed & (new_loads <= capacities).all(axis=1) & (new_work <= budgets)
+        if fits.any():
+            vehicle = numpy.argmin(numpy.where(fits, service_costs, numpy.inf))
+        else:
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                overloads = numpy.maximum(
+                    numpy.nan_to_num(new_loads / capacities, nan=0).max(axis=1, initial=0),
+                    numpy.nan_to_num(new_work / budgets, nan=0)
+                )
+            overloads[~allowed] = numpy.inf
+            vehicle = numpy.lexsort((service_costs, overloads))[0]
+        labels[service] = vehicle
+        loads[vehicle] = new_loads[vehicle]
+        work[vehicle] = new_work[vehicle]
+
+    return labels
+
+
+def balanced_k_medoids(distances, num_services, medoids, volumes, capacities, workloads, budgets,
+                       sticky_vehicles=None, max_iterations=5, sample_size=200, seed=0):
+    """k-medoids whose assignment step is balanced_assignment
+
+    Attributes
+    ----------
+        distances (function): distances(rows, columns) between services
+        medoids (numpy.ndarray): initial medoid of every vehicle
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray) : vehicle of every service and medoid of every vehicle
+    """
+    generator = numpy.random.default_rng(seed)
+    medoids = numpy.array(medoids)
+    for iteration in range(max_iterations + 1):
+        costs = medoids_distances(distances, num_services, medoids)
+        labels = balanced_assignment(costs, volumes, capacities, workloads, budgets, sticky_vehicles)
+        if iteration == max_iterations:
+            break
+        new_medoids = update_medoids(distances, labels, medoids, sample_size, generator)
+        if (new_medoids == medoids).all():
+            break
+        medoids = new_medoids
+    return labels, medoids
+
+
+def cluster_medoids(distances, labels, num_clusters, sample_size=200, seed=0):
+    """Medoid of every cluster of a given clustering"""
+    medoids = numpy.zeros(num_clusters, dtype=numpy.int64)
+    clusters, first_members = numpy.unique(labels, return_index=True)
+    medoids[clusters] = first_members
+    return update_medoids(distances, labels, medoids, sample_size, numpy.random.default_rng(seed))
@@ -0,0 +1,310 @@
+"""Clustering of the services for the initial paths
+
+AgglomerativeClustering needs the dense services matrix and superlinear time. For
+large instances k_medoids only evaluates distances between the services and a few
+medoids (or sampled candidates), so its memory is linear in the number of services.
+
+Distances are given by a function distances(rows, columns) returning the
+len(rows) x len(columns) block of distances between services.
+
+bound_k_medoids binds every cluster to its vehicle : it is measured with the
+matrix of the vehicle, so that heterogeneous fleets (bikes and trucks) get the
+services their profile reaches cheaply, and optionally seeded around the vehicle
+depot with the travel time to the depot in the cost of a service in the cluster,
+so that multi-depot fleets get clusters that do not straddle depots.
+
+time_window_distances adds the gap between the time windows of two services to
+their travel time, so that services close in space but not in time are not
+clustered together.
+"""
+import numpy
+
+CLUSTERING_AUTO = "auto"
+CLUSTERING_AGGLOMERATIVE = "agglomerative"
+CLUSTERING_KMEDOIDS = "kmedoids"
+CLUSTERING_METHODS = [CLUSTERING_AUTO, CLUSTERING_AGGLOMERATIVE, CLUSTERING_KMEDOIDS]
+
+# Linkages of the agglomerative clustering usable with a precomputed matrix
+LINKAGE_COMPLETE = "complete"
+LINKAGE_AVERAGE = "average"
+
+# Number of services from which the auto method switches to k-medoids
+DEFAULT_CLUSTERING_THRESHOLD = 5000
+
+# Rows of a distance block computed at once
+ROWS_CHUNK_SIZE = 4096
+
+# Weight of the time window gap in time_window_distances
+DEFAULT_TIME_WINDOW_WEIGHT = 0.5
+
+
+def select_clustering_method(method, threshold, num_services):
+    if method == CLUSTERING_AUTO:
+        return CLUSTERING_KMEDOIDS if num_services > threshold else CLUSTERING_AGGLOMERATIVE
+    return method
+
+
+def time_distances(time_matrix, services_matrix_index):
+    """Symmetric travel time between services : mean of both directions
+
+    Returns
+    -------
+        function : distances(rows, columns) -> numpy.float32 block
+    """
+    services_matrix_index = numpy.asarray(services_matrix_index)
+
+    def distances(rows, columns):
+        rows = services_matrix_index[rows]
+        columns = services_matrix_index[columns]
+        block = time_matrix[rows[:, None], columns] + time_matrix[columns[:, None], rows].T
+        return (block / 2).astype(numpy.float32)
+    return distances
+
+
+def time_windows_bounds(start_tw, end_tw, durations):
+    """Time windows as [start, end + duration] intervals, open ends as inf
+
+    Time windows after the first one which are [0, 0] are the padding of services
+    with fewer time windows.
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray) : starts, ends and valid mask, num_services x num_time_windows
+    """
+    valid = (start_tw != 0) | (end_tw != 0)
+    valid[:, 0] = True
+    ends = numpy.where(end_tw < 0, numpy.inf, end_tw + durations[:, None])
+    return numpy.where(valid, start_tw, 0), numpy.where(valid, ends, 0), valid
+
+
+def time_window_distances(time_matrix, services_matrix_index, start_tw, end_tw, durations, weight=DEFAULT_TIME_WINDOW_WEIGHT):
+    """Travel time (see time_distances) plus weight times the time window gap
+
+    The time window gap of two services is the smallest idle time between their
+    closest time windows (durations included) : zero if the windows overlap, the
+    waiting or lateness forced by serving them one after the other otherwise.
+
+    Returns
+    -------
+        function : distances(rows, columns) -> numpy.float32 block
+    """
+    travel = time_distances(time_matrix, services_matrix_index)
+    starts, ends, valid = time_windows_bounds(start_tw, end_tw, durations)
+
+    def distances(rows, columns):
+        gaps = numpy.maximum(
+            starts[columns][None, :, None, :] - ends[rows][:, None, :, None],
+            starts[rows][:, None, :, None] - ends[columns][None, :, None, :]
+        )
+        gaps = numpy.where(valid[rows][:, None, :, None] & valid[columns][None, :, None, :], numpy.maximum(gaps, 0), numpy.inf)
+        return travel(rows, columns) + (weight * gaps.min(axis=(2, 3))).astype(numpy.float32)
+    return distances
+
+
+def dense_distances(distances, num_services, dtype=numpy.float32):
+    """Full num_services x num_services matrix of a distances function"""
+    matrix = numpy.empty((num_services, num_services), dtype=dtype)
+    columns = numpy.arange(num_services)
+    for start in range(0, num_services, ROWS_CHUNK_SIZE // 8):
+        rows = columns[start:start + ROWS_CHUNK_SIZE // 8]
+        matrix[rows] = distances(rows, columns)
+    return matrix
+
+
+def nearest_medoids(distances, num_services, medoids):
+    """Index (in medoids) of the nearest medoid of every service and its distance"""
+    labels = numpy.empty(num_services, dtype=numpy.int32)
+    nearest = numpy.empty(num_services, dtype=numpy.float32)
+    for start in range(0, num_services, ROWS_CHUNK_SIZE):
+        rows = numpy.arange(start, min(start + ROWS_CHUNK_SIZE, num_services))
+        block = distances(rows, medoids)
+        labels[rows] = numpy.argmin(block, axis=1)
+        nearest[rows] = block[numpy.arange(rows.size), labels[rows]]
+    return labels, nearest
+
+
+def initial_medoids(distances, num_services, num_clusters, generator):
+    """k-means++ seeding : next medoid drawn with a probability proportional to the
+    squared distance to the nearest medoid already chosen"""
+    medoids = [int(generator.integers(num_services))]
+    nearest = distances(numpy.arange(num_services), numpy.array(medoids))[:, 0].astype(numpy.float64)
+    while len(medoids) < num_clusters:
+        weights = nearest ** 2
+        weights[medoids] = 0
+        if weights.sum() > 0:
+            medoid = int(generator.choice(num_services, p=weights / weights.sum()))
+        else:
+            medoid = int(generator.choice(numpy.setdiff1d(numpy.arange(num_services), medoids)))
+        medoids.append(medoid)
+        nearest = numpy.minimum(nearest, distances(numpy.arange(num_services), numpy.array([medoid]))[:, 0])
+    return numpy.array(medoids)
+
+
+def update_medoids(distances, labels, medoids, sample_size, generator, clusters=None):
+    """Move every medoid to the member (among at most sample_size sampled ones, the
+    current medoid included) minimizing the sum of the distances to the cluster members
+
+    Empty clusters keep their medoid, as the clusters not in clusters (all if None).
+    """
+    num_clusters = medoids.size
+    order = numpy.argsort(labels, kind="stable")
+    bounds = numpy.searchsorted(labels[order], numpy.arange(num_clusters + 1))
+    new_medoids = medoids.copy()
+    for cluster in range(num_clusters) if clusters is None else clusters:
+        members = order[bounds[cluster]:bounds[cluster + 1]]
+        if members.size == 0:
+            continue
+        candidates = members
+        if members.size > sample_size:
+            candidates = numpy.union1d(generator.choice(members, sample_size, replace=False), [medoids[cluster]])
+        costs = numpy.zeros(candidates.size, dtype=numpy.float64)
+        for start in range(0, members.size, ROWS_CHUNK_SIZE):
+            costs += distances(candidates, members[start:start + ROWS_CHUNK_SIZE]).sum(axis=1)
+        new_medoids[cluster] = candidates[numpy.argmin(costs)]
+    return new_medoids
+
+
+def k_medoids(distances, num_services, num_clusters, max_iterations=10, sample_size=200, seed=0, medoids=None):
+    """Alternating k-medoids with sampled medoid updates
+
+    Every iteration assigns each service to its nearest medoid then moves each medoid
+    to the member (among at most sample_size sampled ones) minimizing the sum of the
+    distances to the cluster members. Memory is O(num_services * max(num_clusters, sample_size)).
+
+    Attributes
+    ----------
+        distances (function): distances(rows, columns) between services
+        medoids (numpy.ndarray): initial medoids, k-means++ seeding if None
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray) : cluster of every service and medoid of every cluster
+    """
+    generator = numpy.random.default_rng(seed)
+    num_clusters = min(num_clusters, num_services)
+    if medoids is None:
+        medoids = initial_medoids(distances, num_services, num_clusters, generator)
+    medoids = numpy.array(medoids)
+
+    for _ in range(max_iterations):
+        labels, _ = nearest_medoids(distances, num_services, medoids)
+        new_medoids = update_medoids(distances, labels, medoids, sample_size, generator)
+        if (new_medoids == medoids).all():
+            break
+        medoids = new_medoids
+
+    labels, _ = nearest_medoids(distances, num_services, medoids)
+    return labels, medoids
+
+
+def depots_times(time_matrices, services_matrix_index, vehicles_matrix_index, vehicle_start_index, vehicle_end_index):
+    """Travel time between the services and the depots of the vehicles : mean of
+    the time from the vehicle start and of the time to the vehicle end (only one of
+    them if the other is not set)
+
+    Vehicles sharing the same start, end and matrix share the same depot.
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray) : num_services x num_depots times and depot of every vehicle
+    """
+    vehicles_depots = numpy.stack([vehicles_matrix_index, vehicle_start_index, vehicle_end_index], axis=1)
+    depots, vehicle_depot = numpy.unique(vehicles_depots, axis=0, return_inverse=True)
+    times = numpy.zeros((services_matrix_index.shape[0], depots.shape[0]), dtype=numpy.float32)
+    for depot, (matrix_index, start_index, end_index) in enumerate(depots):
+        time_matrix = time_matrices[matrix_index]
+        legs = 0
+        if start_index >= 0:
+            times[:, depot] += time_matrix[start_index, services_matrix_index]
+            legs += 1
+        if end_index >= 0:
+            times[:, depot] += time_matrix[services_matrix_index, end_index]
+            legs += 1
+        times[:, depot] /= max(legs, 1)
+    return times, vehicle_depot.ravel()
+
+
+def bound_medoids(profiles_distances, cluster_profile, depot_times, cluster_depot, generator):
+    """k-means++ seeding of the clusters of every (profile, depot) group, with the
+    distances of the profile, among the services closest to the depot (among all
+    the services if there are fewer than clusters)"""
+    num_services = depot_times.shape[0]
+    nearest_depot = numpy.argmin(depot_times, axis=1)
+    medoids = numpy.full(cluster_profile.shape[0], -1, dtype=numpy.int64)
+    for profile, depot in numpy.unique(numpy.stack([cluster_profile, cluster_depot], axis=1), axis=0):
+        clusters = numpy.flatnonzero((cluster_profile == profile) & (cluster_depot == depot))
+        services = numpy.setdiff1d(numpy.flatnonzero(nearest_depot == depot), medoids)
+        if services.size < clusters.size:
+            services = numpy.setdiff1d(numpy.arange(num_services), medoids)
+
+        def group_distances(rows, columns, services=services, distances=profiles_distances[profile]):
+            return distances(services[rows], services[columns])
+        medoids[clusters] = services[initial_medoids(group_distances, services.size, clusters.size, generator)]
+    return medoids
+
+
+def bound_k_medoids(profiles_distances, num_services, cluster_profile, depot_times=None, cluster_depot=None,
+                    max_iterations=10, sample_size=200, seed=0, num_starts=1):
+    """k-medoids with clusters bound to vehicles
+
+    Every cluster is measured with the distances of the profile (matrix) of its
+    vehicle and, with depot times, the travel time between a service and the
+    cluster depot is added to its cost in the cluster. Clusters are seeded around
+    their depot.
+
+    With several profiles a cluster seeded where its profile is slow is easily
+    stuck there : num_starts runs from different seedings keep the cheapest.
+
+    Attributes
+    ----------
+        profiles_distances (list): distances(rows, columns) function of every profile
+        cluster_profile (numpy.ndarray): profile of every cluster
+        depot_times (numpy.ndarray): num_services x num_depots times (see depots_times), None to ignore depots
+        cluster_depot (numpy.ndarray): depot of every cluster
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray) : cluster of every service and medoid of every cluster
+    """
+    num_clusters = cluster_profile.shape[0]
+    if depot_times is None:
+        depot_times = numpy.zeros((num_services, 1), dtype=numpy.float32)
+        cluster_depot = numpy.zeros(num_clusters, dtype=numpy.int64)
+    profiles_clusters = [(profile, numpy.flatnonzero(cluster_profile == profile)) for profile in numpy.unique(cluster_profile)]
+
+    def assign(medoids):
+        labels = numpy.empty(num_services, dtype=numpy.int32)
+        total_cost = 0
+        costs = numpy.empty((min(ROWS_CHUNK_SIZE, num_services), num_clusters), dtype=numpy.float32)
+        for start in range(0, num_services, ROWS_CHUNK_SIZE):
+            rows = numpy.arange(start, min(start + ROWS_CHUNK_SIZE, num_services))
+            for profile, clusters in profiles_clusters:
+                costs[:rows.size, clusters] = profiles_distances[profile](rows, medoids[clusters])
+            block = costs[:rows.size] + depot_times[rows][:, cluster_depot]
+            labels[rows] = numpy.argmin(block, axis=1)
+            total_cost += block[numpy.arange(rows.size), labels[rows]].sum(dtype=numpy.float64)
+        return labels, total_cost
+
+    best = None
+    for start_seed in range(seed, seed + num_starts):
+        generator = numpy.random.default_rng(start_seed)
+        medoids = bound_medoids(profiles_distances, cluster_profile, depot_times, cluster_depot, generator)
+        for _ in range(max_iterations):
+            labels, _ = assign(medoids)
+            new_medoids = medoids.copy()
+            for profile, clusters in profiles_clusters:
+                new_medoids[clusters] = update_medoids(profiles_distances[profile], labels, medoids, sample_size, generator, clusters)[clusters]
+            if (new_medoids == medoids).all():
+                break
+            medoids = new_medoids
+        labels, total_cost = assign(medoids)
+        if best is None or total_cost < best[0]:
+            best = (total_cost, labels, medoids)
+
+    return best[1], best[2]
+
+
+def depot_k_medoids(distances, num_services, depot_times, cluster_depot, max_iterations=10, sample_size=200, seed=0):
+    """k-medoids with clusters bound to depots, single profile (see bound_k_medoids)"""
+    return bound_k_medoids([distances], num_services, numpy.zeros(cluster_depot.shape[0], dtype=numpy.int64),
+                           depot_times, cluster_depot, max_iterations, sample_size, seed)
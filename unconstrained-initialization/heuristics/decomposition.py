@@ -0,0 +1,59 @@
+"""Split of the routes into groups of neighbouring routes
+
+route_locations places every route at the medoid of its services (travel time
+in the matrix of its vehicle), an empty route at the start of its vehicle (its
+end without start). group_routes clusters these locations with k_medoids so
+that a group gathers routes which may exchange services, the trips of a vehicle
+(previous_vehicle) staying in the group of the first one. The empty routes of
+vehicles without depot have no location and are spread over the groups.
+"""
+import numpy
+
+from heuristics.clustering import time_distances, k_medoids
+
+# Routes of a group by default
+DEFAULT_DECOMPOSITION_ROUTES = 8
+
+
+def route_locations(paths, services_matrix_index, time_matrices, vehicles_matrix_index, vehicle_start_index, vehicle_end_index):
+    """Location of every route : medoid of its services, vehicle depot if it has none
+
+    Returns
+    -------
+        numpy.ndarray : location (matrix index) of every vehicle, -1 for an empty route without depot
+    """
+    locations = numpy.where(vehicle_start_index >= 0, vehicle_start_index, vehicle_end_index).astype(numpy.int64)
+    for vehicle, path in enumerate(paths):
+        route = services_matrix_index[path[path >= 0]]
+        route = route[route >= 0]
+        if route.size > 0:
+            time_matrix = time_matrices[vehicles_matrix_index[vehicle]]
+            block = time_matrix[route[:, None], route]
+            locations[vehicle] = route[numpy.argmin(block.sum(axis=0) + block.sum(axis=1))]
+    return locations
+
+
+def group_routes(locations, time_matrix, num_groups, previous_vehicle, seed=0):
+    """Groups of neighbouring routes
+
+    Attributes
+    ----------
+        locations (numpy.ndarray): location of every route (see route_locations), -1 if none
+        previous_vehicle (numpy.ndarray): vehicle doing the previous trip of every vehicle, -1 if none
+
+    Returns
+    -------
+        list : vehicles of every non empty group
+    """
+    labels = numpy.empty(locations.size, dtype=numpy.int64)
+    located = locations >= 0
+    if located.any():
+        labels[located], _ = k_medoids(time_distances(time_matrix, locations[located]), numpy.count_nonzero(located), num_groups, seed=seed)
+    # Routes without location go to the groups in turn
+    labels[~located] = numpy.arange(numpy.count_nonzero(~located)) % num_groups
+    for vehicle in range(labels.size):
+        first = vehicle
+        while previous_vehicle[first] >= 0:
+            first = previous_vehicle[first]
+        labels[vehicle] = labels[first]
+    return [vehicles for vehicles in (numpy.flatnonzero(labels == group) for group in range(num_groups)) if vehicles.size > 0]
@@ -0,0 +1,153 @@
+"""Bulk cheapest insertion of services into existing paths
+
+Every round evaluates, for all the services left, the travel time added by their
+insertion between every pair of consecutive locations of every path (depots
+included) with the matrix of the path vehicle. Each insertion slot then receives
+the service it suits best, in increasing cost order while the vehicle capacities
+allow it, and the slots of the modified paths are rebuilt for the next round.
+
+Time windows are not considered : the solver repairs the schedule.
+"""
+import numpy
+
+# Services evaluated at once against all the insertion slots
+ROWS_CHUNK_SIZE = 1024
+
+
+def path_loads(paths, volumes, num_units):
+    """Volume carried by every path, per unit"""
+    loads = numpy.zeros((paths.shape[0], num_units))
+    for vehicle, path in enumerate(paths):
+        services = path[path >= 0]
+        if services.size > 0:
+            loads[vehicle] = volumes[services].sum(axis=0)
+    return loads
+
+
+def insertion_slots(paths, services_matrix_index, vehicle_start_index, vehicle_end_index):
+    """Every place a service can be inserted at in the paths
+
+    Services without location (rests) are kept in place and skipped. Missing
+    locations (no start or end depot, empty path) are -1.
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray) : vehicle, path position,
+            previous and next location of every slot
+    """
+    vehicles, positions, previous, following = [], [], [], []
+    for vehicle, path in enumerate(paths):
+        length = int(numpy.count_nonzero(path >= 0))
+        located = numpy.flatnonzero(services_matrix_index[path[:length]] >= 0)
+        locations = numpy.concatenate((
+            [vehicle_start_index[vehicle]],
+            services_matrix_index[path[located]],
+            [vehicle_end_index[vehicle]]
+        ))
+        vehicles.append(numpy.full(located.size + 1, vehicle))
+        positions.append(numpy.concatenate(([0], located + 1)))
+        previous.append(locations[:-1])
+        following.append(locations[1:])
+    return numpy.concatenate(vehicles), numpy.concatenate(positions), numpy.concatenate(previous), numpy.concatenate(following)
+
+
+def insertion_costs(services_locations, slots, time_matrices, vehicles_matrix_index):
+    """Travel time added by the insertion of every service in every slot
+
+    Returns
+    -------
+        numpy.ndarray : len(services_locations) x num_slots costs
+    """
+    slots_vehicle, _, previous, following = slots
+    slots_matrix = vehicles_matrix_index[slots_vehicle]
+    costs = numpy.empty((services_locations.size, slots_vehicle.size), dtype=numpy.float32)
+    for matrix_index in numpy.unique(slots_matrix):
+        columns = numpy.flatnonzero(slots_matrix == matrix_index)
+        time_matrix = time_matrices[matrix_index]
+        before, after = previous[columns], following[columns]
+        block = numpy.where(before >= 0, time_matrix[before[None, :], services_locations[:, None]], 0) \
+            + numpy.where(after >= 0, time_matrix[services_locations[:, None], after[None, :]], 0) \
+            - numpy.where((before >= 0) & (after >= 0), time_matrix[before, after], 0)[None, :]
+        costs[:, columns] = block
+    return costs
+
+
+def insert_services(paths, services, time_matrices, services_matrix_index, vehicles_matrix_index,
+                    vehicle_start_index, vehicle_end_index, volumes=None, capacities=None, sticky_vehicles=None):
+    """Insert services in the paths by rounds of bulk cheapest insertion
+
+    Attributes
+    ----------
+        paths (numpy.ndarray): num_vehicles x width paths, -1 padded, modified in place
+        services (numpy.ndarray): services to insert
+        volumes (numpy.ndarray): num_services x num_units quantities, capacities ignored if None
+        capacities (numpy.ndarray): num_vehicles x num_units capacities, inf if unlimited
+        sticky_vehicles (dict): service index -> allowed vehicles (empty for all)
+
+    Returns
+    -------
+        numpy.ndarray : services which could not be inserted (capacities or sticky vehicles)
+    """
+    num_vehicles = paths.shape[0]
+    remaining = numpy.asarray(services, dtype=numpy.int64)
+    uninserted = []
+    check_capacities = volumes is not None and capacities is not None
+    if check_capacities:
+        loads = path_loads(paths, volumes, capacities.shape[1])
+
+    while remaining.size > 0:
+        slots = insertion_slots(paths, services_matrix_index, vehicle_start_index, vehicle_end_index)
+        slots_vehicle, slots_position = slots[0], slots[1]
+        best_slots = numpy.empty(remaining.size, dtype=numpy.int64)
+        best_costs = numpy.empty(remaining.size)
+        for start in range(0, remaining.size, ROWS_CHUNK_SIZE):
+            rows = remaining[start:start + ROWS_CHUNK_SIZE]
+            costs = insertion_costs(services_matrix_index[rows], slots, time_matrices, vehicles_matrix_index)
+            allowed = numpy.ones((rows.size, num_vehicles), dtype=bool)
+            if check_capacities:
+                allowed &= (loads[None, :, :] + volumes[rows][:, None, :] <= capacities[None, :, :]).all(axis=2)
+            if sticky_vehicles is not None:
+                for row, service in enumerate(rows):
+                    vehicles = sticky_vehicles.get(service, [])
+                    if len(vehicles) > 0:
+                        sticky = numpy.zeros(num_vehicles, dtype=bool)
+                        sticky[vehicles[vehicles < num_vehicles]] = True
+                        allowed[row] &= sticky
+            costs[~allowed[:, slots_vehicle]] = numpy.inf
+            best_slots[start:start + rows.size] = numpy.argmin(costs, axis=1)
+            best_costs[start:start + rows.size] = costs[numpy.arange(rows.size), best_slots[start:start + rows.size]]
+
+        feasible = numpy.isfinite(best_costs)
+        uninserted.append(remaining[~feasible])
+        remaining, best_slots, best_costs = remaining[feasible], best_slots[feasible], best_costs[feasible]
+
+        # Cheapest service of every slot, the slot of a path being invalid once the path changed
+        order = numpy.lexsort((best_costs, best_slots))
+        first = numpy.ones(order.size, dtype=bool)
+        first[1:] = best_slots[order][1:] != best_slots[order][:-1]
+        candidates = order[first]
+        inserted = numpy.zeros(remaining.size, dtype=bool)
+        insertions = [[] for _ in range(num_vehicles)]
+        for candidate in candidates[numpy.argsort(best_costs[candidates], kind="stable")]:
+            service, slot = remaining[candidate], best_slots[candidate]
+            vehicle = slots_vehicle[slot]
+            if check_capacities:
+                if not (loads[vehicle] + volumes[service] <= capacities[vehicle]).all():
+                    continue
+                loads[vehicle] += volumes[service]
+            insertions[vehicle].append((slots_position[slot], service))
+            inserted[candidate] = True
+        if not inserted.any():
+            uninserted.append(remaining)
+            break
+
+        for vehicle, vehicle_insertions in enumerate(insertions):
+            if len(vehicle_insertions) == 0:
+                continue
+            length = int(numpy.count_nonzero(paths[vehicle] >= 0))
+            positions, new_services = zip(*vehicle_insertions)
+            path = numpy.insert(paths[vehicle, :length], positions, new_services)
+            paths[vehicle, :path.size] = path
+        remaining = remaining[~inserted]
+
+    return numpy.concatenate(uninserted) if uninserted else numpy.empty(0, dtype=numpy.int64)
@@ -0,0 +1,71 @@
+"""Removal of related services from the paths, for ruin and recreate
+
+Every ruin picks a random routed service and removes up to size services related
+to it :
+
+    cluster_ruin    : the services nearest to it (travel time, both directions)
+    route_pair_ruin : services of its route and of the nearest route
+    time_slice_ruin : the services starting the closest to its start time
+
+Services without location (rests) are never removed.
+"""
+import numpy
+
+
+def routed_services(paths, services_matrix_index):
+    """Services of the paths which have a location"""
+    services = paths[paths >= 0]
+    return services[services_matrix_index[services] >= 0]
+
+
+def cluster_ruin(paths, services_matrix_index, time_matrix, size, generator):
+    services = routed_services(paths, services_matrix_index)
+    if services.size == 0:
+        return services
+    locations = services_matrix_index[services]
+    pivot = locations[generator.integers(services.size)]
+    distances = time_matrix[pivot, locations] + time_matrix[locations, pivot]
+    return numpy.sort(services[numpy.argsort(distances, kind="stable")[:size]])
+
+
+def route_pair_ruin(paths, services_matrix_index, route_locations, time_matrix, size, generator):
+    """Attributes
+    ----------
+        route_locations (numpy.ndarray): location of every route (see heuristics.decomposition.route_locations)
+    """
+    routes = [routed_services(path[None, :], services_matrix_index) for path in paths]
+    non_empty = numpy.flatnonzero([route.size > 0 for route in routes])
+    if non_empty.size == 0:
+        return numpy.empty(0, dtype=paths.dtype)
+    route = non_empty[generator.integers(non_empty.size)]
+    others = non_empty[non_empty != route]
+    services = routes[route]
+    if others.size > 0:
+        location, others_locations = route_locations[route], route_locations[others]
+        nearest = others[numpy.argmin(time_matrix[location, others_locations] + time_matrix[others_locations, location])]
+        services = numpy.concatenate((services, routes[nearest]))
+    if services.size > size:
+        services = generator.choice(services, size, replace=False)
+    return numpy.sort(services)
+
+
+def time_slice_ruin(paths, services_matrix_index, path_starts, size, generator):
+    """Attributes
+    ----------
+        path_starts (numpy.ndarray): start time of every path position
+    """
+    located = (paths >= 0) & (services_matrix_index[paths] >= 0)
+    services, starts = paths[located], path_starts[located]
+    if services.size == 0:
+        return services
+    pivot = starts[generator.integers(services.size)]
+    return numpy.sort(services[numpy.argsort(numpy.abs(starts - pivot), kind="stable")[:size]])
+
+
+def remove_services(paths, services):
+    """Paths without the services, the others kept in order at the start of the paths"""
+    ruined = numpy.full_like(paths, -1)
+    for vehicle, path in enumerate(paths):
+        kept = path[(path >= 0) & ~numpy.isin(path, services)]
+        ruined[vehicle, :kept.size] = kept
+    return ruined
@@ -0,0 +1,45 @@
+import numpy
+
+from heuristics.assignment import cluster_depot_times, cluster_overloads, shift_incompatibilities, sticky_violations, \
+    assignment_costs, assign_clusters
+
+def test_cluster_depot_times():
+    time_matrices = numpy.array([[[0, 1, 2], [3, 0, 4], [5, 6, 0]], [[0, 2, 4], [6, 0, 8], [10, 12, 0]]], dtype=numpy.float64)
+    labels = numpy.array([0, 1])
+
+    times = cluster_depot_times(labels, 2, numpy.array([0, 1]), time_matrices, numpy.array([0, 1]),
+                                numpy.array([2, 2]), numpy.array([-1, 2]))
+
+    assert (times == numpy.array([[5, 10 + 4], [6, 12 + 8]])).all()
+
+def test_cluster_overloads():
+    labels = numpy.array([0, 0, 1])
+    volumes = numpy.array([[2, 1], [2, 1], [1, 0]], dtype=numpy.float64)
+    capacities = numpy.array([[2, numpy.inf], [numpy.inf, 1]])
+
+    overloads = cluster_overloads(labels, 2, volumes, capacities)
+
+    assert (overloads == numpy.array([[0.5, 0.5], [0, 0]])).all()
+
+def test_shift_incompatibilities():
+    labels = numpy.array([0, 0, 1])
+    start_tw = numpy.array([[0, 0], [100, 300], [0, 0]], dtype=numpy.float64)
+    end_tw = numpy.array([[50, 0], [200, 400], [-1, 0]], dtype=numpy.float64)
+
+    incompatibilities = shift_incompatibilities(labels, 2, start_tw, end_tw, numpy.array([0, 250]), numpy.array([120, -1]))
+
+    assert (incompatibilities == numpy.array([[0, 0.5], [0, 0]])).all()
+
+def test_sticky_violations():
+    violations = sticky_violations(numpy.array([0, 1, 1]), 2, 3, {0: numpy.array([2]), 1: numpy.array([], dtype=numpy.int32), 2: numpy.array([0, 2])})
+
+    assert (violations == numpy.array([[1, 1, 0], [0, 1, 0]])).all()
+
+def test_assign_clusters():
+    depot_times = numpy.array([[10, 1, 5], [1, 10, 5]], dtype=numpy.float64)
+    overloads = numpy.array([[0, 1, 0], [0, 0, 0]], dtype=numpy.float64)
+    zeros = numpy.zeros((2, 3))
+
+    cluster_vehicles = assign_clusters(assignment_costs(depot_times, overloads, zeros, zeros))
+
+    assert cluster_vehicles.tolist() == [2, 0]
@@ -0,0 +1,53 @@
+import numpy
+
+from heuristics.balancing import balanced_assignment, balanced_k_medoids, capacity_limits, working_time_budgets
+from heuristics.clustering import time_distances
+
+def test_capacity_limits():
+    limits = capacity_limits(numpy.array([[10, -1], [5, 3]], dtype=numpy.float64), 3)
+
+    assert (limits == numpy.array([[10, numpy.inf, numpy.inf], [5, 3, numpy.inf]])).all()
+
+def test_working_time_budgets():
+    budgets = working_time_budgets(numpy.array([0, 100, 0]), numpy.array([-1, 600, 1000]), numpy.array([-1, -1, 300]), numpy.array([0, 50, 0]))
+
+    assert (budgets == numpy.array([numpy.inf, 450, 300])).all()
+
+def test_balanced_assignment_capacities():
+    costs = numpy.array([[0, 10], [0, 10], [0, 10], [10, 0]], dtype=numpy.float32)
+    volumes = numpy.array([[2], [2], [2], [1]])
+    capacities = numpy.array([[4], [4]], dtype=numpy.float64)
+
+    labels = balanced_assignment(costs, volumes, capacities, numpy.zeros(4), numpy.full(2, numpy.inf))
+
+    assert (labels == numpy.array([0, 0, 1, 1])).all() or (labels == numpy.array([0, 1, 0, 1])).all() or (labels == numpy.array([1, 0, 0, 1])).all()
+
+def test_balanced_assignment_working_time():
+    costs = numpy.zeros((4, 2), dtype=numpy.float32)
+    costs[:, 1] = 1
+    workloads = numpy.array([100, 100, 100, 100])
+
+    labels = balanced_assignment(costs, numpy.zeros((4, 1)), numpy.full((2, 1), numpy.inf), workloads, numpy.array([250, 250]))
+
+    assert numpy.bincount(labels).tolist() == [2, 2]
+
+def test_balanced_assignment_overflow_and_sticky():
+    costs = numpy.array([[0, 5], [0, 5], [0, 5]], dtype=numpy.float32)
+    volumes = numpy.array([[3], [3], [3]])
+    capacities = numpy.array([[3], [6]], dtype=numpy.float64)
+
+    labels = balanced_assignment(costs, volumes, capacities, numpy.zeros(3), numpy.full(2, numpy.inf), {2: numpy.array([0])})
+
+    assert labels[2] == 0
+    assert sorted(labels[:2]) == [1, 1]
+
+def test_balanced_k_medoids():
+    points = numpy.array([[0, 0], [1, 0], [0, 1], [1, 1], [100, 100], [101, 100]])
+    time_matrix = numpy.abs(points[:, None, :] - points[None, :, :]).sum(axis=2).astype(numpy.float64)
+    distances = time_distances(time_matrix, numpy.arange(6))
+
+    labels, medoids = balanced_k_medoids(distances, 6, numpy.array([0, 4]), numpy.ones((6, 1)),
+                                         numpy.array([[3], [3]], dtype=numpy.float64), numpy.zeros(6), numpy.full(2, numpy.inf))
+
+    assert numpy.bincount(labels).tolist() == [3, 3]
+    assert (labels[4:] == labels[5]).all()
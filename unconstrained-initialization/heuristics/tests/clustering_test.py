@@ -0,0 +1,101 @@
+import pytest
+import numpy
+
+from heuristics.clustering import k_medoids, time_distances, select_clustering_method, nearest_medoids, depots_times, depot_k_medoids, \
+    time_window_distances, dense_distances
+
+def grid_instance(num_groups=4, group_size=30, seed=0):
+    generator = numpy.random.default_rng(seed)
+    centers = numpy.array([[0, 0], [1000, 0], [0, 1000], [1000, 1000]])[:num_groups]
+    points = numpy.concatenate([center + generator.random((group_size, 2)) * 100 for center in centers])
+    time_matrix = numpy.abs(points[:, None, :] - points[None, :, :]).sum(axis=2)
+    groups = numpy.repeat(numpy.arange(num_groups), group_size)
+    return time_matrix, groups
+
+def test_time_distances_symmetric():
+    time_matrix = numpy.array([[0, 1, 4], [3, 0, 2], [6, 8, 0]], dtype=numpy.float64)
+    distances = time_distances(time_matrix, numpy.array([2, 0]))
+
+    assert (distances(numpy.array([0, 1]), numpy.array([0, 1])) == numpy.array([[0, 5], [5, 0]])).all()
+
+@pytest.mark.parametrize("method,num_services,expected", [
+    ("auto", 10, "agglomerative"),
+    ("auto", 10000, "kmedoids"),
+    ("agglomerative", 10000, "agglomerative"),
+    ("kmedoids", 10, "kmedoids"),
+])
+def test_select_clustering_method(method, num_services, expected):
+    assert select_clustering_method(method, 5000, num_services) == expected
+
+def test_k_medoids_finds_groups():
+    time_matrix, groups = grid_instance()
+    distances = time_distances(time_matrix, numpy.arange(groups.size))
+
+    labels, medoids = k_medoids(distances, groups.size, 4, sample_size=10)
+
+    assert medoids.size == 4
+    for group in range(4):
+        assert numpy.unique(labels[groups == group]).size == 1
+    assert numpy.unique(labels).size == 4
+
+def test_k_medoids_more_clusters_than_services():
+    time_matrix, groups = grid_instance(num_groups=1, group_size=3)
+    distances = time_distances(time_matrix, numpy.arange(groups.size))
+
+    labels, medoids = k_medoids(distances, groups.size, 5)
+
+    assert sorted(labels) == [0, 1, 2]
+
+def test_nearest_medoids_chunks(monkeypatch):
+    monkeypatch.setattr("heuristics.clustering.ROWS_CHUNK_SIZE", 7)
+    time_matrix, groups = grid_instance()
+    distances = time_distances(time_matrix, numpy.arange(groups.size))
+    medoids = numpy.array([0, 30, 60, 90])
+
+    labels, nearest = nearest_medoids(distances, groups.size, medoids)
+
+    assert (labels == groups).all()
+    assert (nearest[medoids] == 0).all()
+
+def test_depots_times():
+    time_matrices = numpy.array([[[0, 1, 2], [3, 0, 4], [5, 6, 0]]], dtype=numpy.float64)
+
+    times, vehicle_depot = depots_times(time_matrices, numpy.array([0, 1]), numpy.array([0, 0, 0]),
+                                        numpy.array([2, 2, -1]), numpy.array([2, 2, 2]))
+
+    assert vehicle_depot[0] == vehicle_depot[1] != vehicle_depot[2]
+    assert (times[:, vehicle_depot[0]] == numpy.array([(5 + 2) / 2, (6 + 4) / 2])).all()
+    assert (times[:, vehicle_depot[2]] == numpy.array([2, 4])).all()
+
+def test_depot_k_medoids():
+    # Depot 0 is in the first group and has two vehicles, depot 1 is in the second group
+    time_matrix, groups = grid_instance(num_groups=2, group_size=30)
+    distances = time_distances(time_matrix, numpy.arange(groups.size))
+    depot_times = numpy.stack([time_matrix[:, 0], time_matrix[:, 30]], axis=1).astype(numpy.float32)
+
+    labels, medoids = depot_k_medoids(distances, groups.size, depot_times, numpy.array([0, 0, 1]))
+
+    assert set(labels[groups == 0]) <= {0, 1}
+    assert (labels[groups == 1] == 2).all()
+
+def test_time_window_distances():
+    time_matrix = numpy.array([[0, 10], [20, 0]], dtype=numpy.float64)
+    start_tw = numpy.array([[0, 0], [100, 400], [50, 0]], dtype=numpy.float64)
+    end_tw = numpy.array([[60, 0], [200, 500], [-1, 0]], dtype=numpy.float64)
+    durations = numpy.array([10, 0, 0], dtype=numpy.float64)
+
+    distances = time_window_distances(time_matrix, numpy.array([0, 1, 1]), start_tw, end_tw, durations, weight=2)
+    block = distances(numpy.arange(3), numpy.arange(3))
+
+    assert (block == block.T).all()
+    # 0 ends at 60 + 10 while 1 starts at 100
+    assert block[0, 1] == 15 + 2 * 30
+    # 2 is open ended
+    assert block[0, 2] == 15 + 2 * 0
+    assert block[1, 2] == 0
+
+def test_dense_distances():
+    time_matrix, groups = grid_instance(num_groups=1, group_size=20)
+    distances = time_distances(time_matrix, numpy.arange(20))
+
+    assert (dense_distances(distances, 20) == distances(numpy.arange(20), numpy.arange(20))).all()
@@ -0,0 +1,67 @@
+import numpy
+
+from heuristics.decomposition import route_locations, group_routes
+
+def line_matrix(size):
+    positions = numpy.arange(size, dtype=numpy.float64)
+    return numpy.abs(positions[:, None] - positions[None, :])
+
+def test_route_locations():
+    time_matrices = numpy.array([line_matrix(8)])
+    paths = numpy.array([[0, 1, 2, -1], [3, -1, -1, -1], [-1, -1, -1, -1], [-1, -1, -1, -1]])
+    services_matrix_index = numpy.array([1, 2, 6, 7])
+
+    locations = route_locations(paths, services_matrix_index, time_matrices, numpy.zeros(4, dtype=int),
+                                numpy.array([0, 0, 5, -1]), numpy.array([0, 0, 0, 4]))
+
+    assert (locations == numpy.array([2, 7, 5, 4])).all()
+
+def test_route_locations_no_depot():
+    time_matrices = numpy.array([line_matrix(4)])
+    paths = numpy.array([[0, -1], [-1, -1]])
+
+    locations = route_locations(paths, numpy.array([3]), time_matrices, numpy.zeros(2, dtype=int),
+                                numpy.array([-1, -1]), numpy.array([-1, -1]))
+
+    assert (locations == numpy.array([3, -1])).all()
+
+def test_route_locations_rests():
+    time_matrices = numpy.array([line_matrix(4)])
+    paths = numpy.array([[2, 0, -1], [1, -1, -1]])
+
+    locations = route_locations(paths, numpy.array([3, -1, -1]), time_matrices, numpy.zeros(2, dtype=int),
+                                numpy.array([0, 1]), numpy.array([0, 1]))
+
+    assert (locations == numpy.array([3, 1])).all()
+
+def test_group_routes():
+    locations = numpy.array([0, 10, 1, 11, 2, 12])
+
+    groups = group_routes(locations, line_matrix(13), 2, numpy.full(6, -1))
+
+    assert sorted(group.tolist() for group in groups) == [[0, 2, 4], [1, 3, 5]]
+
+def test_group_routes_trips():
+    locations = numpy.array([0, 10, 1, 11])
+    # Vehicle 3 does the trip after vehicle 0
+    previous_vehicle = numpy.array([-1, -1, -1, 0])
+
+    groups = group_routes(locations, line_matrix(12), 2, previous_vehicle)
+
+    assert sorted(group.tolist() for group in groups) == [[0, 2, 3], [1]]
+
+def test_group_routes_without_location():
+    locations = numpy.array([0, -1, 10, -1, 11, -1])
+
+    groups = group_routes(locations, line_matrix(12), 2, numpy.full(6, -1))
+
+    assert sorted(numpy.concatenate(groups).tolist()) == list(range(6))
+    assert sorted(numpy.isin([0, 2, 4], group).sum() for group in groups) == [1, 2]
+    # Spread over the groups
+    assert sorted(numpy.isin([1, 3, 5], group).sum() for group in groups) == [1, 2]
+
+def test_group_routes_empty_groups():
+    groups = group_routes(numpy.array([3, 3, 3]), line_matrix(4), 2, numpy.full(3, -1))
+
+    assert sum(group.size for group in groups) == 3
+    assert all(group.size > 0 for group in groups)
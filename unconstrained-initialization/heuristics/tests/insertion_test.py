@@ -0,0 +1,64 @@
+import numpy
+
+from heuristics.insertion import insertion_slots, insertion_costs, insert_services
+
+def line_matrix(positions):
+    positions = numpy.array(positions)
+    return numpy.abs(positions[:, None] - positions[None, :])[None].astype(numpy.float64)
+
+def route_cost(time_matrix, path, depot):
+    locations = [depot] + [service for service in path if service >= 0] + [depot]
+    return sum(time_matrix[before, after] for before, after in zip(locations[:-1], locations[1:]))
+
+def test_insertion_slots():
+    paths = numpy.array([[0, 2, 1, -1], [-1, -1, -1, -1]])
+    services_matrix_index = numpy.array([3, 4, -1])
+
+    vehicles, positions, previous, following = insertion_slots(paths, services_matrix_index, numpy.array([5, -1]), numpy.array([6, -1]))
+
+    assert vehicles.tolist() == [0, 0, 0, 1]
+    # The rest (service 2) is skipped
+    assert positions.tolist() == [0, 1, 3, 0]
+    assert previous.tolist() == [5, 3, 4, -1]
+    assert following.tolist() == [3, 4, 6, -1]
+
+def test_insertion_costs():
+    time_matrices = line_matrix([0, 10, 4])
+    slots = (numpy.array([0, 0, 1]), numpy.array([0, 1, 0]), numpy.array([0, 1, -1]), numpy.array([1, -1, -1]))
+
+    costs = insertion_costs(numpy.array([2]), slots, time_matrices, numpy.array([0, 0]))
+
+    assert costs.tolist() == [[4 + 6 - 10, 6, 0]]
+
+def test_insert_services():
+    time_matrices = line_matrix([0, 1, 2, 3, 10, 11, 12, -1])
+    paths = numpy.full((2, 8), -1)
+    paths[0, :2] = [0, 3]
+    paths[1, :1] = [4]
+    services_matrix_index = numpy.arange(7)
+    depots = numpy.array([7, 7])
+
+    uninserted = insert_services(paths, numpy.array([1, 2, 5, 6]), time_matrices, services_matrix_index, numpy.array([0, 0]), depots, depots)
+
+    assert uninserted.size == 0
+    assert sorted(paths[0][paths[0] >= 0]) == [0, 1, 2, 3]
+    assert sorted(paths[1][paths[1] >= 0]) == [4, 5, 6]
+    # Both paths are optimal, the order of tied insertions is free
+    assert route_cost(time_matrices[0], paths[0], 7) == 8
+    assert route_cost(time_matrices[0], paths[1], 7) == 26
+
+def test_insert_services_capacities_and_sticky():
+    time_matrices = line_matrix([0, 1, 2, 100])
+    paths = numpy.full((2, 4), -1)
+    paths[0, 0] = 0
+    services_matrix_index = numpy.arange(3)
+    depots = numpy.array([3, 3])
+
+    uninserted = insert_services(paths, numpy.array([1, 2]), time_matrices, services_matrix_index, numpy.array([0, 0]), depots, depots,
+                                 volumes=numpy.ones((3, 1)), capacities=numpy.array([[2], [numpy.inf]]),
+                                 sticky_vehicles={2: numpy.array([0])})
+
+    # Service 1 fills vehicle 0, service 2 may only go there
+    assert sorted(paths[0][paths[0] >= 0]) == [0, 1]
+    assert (paths[1] == -1).all()
+    assert uninserted.tolist() == [2]
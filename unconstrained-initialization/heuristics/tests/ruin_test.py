@@ -0,0 +1,52 @@
+import numpy
+
+from heuristics.ruin import routed_services, cluster_ruin, route_pair_ruin, time_slice_ruin, remove_services
+
+def line_matrix(size):
+    positions = numpy.arange(size, dtype=numpy.float64)
+    return numpy.abs(positions[:, None] - positions[None, :])
+
+# Services 0-2 around location 1, 3-5 around location 11, 6 a rest
+PATHS = numpy.array([[0, 1, 6, -1, -1, -1, -1, -1], [2, 3, -1, -1, -1, -1, -1, -1], [4, 5, -1, -1, -1, -1, -1, -1]])
+SERVICES_MATRIX_INDEX = numpy.array([0, 1, 2, 10, 11, 12, -1])
+
+def test_routed_services():
+    assert sorted(routed_services(PATHS, SERVICES_MATRIX_INDEX)) == [0, 1, 2, 3, 4, 5]
+
+def test_cluster_ruin():
+    for seed in range(5):
+        removed = cluster_ruin(PATHS, SERVICES_MATRIX_INDEX, line_matrix(13), 3, numpy.random.default_rng(seed))
+
+        assert removed.tolist() in ([0, 1, 2], [3, 4, 5])
+
+def test_route_pair_ruin():
+    route_locations = numpy.array([1, 10, 12])
+
+    for seed in range(5):
+        removed = route_pair_ruin(PATHS, SERVICES_MATRIX_INDEX, route_locations, line_matrix(13), 10, numpy.random.default_rng(seed))
+
+        # Routes 1 and 2 are the nearest ones, route 0 is nearest to route 1 ; never the rest
+        assert removed.tolist() in ([0, 1, 2, 3], [2, 3, 4, 5])
+
+def test_route_pair_ruin_size():
+    removed = route_pair_ruin(PATHS, SERVICES_MATRIX_INDEX, numpy.array([1, 10, 12]), line_matrix(13), 2, numpy.random.default_rng(0))
+
+    assert removed.size == 2
+
+def test_time_slice_ruin():
+    path_starts = numpy.zeros(PATHS.shape)
+    path_starts[0, :3] = [100, 200, 300]
+    path_starts[1, :2] = [110, 900]
+    path_starts[2, :2] = [210, 1000]
+
+    for seed in range(5):
+        removed = time_slice_ruin(PATHS, SERVICES_MATRIX_INDEX, path_starts, 2, numpy.random.default_rng(seed))
+
+        assert removed.tolist() in ([0, 2], [1, 4], [3, 5])
+
+def test_remove_services():
+    ruined = remove_services(PATHS, numpy.array([1, 3]))
+
+    assert (ruined[0, :3] == [0, 6, -1]).all()
+    assert (ruined[1, :2] == [2, -1]).all()
+    assert (ruined[2] == PATHS[2]).all()
@@ -5,8 +5,8 @@ log = log.getLogger(__file__)
 
 #KS imports
 import numpy
-from marshmallow import fields, validate
 from schema import Schema, And, Use, Optional, SchemaError, Or
+from knowledge_sources.create_matrices_from_problem import validate_matrices
 
 class CheckResolution(AbstractKnowledgeSource):
     """
@@ -53,8 +53,8 @@ class CheckResolution(AbstractKnowledgeSource):
         problem_schema = Schema(
             {
                 "matrices" : [{
-                    "time":[Or(float, int)],
-                    "distance":[Or(float, int)]
+                    "time":Or(numpy.ndarray, list),
+                    "distance":Or(numpy.ndarray, list)
                 }],
                 "vehicles" : [{
                     'endIndex': int,
@@ -87,6 +87,7 @@ class CheckResolution(AbstractKnowledgeSource):
             ignore_extra_keys=True
         )
         problem_schema.validate(self.blackboard.problem)
+        validate_matrices(self.blackboard.problem)
 
         return True
 
@@ -55,6 +55,9 @@ class CreateDictionnaryIndexId(AbstractKnowledgeSource):
 
         for rest_index, rest in enumerate(self.blackboard.rests):
             self.blackboard.service_index_to_id[total_visit_number + rest_index] = rest[0].get("id", f"rest_{rest_index}")
+
+        # Reverse dictionnary, built once for the initial paths
+        self.blackboard.service_id_to_index = {service_id: index for index, service_id in self.blackboard.service_index_to_id.items()}
         # Services attributes
         self.blackboard.service_index_in_paths_to_pb_index = {}
         total_visit_number = 0
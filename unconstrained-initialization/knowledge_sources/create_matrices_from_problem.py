@@ -7,7 +7,90 @@ log = log.getLogger(Path(__file__).stem)
 #KS imports
 import math
 import numpy as np
-from schema import Use, Const, And, Schema, Or
+from schema import Use, Const, And, Schema, Or, SchemaError
+
+
+def validate_matrix_values(values, name):
+    """Check a flat matrix in bulk and return its size
+
+    Raises
+    ------
+        SchemaError: if the matrix is not numeric, not square, not finite or has negative values
+    """
+    values = np.asarray(values)
+    if values.ndim != 1 or (values.size > 0 and values.dtype.kind not in "fiu"):
+        raise SchemaError(f"{name} should be a flat list of numbers")
+    matrix_size = math.isqrt(values.size)
+    if matrix_size * matrix_size != values.size:
+        raise SchemaError(f"{name} is not square ({values.size} values)")
+    if values.size == 0:
+        return matrix_size
+
+    # NaN propagates through min/max and infinities end up in one of them
+    minimum, maximum = values.min(), values.max()
+    if not (np.isfinite(minimum) and np.isfinite(maximum)):
+        position = int(np.flatnonzero(~np.isfinite(values))[0])
+        raise SchemaError(f"{name} has a non finite value ({values[position]}) at [{position // matrix_size}, {position % matrix_size}]")
+    if minimum < 0:
+        position = int(np.argmin(values))
+        raise SchemaError(f"{name} has a negative value ({values[position]}) at [{position // matrix_size}, {position % matrix_size}]")
+
+    return matrix_size
+
+
+def validate_indices(indices, lower_bound, upper_bound, name):
+    """Check in bulk that every index is in [lower_bound, upper_bound["""
+    indices = np.asarray(indices, dtype=np.int64)
+    outside = (indices < lower_bound) | (indices >= upper_bound)
+    if outside.any():
+        position = int(np.flatnonzero(outside)[0])
+        raise SchemaError(f"{name} of element {position} is out of range ({indices[position]} not in [{lower_bound}, {upper_bound - 1}])")
+
+
+def validate_matrices(problem):
+    """Vectorized validation of the matrices and of every index pointing into them
+
+    Checks that all matrices are square with the same size, finite and non-negative,
+    that services and vehicles locations are inside the matrices and that vehicles
+    use an existing matrix.
+
+    Raises
+    ------
+        SchemaError: describing the first invalid value found
+    """
+    matrices = problem["matrices"]
+    if len(matrices) == 0:
+        raise SchemaError("Problem has no matrix")
+
+    matrix_size = None
+    for matrix_index, matrix in enumerate(matrices):
+        for key in ("time", "distance"):
+            size = validate_matrix_values(matrix[key], f"matrices[{matrix_index}].{key}")
+            if size == 0:
+                continue
+            if matrix_size is None:
+                matrix_size = size
+            elif size != matrix_size:
+                raise SchemaError(f"matrices[{matrix_index}].{key} has size {size} while other matrices have size {matrix_size}")
+    if matrix_size is None:
+        raise SchemaError("All matrices are empty")
+
+    services = problem["services"]
+    vehicles = problem["vehicles"]
+    validate_indices([service["matrixIndex"] for service in services], 0, matrix_size, "services matrixIndex")
+    validate_indices([vehicle["startIndex"] for vehicle in vehicles], -1, matrix_size, "vehicles startIndex")
+    validate_indices([vehicle["endIndex"] for vehicle in vehicles], -1, matrix_size, "vehicles endIndex")
+    validate_indices([vehicle.get("matrixIndex", 0) for vehicle in vehicles], 0, len(matrices), "vehicles matrixIndex")
+
+    return True
+
+def matrices_size(matrices):
+    """Size of the matrices, given by the first non empty one (time or distance)"""
+    for matrix in matrices:
+        for key in ("time", "distance"):
+            if len(matrix[key]) > 0:
+                return math.isqrt(len(matrix[key]))
+    return 0
 
 class CreateMatricesFromProblem(AbstractKnowledgeSource):
     """
@@ -25,8 +108,8 @@ class CreateMatricesFromProblem(AbstractKnowledgeSource):
         problem_schema = Schema(
             {
                 "matrices" : [{
-                    "time":[Or(float, int)],
-                    "distance":[Or(float, int)]
+                    "time":Or(np.ndarray, list),
+                    "distance":Or(np.ndarray, list)
                 }],
                 "vehicles" : [{
                     'endIndex': int,
@@ -41,6 +124,7 @@ class CreateMatricesFromProblem(AbstractKnowledgeSource):
             ignore_extra_keys=True
         )
         problem_schema.validate(self.blackboard.problem)
+        validate_matrices(self.blackboard.problem)
 
         return True
 
@@ -48,23 +132,18 @@ class CreateMatricesFromProblem(AbstractKnowledgeSource):
 
         matrices = self.blackboard.problem['matrices']
         num_matrices = len(matrices)
-        matrix_size = int(math.sqrt(len(matrices[0]['time'])))
+        matrix_size = matrices_size(matrices)
 
         # Create empty 3D arrays for time_matrices and distance_matrices
         time_matrices = np.zeros((num_matrices, matrix_size, matrix_size), dtype=np.float64)
         distance_matrices = np.zeros((num_matrices, matrix_size, matrix_size), dtype=np.float64)
 
+        # Each flat matrix is reshaped (view) then cast into its slice in a single bulk copy
         for matrix_index, matrix in enumerate(matrices):
-
-                # Create and fill time_matrix
-                for pointFrom in range(matrix_size):
-                    for pointTo in range(matrix_size):
-                        time_matrices[matrix_index, pointFrom, pointTo] = matrix["time"][pointFrom * matrix_size + pointTo]
-
-                # Create and fill distance_matrix
-                for pointFrom in range(matrix_size):
-                    for pointTo in range(matrix_size):
-                        distance_matrices[matrix_index, pointFrom, pointTo] = matrix['distance'][pointFrom * matrix_size + pointTo]
+            if len(matrix["time"]) > 0:
+                time_matrices[matrix_index] = np.reshape(matrix["time"], (matrix_size, matrix_size))
+            if len(matrix["distance"]) > 0:
+                distance_matrices[matrix_index] = np.reshape(matrix["distance"], (matrix_size, matrix_size))
 
         # Matrices
         self.blackboard.distance_matrices = distance_matrices
@@ -5,9 +5,118 @@ from pathlib import Path
 log = log.getLogger(Path(__file__).stem)
 
 #KS imports
+import numpy
 from google.protobuf.json_format import MessageToDict
 import localsearch_vrp_pb2
 
+# Protobuf wire types
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH_DELIMITED = 2
+WIRE_FIXED32 = 5
+
+# Field numbers of localsearch_vrp.proto
+PROBLEM_MATRICES_FIELD = 5
+MATRIX_SIZE_FIELD = 1
+MATRIX_ARRAY_FIELDS = {2: "time", 3: "distance", 4: "value"}
+
+
+def read_varint(buffer, position):
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+
+def iter_fields(buffer):
+    """Walk the top level fields of a serialized message
+
+    Yields (field_number, wire_type, field_start, value_start, value_end) where
+    buffer[field_start:value_end] is the whole field (tag included) and
+    buffer[value_start:value_end] its payload. Varint payloads are yielded decoded
+    in place of value_start.
+    """
+    position = 0
+    end = len(buffer)
+    while position < end:
+        field_start = position
+        tag, position = read_varint(buffer, position)
+        field_number, wire_type = tag >> 3, tag & 0x7
+        if wire_type == WIRE_VARINT:
+            value, position = read_varint(buffer, position)
+            yield field_number, wire_type, field_start, value, position
+        elif wire_type == WIRE_FIXED64:
+            yield field_number, wire_type, field_start, position, position + 8
+            position += 8
+        elif wire_type == WIRE_LENGTH_DELIMITED:
+            length, position = read_varint(buffer, position)
+            yield field_number, wire_type, field_start, position, position + length
+            position += length
+        elif wire_type == WIRE_FIXED32:
+            yield field_number, wire_type, field_start, position, position + 4
+            position += 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+
+
+def decode_matrix(buffer):
+    """Decode a serialized Matrix into numpy arrays
+
+    Packed float fields are little-endian float32 on the wire so they are exposed
+    through numpy.frombuffer, without any intermediate python object per element.
+    """
+    matrix = {"size": 0}
+    chunks = {name: [] for name in MATRIX_ARRAY_FIELDS.values()}
+    for field_number, wire_type, _, value_start, value_end in iter_fields(buffer):
+        if field_number == MATRIX_SIZE_FIELD and wire_type == WIRE_VARINT:
+            matrix["size"] = value_start
+        elif field_number in MATRIX_ARRAY_FIELDS and wire_type in (WIRE_LENGTH_DELIMITED, WIRE_FIXED32):
+            chunks[MATRIX_ARRAY_FIELDS[field_number]].append(
+                numpy.frombuffer(buffer, dtype="<f4", count=(value_end - value_start) // 4, offset=value_start)
+            )
+
+    for name, arrays in chunks.items():
+        if len(arrays) == 0:
+            matrix[name] = numpy.empty(0, dtype=numpy.float32)
+        elif len(arrays) == 1:
+            matrix[name] = arrays[0]
+        else:
+            matrix[name] = numpy.concatenate(arrays)
+    return matrix
+
+
+def decode_problem(data):
+    """Decode a serialized Problem
+
+    The matrices are decoded straight into numpy arrays, every other field goes
+    through MessageToDict to keep the dictionnary layout used by the knowledge sources.
+
+    Returns
+    -------
+        dict : same structure as MessageToDict(problem, including_default_value_fields=True)
+            except matrices "time", "distance" and "value" which are flat numpy.float32 arrays
+    """
+    buffer = memoryview(data)
+    others = bytearray()
+    matrices = []
+    for field_number, wire_type, field_start, value_start, value_end in iter_fields(buffer):
+        if field_number == PROBLEM_MATRICES_FIELD and wire_type == WIRE_LENGTH_DELIMITED:
+            matrices.append(decode_matrix(buffer[value_start:value_end]))
+        else:
+            others += buffer[field_start:value_end]
+
+    message = localsearch_vrp_pb2.Problem()
+    message.ParseFromString(bytes(others))
+    problem = MessageToDict(message, including_default_value_fields=True)
+    problem["matrices"] = matrices
+    return problem
+
+
 class DeserializeProblem(AbstractKnowledgeSource):
     """
     Deserialization of the problem dictionnary
@@ -24,8 +133,4 @@ class DeserializeProblem(AbstractKnowledgeSource):
         instance = self.blackboard.instance
 
         with open(instance, 'rb') as f:
-            self.blackboard.problem = localsearch_vrp_pb2.Problem()
-            self.blackboard.problem.ParseFromString(f.read())
-            self.blackboard.problem = MessageToDict(self.blackboard.problem, including_default_value_fields=True)
-
-
+            self.blackboard.problem = decode_problem(f.read())
@@ -7,12 +7,38 @@ log = log.getLogger(Path(__file__).stem)
 #KS imports
 import sys
 from os import path
+from blackboard.blackboard import PROFILE_ALL
+from heuristics.clustering import CLUSTERING_METHODS, CLUSTERING_AUTO, DEFAULT_CLUSTERING_THRESHOLD, DEFAULT_TIME_WINDOW_WEIGHT
+from heuristics.decomposition import DEFAULT_DECOMPOSITION_ROUTES
+from parallel import DEFAULT_MULTI_START_TIME_FRACTION
+
+def get_option(args, name, default, cast=str):
+    """Value following the optional argument name, default if it is not given"""
+    if name not in args:
+        return default
+    index = args.index(name)
+    if index + 1 >= len(args):
+        raise ValueError(f"Input argument '{name[1:]}' should be followed by a value")
+    return cast(args[index + 1])
 
 class GetArguments(AbstractKnowledgeSource):
     """
     Get input file (instance of the problem) and output file of the algorithm
+
+    Attributes
+    ----------
+        arguments (list): arguments of the job, the command line ones (sys.argv[1:]) if None
     """
 
+    def __init__(self, blackboard, arguments=None):
+        super().__init__(blackboard)
+        self.arguments = arguments
+
+    def get_arguments(self):
+        if self.arguments is None:
+            return sys.argv[1:]
+        return self.arguments
+
     def verify(self):
 
         # Check arguments exists
@@ -21,7 +47,7 @@ class GetArguments(AbstractKnowledgeSource):
             "-instance_file",
             "-solution_file",
         ]
-        args = sys.argv[1:]
+        args = self.get_arguments()
 
         for needed_argument in needed_arguments:
             if needed_argument not in args:
@@ -39,12 +65,51 @@ class GetArguments(AbstractKnowledgeSource):
         if not path.exists(instance):
             raise FileNotFoundError(f"Instance file ({instance}) doesn't not exist : can't build problem")
 
+        #Check clustering options
+        clustering_method = get_option(args, "-clustering_method", CLUSTERING_AUTO)
+        if clustering_method not in CLUSTERING_METHODS:
+            raise ValueError(f"Input argument 'clustering_method' should be one of {CLUSTERING_METHODS} (got {clustering_method})")
+        clustering_threshold = get_option(args, "-clustering_threshold", str(DEFAULT_CLUSTERING_THRESHOLD))
+        if not clustering_threshold.isnumeric():
+            raise ValueError(f"Input argument 'clustering_threshold' should be numeric (got {clustering_threshold})")
+        time_window_weight = get_option(args, "-time_window_weight", str(DEFAULT_TIME_WINDOW_WEIGHT))
+        try:
+            float(time_window_weight)
+        except ValueError:
+            raise ValueError(f"Input argument 'time_window_weight' should be a number (got {time_window_weight})")
+
+        #Check parallel options
+        for name in ["-cores", "-multi_start", "-decomposition_routes", "-portfolio", "-portfolio_rounds"]:
+            value = get_option(args, name, "1")
+            if not value.isnumeric() or int(value) < 1:
+                raise ValueError(f"Input argument '{name[1:]}' should be a positive integer (got {value})")
+        multi_start_time_fraction = get_option(args, "-multi_start_time_fraction", str(DEFAULT_MULTI_START_TIME_FRACTION))
+        try:
+            fraction = float(multi_start_time_fraction)
+        except ValueError:
+            fraction = None
+        if fraction is None or not 0 < fraction <= 1:
+            raise ValueError(f"Input argument 'multi_start_time_fraction' should be a number in ]0, 1] (got {multi_start_time_fraction})")
+
+        #Check stopping options
+        for name in ["-no_solution_improvement_limit", "-minimum_duration", "-init_duration"]:
+            value = get_option(args, name, "0")
+            if not value.isnumeric():
+                raise ValueError(f"Input argument '{name[1:]}' should be numeric (got {value})")
+        time_out_multiplier = get_option(args, "-time_out_multiplier", "1")
+        try:
+            multiplier = float(time_out_multiplier)
+        except ValueError:
+            multiplier = None
+        if multiplier is None or multiplier <= 0:
+            raise ValueError(f"Input argument 'time_out_multiplier' should be a positive number (got {time_out_multiplier})")
+
         return True
 
 
     def process(self):
         #Get arguments
-        args = sys.argv[1:]
+        args = self.get_arguments()
 
         #Get time limit
         index = args.index("-time_limit_in_ms")
@@ -55,4 +120,47 @@ class GetArguments(AbstractKnowledgeSource):
 
         index = args.index("-solution_file")
         self.blackboard.output_file = args[index + 1]
+
+        #Get clustering options
+        self.blackboard.clustering_method = get_option(args, "-clustering_method", CLUSTERING_AUTO)
+        self.blackboard.clustering_threshold = get_option(args, "-clustering_threshold", DEFAULT_CLUSTERING_THRESHOLD, int)
+        self.blackboard.balanced_clustering = "-balanced_clustering" in args
+        self.blackboard.cluster_assignment = "-no_cluster_assignment" not in args
+        self.blackboard.depot_seeding = "-depot_seeding" in args
+        self.blackboard.insert_unrouted = "-no_insert_unrouted" not in args
+        self.blackboard.time_window_clustering = "-time_window_clustering" in args
+        self.blackboard.time_window_weight = get_option(args, "-time_window_weight", DEFAULT_TIME_WINDOW_WEIGHT, float)
+
+        #Get parallel options, all the available cores if -cores is not given
+        self.blackboard.cores = get_option(args, "-cores", None, int)
+        self.blackboard.multi_start = get_option(args, "-multi_start", 1, int)
+        self.blackboard.multi_start_time_fraction = get_option(args, "-multi_start_time_fraction", DEFAULT_MULTI_START_TIME_FRACTION, float)
+        self.blackboard.decomposition = "-decomposition" in args
+        self.blackboard.decomposition_routes = get_option(args, "-decomposition_routes", DEFAULT_DECOMPOSITION_ROUTES, int)
+        self.blackboard.portfolio = get_option(args, "-portfolio", 1, int)
+        self.blackboard.portfolio_rounds = get_option(args, "-portfolio_rounds", 1, int)
+        self.blackboard.ruin_recreate = "-ruin_recreate" in args
+
+        #Get stopping options, durations in ms like time_limit_in_ms
+        self.blackboard.no_solution_improvement_limit = get_option(args, "-no_solution_improvement_limit", None, int)
+        self.blackboard.minimum_duration = get_option(args, "-minimum_duration", 0, int) / 1000
+        self.blackboard.time_out_multiplier = get_option(args, "-time_out_multiplier", None, float)
+        self.blackboard.init_duration = get_option(args, "-init_duration", None, int)
+        # Evaluate the initial solution only, without optimizing it
+        self.blackboard.only_first_solution = "-only_first_solution" in args
+        # The initial solution is there from the start : init_duration bounds the whole resolution
+        if self.blackboard.init_duration is not None:
+            self.blackboard.time_limit = min(self.blackboard.time_limit, self.blackboard.init_duration / 1000)
+
+        # Write the knowledge sources measures next to the solution file
+        self.blackboard.performance_report = "-performance_report" in args
+
+        # Profile the whole pipeline or only the knowledge source named after -profile
+        self.blackboard.profile = None
+        if "-profile" in args:
+            index = args.index("-profile")
+            if index + 1 < len(args) and not args[index + 1].startswith("-"):
+                self.blackboard.profile = args[index + 1]
+            else:
+                self.blackboard.profile = PROFILE_ALL
         print("output_file : ",  self.blackboard.output_file)
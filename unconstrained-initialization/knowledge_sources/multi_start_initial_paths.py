@@ -0,0 +1,144 @@
+#base imports
+from knowledge_sources.abstract_knowledge_source import AbstractKnowledgeSource
+import logging as log
+from pathlib import Path
+log = log.getLogger(Path(__file__).stem)
+
+#KS imports
+import itertools
+import time
+from lazy_imports import timed_import
+from parallel import fork_map
+from heuristics.clustering import select_clustering_method, CLUSTERING_AGGLOMERATIVE, CLUSTERING_KMEDOIDS, \
+    LINKAGE_COMPLETE, LINKAGE_AVERAGE
+from knowledge_sources.process_clustering_initial_paths import ProcessClusteringInitialPaths
+from knowledge_sources.process_initial_solution import build_solution
+
+# Clusters of the variants with fewer clusters than vehicles, as a fraction of the vehicles
+FEWER_CLUSTERS_FRACTION = 0.8
+
+def clustering_variants(num_variants, method, balanced, num_vehicle):
+    """Clustering settings of the candidates other than the configured clustering
+
+    The agglomerative clusterings vary by linkage, then the k-medoids ones by seed,
+    each of them with one cluster per vehicle or fewer clusters, balanced or not.
+    The configured clustering, already in the blackboard paths, is left out.
+
+    Attributes
+    ----------
+        method (str): clustering method selected for the instance
+
+    Returns
+    -------
+        list : clustering_method, linkage, seed, num_clusters and balanced_clustering of every variant
+    """
+    def settings():
+        if method == CLUSTERING_AGGLOMERATIVE:
+            for linkage in (LINKAGE_COMPLETE, LINKAGE_AVERAGE):
+                yield CLUSTERING_AGGLOMERATIVE, linkage, 0
+        for seed in itertools.count():
+            yield CLUSTERING_KMEDOIDS, LINKAGE_COMPLETE, seed
+
+    configured = (method, LINKAGE_COMPLETE, 0, num_vehicle, balanced)
+    clusters_counts = sorted({num_vehicle, max(1, int(FEWER_CLUSTERS_FRACTION * num_vehicle))}, reverse=True)
+    variants = []
+    for clustering_method, linkage, seed in settings():
+        for num_clusters, balanced_clustering in itertools.product(clusters_counts, (balanced, not balanced)):
+            if len(variants) == num_variants:
+                return variants
+            if (clustering_method, linkage, seed, num_clusters, balanced_clustering) == configured:
+                continue
+            variants.append({
+                "clustering_method": clustering_method,
+                "linkage": linkage,
+                "seed": seed,
+                "num_clusters": num_clusters,
+                "balanced_clustering": balanced_clustering,
+            })
+
+def candidate_paths(blackboard, variant):
+    """Paths and unassigned services of the variant clustering, the blackboard ones
+    if variant is None
+
+    Runs in a forked process : the blackboard changes are lost with it.
+    """
+    if variant is not None:
+        blackboard.clustering_method = variant["clustering_method"]
+        blackboard.balanced_clustering = variant["balanced_clustering"]
+        ProcessClusteringInitialPaths(blackboard, variant["linkage"], variant["seed"], variant["num_clusters"]).process()
+    return blackboard.paths, blackboard.unassigned_services
+
+def scored_candidate(blackboard, variant):
+    """(cost of the initial solution, paths, unassigned services) of a candidate"""
+    paths, unassigned_services = candidate_paths(blackboard, variant)
+    solution = build_solution(blackboard, paths.copy(), unassigned_services.copy())
+    return solution.total_cost, paths, unassigned_services
+
+class MultiStartInitialPaths(AbstractKnowledgeSource):
+    """
+    Build several initial paths in parallel and keep the cheapest ones
+
+    The paths of ProcessClusteringInitialPaths compete with multi_start - 1 other
+    clusterings (see clustering_variants), each one scored with the cost of its
+    initial solution. The best candidate replaces the blackboard paths and all of
+    them are kept, cheapest first, in initial_candidates. The time spent is taken
+    from the time limit of the optimization.
+    """
+
+    def verify(self):
+
+        if self.blackboard.paths is None:
+            raise AttributeError("Paths are None, no initial paths to compete with")
+
+        if self.blackboard.time_limit is None:
+            raise AttributeError("No time limit for the multi-start")
+
+        return True
+
+    def process(self):
+
+        if self.blackboard.multi_start <= 1 or self.blackboard.only_first_solution:
+            return
+        if len(self.blackboard.problem.get("routes", [])) > 0:
+            log.info("Initial routes given, no multi-start")
+            return
+
+        start = time.perf_counter()
+        num_services_without_rests = len(self.blackboard.problem["services"])
+        method = select_clustering_method(
+            self.blackboard.clustering_method,
+            self.blackboard.clustering_threshold,
+            num_services_without_rests
+        )
+        variants = clustering_variants(
+            self.blackboard.multi_start - 1,
+            method,
+            self.blackboard.balanced_clustering,
+            self.blackboard.num_vehicle
+        )
+        # Loaded once in this process instead of in every child
+        timed_import("fastvrpy.core.solutions.cvrptw")
+        if any(variant["clustering_method"] == CLUSTERING_AGGLOMERATIVE for variant in variants):
+            timed_import("sklearn.cluster")
+
+        time_budget = self.blackboard.time_limit * self.blackboard.multi_start_time_fraction
+        results = fork_map(
+            scored_candidate,
+            [None] + variants,
+            shared=self.blackboard,
+            processes=self.blackboard.cores,
+            timeout=time_budget
+        )
+        candidates = sorted(
+            (result for result in results if result is not None),
+            key=lambda candidate: candidate[0]
+        )
+        log.info(f"Multi-start : {len(candidates)} candidates out of {len(results)}, "
+                 f"costs {[float(cost) for cost, _, _ in candidates]}")
+        if len(candidates) > 0:
+            _, self.blackboard.paths, self.blackboard.unassigned_services = candidates[0]
+            self.blackboard.initial_candidates = candidates
+
+        elapsed = time.perf_counter() - start
+        self.blackboard.time_limit = max(self.blackboard.time_limit - elapsed, 0)
+        log.info(f"Multi-start took {elapsed:.2f} s, {self.blackboard.time_limit:.2f} s left")
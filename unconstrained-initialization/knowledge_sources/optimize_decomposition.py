@@ -0,0 +1,207 @@
+#base imports
+from knowledge_sources.abstract_knowledge_source import AbstractKnowledgeSource
+import logging as log
+from pathlib import Path
+log = log.getLogger(Path(__file__).stem)
+
+#KS imports
+import copy
+import math
+import time
+import numpy
+from lazy_imports import timed_import
+from parallel import fork_map, available_cores
+from heuristics.decomposition import route_locations, group_routes
+from knowledge_sources.process_initial_solution import build_solution
+
+# Fraction of the time limit given to the groups, the rest polishes the merged solution
+DECOMPOSITION_TIME_FRACTION = 0.5
+
+# Time the groups may take beyond their optimization time (solution building, process start)
+DECOMPOSITION_TIMEOUT_FACTOR = 1.5
+
+# Attributes indexed by service, and by vehicle, sliced for the groups
+SERVICES_ATTRIBUTES = ["start_tw", "end_tw", "services_max_lateness", "durations", "setup_durations", "services_volumes", "is_break"]
+VEHICLES_ATTRIBUTES = [
+    "cost_time_multiplier", "cost_distance_multiplier", "vehicle_capacities", "vehicles_TW_starts", "vehicles_TW_ends",
+    "vehicle_time_window_margin", "vehicles_distance_max", "vehicles_duration_max", "vehicles_fixed_costs",
+    "vehicles_overload_multiplier", "vehicles_matrix_index", "force_start"
+]
+
+def group_problem(blackboard, vehicles):
+    """Blackboard of the sub-problem made of the given vehicles and of the services of their paths
+
+    Matrices keep the locations of these services and vehicles only, the problem
+    leaves them out : the solver gets them with the solution. Sticky services whose
+    vehicles are all out of the group stick to the vehicle serving them.
+
+    Returns
+    -------
+        (Blackboard, numpy.ndarray) : sub-problem blackboard and its services in the whole problem
+    """
+    paths = blackboard.paths[vehicles]
+    services = numpy.sort(paths[paths >= 0])
+    service_matrix_index = blackboard.service_matrix_index[services]
+    vehicle_start_index = blackboard.vehicle_start_index[vehicles]
+    vehicle_end_index = blackboard.vehicle_end_index[vehicles]
+    locations = numpy.unique(numpy.concatenate((service_matrix_index, vehicle_start_index, vehicle_end_index)))
+    locations = locations[locations >= 0]
+
+    def local_locations(indices):
+        return numpy.where(indices >= 0, numpy.searchsorted(locations, indices), -1).astype(numpy.int32)
+
+    vehicle_position = numpy.full(blackboard.num_vehicle, -1, dtype=numpy.int32)
+    vehicle_position[vehicles] = numpy.arange(vehicles.size)
+
+    group = copy.copy(blackboard)
+    group.time_matrices = blackboard.time_matrices[:, locations[:, None], locations]
+    group.distance_matrices = blackboard.distance_matrices[:, locations[:, None], locations]
+
+    group.num_services = services.size
+    for name in SERVICES_ATTRIBUTES:
+        setattr(group, name, getattr(blackboard, name)[services])
+    group.service_matrix_index = local_locations(service_matrix_index)
+
+    group.num_vehicle = vehicles.size
+    for name in VEHICLES_ATTRIBUTES:
+        setattr(group, name, getattr(blackboard, name)[vehicles])
+    group.vehicle_start_index = local_locations(vehicle_start_index)
+    group.vehicle_end_index = local_locations(vehicle_end_index)
+    # free_approach holds the approach then the return of every vehicle
+    group.free_approach = blackboard.free_approach.reshape(-1, 2)[vehicles].ravel()
+    previous_vehicle = blackboard.previous_vehicle[vehicles]
+    group.previous_vehicle = numpy.where(previous_vehicle >= 0, vehicle_position[previous_vehicle], -1).astype(numpy.int32)
+
+    group.paths = numpy.where(paths >= 0, numpy.searchsorted(services, paths), -1).astype(numpy.int32)[:, :services.size + 1]
+    group.unassigned_services = numpy.full(services.size + 1, -1, dtype=numpy.int32)
+    group.service_sticky_vehicles = {}
+    for local_service, service in enumerate(services):
+        sticky_vehicles = blackboard.service_sticky_vehicles.get(service, numpy.empty(0, dtype=numpy.int32))
+        group_vehicles = vehicle_position[sticky_vehicles[sticky_vehicles < blackboard.num_vehicle]]
+        group_vehicles = group_vehicles[group_vehicles >= 0]
+        if len(sticky_vehicles) > 0 and group_vehicles.size == 0:
+            group_vehicles = numpy.flatnonzero((group.paths == local_service).any(axis=1))
+        group.service_sticky_vehicles[local_service] = group_vehicles.astype(numpy.int32)
+
+    num_problem_services = len(blackboard.problem["services"])
+    group.problem = {
+        **{key: value for key, value in blackboard.problem.items() if key != "matrices"},
+        "services": [blackboard.problem["services"][service] for service in services if service < num_problem_services],
+        "vehicles": [blackboard.problem["vehicles"][vehicle] for vehicle in vehicles],
+        "routes": []
+    }
+    return group, services
+
+def optimized_group(blackboard, task):
+    """(cost, paths) of the group of vehicles optimized for max_execution_time seconds, paths
+    with the services of the whole problem"""
+    vehicles, max_execution_time = task
+    group, services = group_problem(blackboard, vehicles)
+    solution = build_solution(group, group.paths, group.unassigned_services)
+    solver = timed_import("fastvrpy.solver")
+    solver.optimize(
+        solution = solution,
+        max_execution_time = max_execution_time,
+        problem = group.problem,
+        groups_max_capacity = group.max_capacity,
+        grouping = False
+    )
+    paths = numpy.asarray(solution.paths)
+    return solution.total_cost, numpy.where(paths >= 0, services[paths], -1).astype(numpy.int32)
+
+def merged_paths(paths, unassigned_services, groups, groups_paths):
+    """Paths with the paths of the groups optimized, the services they dropped unassigned
+
+    Attributes
+    ----------
+        groups (list): vehicles of every group
+        groups_paths (list): paths of every group, None to keep the group as it is
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray) : paths and unassigned services, -1 padded
+    """
+    merged = paths.copy()
+    for vehicles, group_paths in zip(groups, groups_paths):
+        if group_paths is not None:
+            merged[vehicles] = -1
+            merged[vehicles, :group_paths.shape[1]] = group_paths
+    lost = numpy.setdiff1d(paths[paths >= 0], merged[merged >= 0])
+    unassigned = numpy.union1d(unassigned_services[unassigned_services >= 0], lost)
+    if lost.size > 0:
+        log.warning(f"{lost.size} services unassigned by the groups")
+    merged_unassigned = numpy.full(unassigned_services.size, -1, dtype=numpy.int32)
+    merged_unassigned[:unassigned.size] = unassigned
+    return merged, merged_unassigned
+
+class OptimizeDecomposition(AbstractKnowledgeSource):
+    """
+    Optimize groups of neighbouring routes as separate problems in parallel
+
+    With -decomposition the routes are split into groups of about
+    decomposition_routes routes (see heuristics.decomposition). Each group is
+    optimized alone, in its own process, during DECOMPOSITION_TIME_FRACTION of the
+    time limit, and its paths replace those of the initial paths : the whole
+    problem is then optimized from them for the time left.
+    """
+
+    def verify(self):
+
+        if self.blackboard.paths is None:
+            raise AttributeError("Paths are None, no routes to decompose")
+
+        if self.blackboard.time_limit is None:
+            raise AttributeError("No time limit for the decomposition")
+
+        return True
+
+    def process(self):
+
+        if not self.blackboard.decomposition or self.blackboard.only_first_solution:
+            return
+        num_groups = math.ceil(self.blackboard.num_vehicle / self.blackboard.decomposition_routes)
+        if num_groups < 2:
+            log.info(f"{self.blackboard.num_vehicle} vehicles, no decomposition")
+            return
+
+        start = time.perf_counter()
+        locations = route_locations(
+            self.blackboard.paths,
+            self.blackboard.service_matrix_index,
+            self.blackboard.time_matrices,
+            self.blackboard.vehicles_matrix_index,
+            self.blackboard.vehicle_start_index,
+            self.blackboard.vehicle_end_index
+        )
+        groups = group_routes(locations, self.blackboard.time_matrices[0], num_groups, self.blackboard.previous_vehicle)
+
+        # Groups beyond the processes wait for a free one
+        processes = min(self.blackboard.cores or available_cores(), len(groups))
+        time_budget = self.blackboard.time_limit * DECOMPOSITION_TIME_FRACTION
+        max_execution_time = max(int(time_budget / math.ceil(len(groups) / processes)), 1)
+        log.info(f"Decomposition in {len(groups)} groups of {[group.size for group in groups]} routes, "
+                 f"{max_execution_time} s each on {processes} processes")
+
+        # Loaded once in this process instead of in every child
+        timed_import("fastvrpy.core.solutions.cvrptw")
+        timed_import("fastvrpy.solver")
+        results = fork_map(
+            optimized_group,
+            [(vehicles, max_execution_time) for vehicles in groups],
+            shared=self.blackboard,
+            processes=processes,
+            timeout=time_budget * DECOMPOSITION_TIMEOUT_FACTOR
+        )
+        log.info(f"Groups costs {[None if result is None else float(result[0]) for result in results]}")
+        self.blackboard.paths, self.blackboard.unassigned_services = merged_paths(
+            self.blackboard.paths,
+            self.blackboard.unassigned_services,
+            groups,
+            [None if result is None else result[1] for result in results]
+        )
+        # The candidates of the multi-start are not the decomposed paths
+        self.blackboard.initial_candidates = None
+
+        elapsed = time.perf_counter() - start
+        self.blackboard.time_limit = max(self.blackboard.time_limit - elapsed, 0)
+        log.info(f"Decomposition took {elapsed:.2f} s, {self.blackboard.time_limit:.2f} s left")
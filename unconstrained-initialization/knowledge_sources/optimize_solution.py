@@ -5,11 +5,253 @@ from pathlib import Path
 log = log.getLogger(Path(__file__).stem)
 
 #KS imports
-from fastvrpy import solver
+import random
+import time
+import numpy
+from lazy_imports import timed_import
+from parallel import fork_map, available_cores
+from heuristics.balancing import capacity_limits
+from heuristics.decomposition import route_locations
+from heuristics.insertion import insert_services
+from heuristics.ruin import cluster_ruin, route_pair_ruin, time_slice_ruin, remove_services
+from knowledge_sources.process_initial_solution import build_solution
+
+# Time a portfolio round may take beyond its optimization time (solution building, process start)
+PORTFOLIO_TIMEOUT_FACTOR = 1.5
+
+# Fraction of the time limit left to the ruin and recreate iterations after the first optimization
+RUIN_RECREATE_TIME_FRACTION = 0.5
+
+# Optimization time (s) of a ruin and recreate iteration
+RUIN_RECREATE_BURST = 1
+
+# Services removed by a ruin : fraction of the routed services, at most RUIN_MAX_SERVICES
+RUIN_FRACTION = 0.1
+RUIN_MAX_SERVICES = 100
+
+RUIN_CLUSTER = "cluster"
+RUIN_ROUTE_PAIR = "route_pair"
+RUIN_TIME_SLICE = "time_slice"
+RUIN_OPERATORS = [RUIN_CLUSTER, RUIN_ROUTE_PAIR, RUIN_TIME_SLICE]
+
+# Ruins of the portfolio starts : not optimized yet, their path starts are not known
+START_RUIN_OPERATORS = [RUIN_CLUSTER, RUIN_ROUTE_PAIR]
+
+# Optimization time (s) between two checks of the stopping criteria : the solver
+# restarts at every burst, losing its search state, so shorter bursts stop sooner but search worse
+STOPPING_BURST = 1
+
+def optimize(blackboard, solution, max_execution_time):
+    """Optimize the solution in place for max_execution_time seconds"""
+    solver = timed_import("fastvrpy.solver")
+    solver.optimize(
+        solution = solution,
+        max_execution_time = int(max_execution_time),
+        problem = blackboard.problem,
+        groups_max_capacity = blackboard.max_capacity,
+        grouping = False
+    )
+
+def stagnated(blackboard, elapsed, best_elapsed, without_improvement):
+    """True if the optimization may stop : past minimum_duration, with no improvement
+    for no_solution_improvement_limit bursts or for time_out_multiplier times the
+    time the best solution was found at
+
+    Attributes
+    ----------
+        elapsed (float): optimization time (s)
+        best_elapsed (float): optimization time (s) when the best solution was found
+        without_improvement (int): bursts since the best solution was found
+    """
+    if elapsed < blackboard.minimum_duration:
+        return False
+    if blackboard.no_solution_improvement_limit is not None and without_improvement >= blackboard.no_solution_improvement_limit:
+        return True
+    if blackboard.time_out_multiplier is not None and elapsed - best_elapsed >= blackboard.time_out_multiplier * best_elapsed:
+        return True
+    return False
+
+def optimize_until_stagnation(blackboard, solution, max_execution_time):
+    """Optimize the solution in place for max_execution_time seconds, by bursts of
+    STOPPING_BURST seconds stopping once stagnated if any stopping criterion is given
+
+    The first burst is the reference of time_out_multiplier, as if the best solution
+    was found at its end.
+    """
+    if blackboard.no_solution_improvement_limit is None and blackboard.time_out_multiplier is None:
+        optimize(blackboard, solution, max_execution_time)
+        return
+    start = time.perf_counter()
+    best_cost, best_elapsed, without_improvement = solution.total_cost, None, 0
+    elapsed = 0
+    while max_execution_time - elapsed >= 1:
+        optimize(blackboard, solution, min(STOPPING_BURST, max_execution_time - elapsed))
+        elapsed = time.perf_counter() - start
+        if best_elapsed is None or solution.total_cost < best_cost:
+            best_cost, best_elapsed, without_improvement = solution.total_cost, elapsed, 0
+        else:
+            without_improvement += 1
+        if stagnated(blackboard, elapsed, best_elapsed, without_improvement):
+            log.info(f"Optimization stopped after {elapsed:.2f} s, no improvement since {best_elapsed:.2f} s")
+            break
+
+def solution_result(solution, num_services):
+    """(total cost, paths, unassigned services) of a solution, the unassigned services
+    being the ones missing from the paths"""
+    paths = numpy.array(solution.paths, dtype=numpy.int32)
+    unassigned = numpy.setdiff1d(numpy.arange(num_services), paths[paths >= 0])
+    unassigned_services = numpy.full(num_services + 1, -1, dtype=numpy.int32)
+    unassigned_services[:unassigned.size] = unassigned
+    return solution.total_cost, paths, unassigned_services
+
+def solution_path_starts(solution):
+    """Start of every path position of the solution"""
+    # Start of path position i is starts[vehicle, i + 1]
+    return numpy.asarray(solution.starts)[:, 1:numpy.asarray(solution.paths).shape[1] + 1]
+
+def ruined_services(blackboard, paths, path_starts, operator, generator):
+    """Services removed by the ruin operator from the paths, path_starts being only
+    needed by RUIN_TIME_SLICE"""
+    num_routed = numpy.count_nonzero(paths >= 0)
+    size = int(min(max(RUIN_FRACTION * num_routed, 1), RUIN_MAX_SERVICES))
+    time_matrix = blackboard.time_matrices[0]
+    if operator == RUIN_CLUSTER:
+        return cluster_ruin(paths, blackboard.service_matrix_index, time_matrix, size, generator)
+    if operator == RUIN_ROUTE_PAIR:
+        locations = route_locations(
+            paths, blackboard.service_matrix_index, blackboard.time_matrices, blackboard.vehicles_matrix_index,
+            blackboard.vehicle_start_index, blackboard.vehicle_end_index
+        )
+        return route_pair_ruin(paths, blackboard.service_matrix_index, locations, time_matrix, size, generator)
+    return time_slice_ruin(paths, blackboard.service_matrix_index, path_starts, size, generator)
+
+def recreated_paths(blackboard, paths, unassigned_services, removed):
+    """Paths without the removed services, these and the unassigned ones inserted back
+    with bulk cheapest insertion
+
+    Returns
+    -------
+        (numpy.ndarray, numpy.ndarray) : paths and unassigned services, -1 padded
+    """
+    paths = remove_services(paths, removed)
+    services = numpy.union1d(unassigned_services[unassigned_services >= 0], removed)
+    located = blackboard.service_matrix_index[services] >= 0
+    uninserted = insert_services(
+        paths,
+        services[located],
+        blackboard.time_matrices,
+        blackboard.service_matrix_index,
+        numpy.asarray(blackboard.vehicles_matrix_index),
+        blackboard.vehicle_start_index,
+        blackboard.vehicle_end_index,
+        blackboard.services_volumes,
+        capacity_limits(blackboard.vehicle_capacities, blackboard.num_units),
+        blackboard.service_sticky_vehicles
+    )
+    unassigned = numpy.sort(numpy.concatenate((uninserted, services[~located])))
+    recreated_unassigned = numpy.full(unassigned_services.size, -1, dtype=numpy.int32)
+    recreated_unassigned[:unassigned.size] = unassigned
+    return paths, recreated_unassigned
+
+def ruin_and_recreate(blackboard, solution, max_execution_time, seed=0):
+    """Optimize the solution, then ruin and recreate the best solution and optimize it
+    again by bursts until max_execution_time, keeping the improvements
+
+    Returns
+    -------
+        CVRPTW : the best solution
+    """
+    start = time.perf_counter()
+    optimize_until_stagnation(blackboard, solution, max(max_execution_time * (1 - RUIN_RECREATE_TIME_FRACTION), 1))
+    best_solution = solution
+    best = solution_result(solution, blackboard.num_services)
+    log.info(f"Ruin and recreate : initial cost {best[0]}")
+    generator = numpy.random.default_rng(seed)
+    iteration = 0
+    best_elapsed, without_improvement = time.perf_counter() - start, 0
+    while max_execution_time - (time.perf_counter() - start) >= RUIN_RECREATE_BURST:
+        operator = RUIN_OPERATORS[iteration % len(RUIN_OPERATORS)]
+        removed = ruined_services(blackboard, best[1], solution_path_starts(best_solution), operator, generator)
+        paths, unassigned_services = recreated_paths(blackboard, best[1], best[2], removed)
+        solution = build_solution(blackboard, paths, unassigned_services)
+        optimize(blackboard, solution, RUIN_RECREATE_BURST)
+        result = solution_result(solution, blackboard.num_services)
+        improved = result[0] < best[0]
+        log.info(f"Ruin and recreate iteration {iteration} ({operator}, {removed.size} services) : "
+                 f"cost {result[0]}, best {min(result[0], best[0])}{' (improved)' if improved else ''}")
+        elapsed = time.perf_counter() - start
+        if improved:
+            best_solution, best = solution, result
+            best_elapsed, without_improvement = elapsed, 0
+        else:
+            without_improvement += 1
+        iteration += 1
+        if stagnated(blackboard, elapsed, best_elapsed, without_improvement):
+            log.info(f"Ruin and recreate stopped after {elapsed:.2f} s, no improvement since {best_elapsed:.2f} s")
+            break
+    return best_solution
+
+def improve(blackboard, solution, max_execution_time, seed=0):
+    """Optimize the solution, with ruin and recreate iterations with -ruin_recreate
+
+    Returns
+    -------
+        CVRPTW : the optimized solution
+    """
+    if blackboard.ruin_recreate:
+        return ruin_and_recreate(blackboard, solution, max_execution_time, seed)
+    optimize_until_stagnation(blackboard, solution, max_execution_time)
+    return solution
+
+def portfolio_starts(candidates, paths, unassigned_services, num_members):
+    """Paths and unassigned services each member starts from, and whether they are
+    perturbed : the candidates of the multi-start in turn, the given ones without
+    candidates, the members beyond the candidates perturbing theirs"""
+    if not candidates:
+        candidates = [(None, paths, unassigned_services)]
+    return [(*candidates[member % len(candidates)][1:], member >= len(candidates)) for member in range(num_members)]
+
+def perturbed_start(blackboard, paths, unassigned_services, seed):
+    """Paths and unassigned services of a seeded ruin and recreate of the start, for
+    the members not to start from the same paths"""
+    generator = numpy.random.default_rng(seed)
+    operator = START_RUIN_OPERATORS[seed % len(START_RUIN_OPERATORS)]
+    removed = ruined_services(blackboard, paths, None, operator, generator)
+    return recreated_paths(blackboard, paths, unassigned_services, removed)
+
+def portfolio_member(blackboard, task):
+    """Result (see solution_result) of one optimization of the portfolio"""
+    seed, paths, unassigned_services, perturbed, max_execution_time = task
+    numpy.random.seed(seed)
+    random.seed(seed)
+    if perturbed:
+        paths, unassigned_services = perturbed_start(blackboard, paths, unassigned_services, seed)
+    solution = build_solution(blackboard, paths.copy(), unassigned_services.copy())
+    solution = improve(blackboard, solution, max_execution_time, seed)
+    return solution_result(solution, blackboard.num_services)
 
 class OptimizeSolution(AbstractKnowledgeSource):
     """
     Create all vehicles attributes from problem
+
+    With -portfolio N, N optimizations run in parallel with different random seeds,
+    from the candidates of the multi-start in turn if any, and the cheapest solution
+    is kept. The members beyond the candidates start from a seeded ruin and recreate
+    of their candidate (see perturbed_start). With -portfolio_rounds R the time limit
+    is split into R rounds, all the members of a round starting from the best
+    solution of the previous one, perturbed but for the first member.
+
+    With -ruin_recreate, once the local search had half of the time, related
+    services (see heuristics.ruin) of the best solution are removed and inserted
+    back, the result being optimized for RUIN_RECREATE_BURST seconds and kept if
+    it is cheaper, until the time limit.
+
+    With -only_first_solution the initial solution is kept as it is.
+
+    With -no_solution_improvement_limit or -time_out_multiplier the optimization
+    runs by bursts of STOPPING_BURST seconds (one ruin and recreate iteration with
+    -ruin_recreate) and stops once stagnated (see stagnated), not before
+    -minimum_duration.
     """
 
     def verify(self):
@@ -28,12 +270,59 @@ class OptimizeSolution(AbstractKnowledgeSource):
 
         return True
 
+    def optimize_portfolio(self):
+        start = time.perf_counter()
+        num_members = min(self.blackboard.portfolio, self.blackboard.cores or available_cores())
+        rounds = self.blackboard.portfolio_rounds
+        round_time = self.blackboard.time_limit / rounds
+        starts = portfolio_starts(
+            self.blackboard.initial_candidates,
+            self.blackboard.paths,
+            self.blackboard.unassigned_services,
+            num_members
+        )
+        log.info(f"Portfolio of {num_members} optimizations, {rounds} rounds of {round_time:.2f} s")
+
+        # Loaded once in this process instead of in every child
+        timed_import("fastvrpy.core.solutions.cvrptw")
+        timed_import("fastvrpy.solver")
+        best = None
+        for round_index in range(rounds):
+            results = fork_map(
+                portfolio_member,
+                [(round_index * num_members + member, paths, unassigned_services, perturbed, round_time)
+                 for member, (paths, unassigned_services, perturbed) in enumerate(starts)],
+                shared=self.blackboard,
+                processes=num_members,
+                timeout=round_time * PORTFOLIO_TIMEOUT_FACTOR
+            )
+            log.info(f"Portfolio round {round_index} costs {[None if result is None else float(result[0]) for result in results]}")
+            results = [result for result in results if result is not None]
+            if best is not None:
+                results.append(best)
+            if len(results) == 0:
+                break
+            best = min(results, key=lambda result: result[0])
+            starts = portfolio_starts([best], None, None, num_members)
+
+        if best is None:
+            # The members may have taken more than the time limit : the initial solution for the time left only
+            time_left = self.blackboard.time_limit - (time.perf_counter() - start)
+            if time_left < 1:
+                log.warning("No optimization of the portfolio finished, keeping the initial solution")
+                return
+            log.warning(f"No optimization of the portfolio finished, optimizing the initial solution for {time_left:.2f} s")
+            self.blackboard.solution = improve(self.blackboard, self.blackboard.solution, time_left)
+            return
+        _, self.blackboard.paths, self.blackboard.unassigned_services = best
+        self.blackboard.solution = build_solution(self.blackboard, self.blackboard.paths, self.blackboard.unassigned_services)
+
     def process(self):
 
-                solver.optimize(
-                solution = self.blackboard.solution,
-                max_execution_time=int(self.blackboard.time_limit),
-                problem=self.blackboard.problem,
-                groups_max_capacity = self.blackboard.max_capacity,
-                grouping = False
-        )
+        if self.blackboard.only_first_solution:
+            log.info("Only the first solution is requested, no optimization")
+            return
+        if self.blackboard.portfolio > 1:
+            self.optimize_portfolio()
+        else:
+            self.blackboard.solution = improve(self.blackboard, self.blackboard.solution, self.blackboard.time_limit)
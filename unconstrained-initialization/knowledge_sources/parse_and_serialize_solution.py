@@ -7,12 +7,7 @@ log = log.getLogger(Path(__file__).stem)
 
 #KS imports
 import numpy
-from sklearn.cluster import KMeans, AgglomerativeClustering, OPTICS, SpectralClustering, MiniBatchKMeans, DBSCAN
-from fastvrpy.core.solutions import cvrptw
-
-from google.protobuf.json_format import MessageToDict
 import localsearch_result_pb2
-import json
 
 
 
@@ -5,14 +5,57 @@ from pathlib import Path
 log = log.getLogger(Path(__file__).stem)
 
 #KS imports
-from sklearn.cluster import AgglomerativeClustering
+from lazy_imports import timed_import
+from heuristics.clustering import select_clustering_method, time_distances, time_window_distances, dense_distances, \
+    k_medoids, depots_times, bound_k_medoids, CLUSTERING_KMEDOIDS, LINKAGE_COMPLETE
+from heuristics.balancing import capacity_limits, working_time_budgets, balanced_k_medoids, cluster_medoids
+from heuristics.assignment import cluster_depot_times, cluster_overloads, shift_incompatibilities, sticky_violations, \
+    assignment_costs, assign_clusters
+from heuristics.insertion import insert_services
 import numpy
 
+# Rows copied at once when extracting the services sub-matrix
+ROWS_CHUNK_SIZE = 1024
+
+# Seedings tried by the clustering bound to the vehicles
+VEHICLE_BOUND_STARTS = 3
+
+def services_time_matrix(time_matrix, services_matrix_index, dtype=numpy.float32):
+    """Extract the service to service sub-matrix of a time matrix
+
+    Rows are gathered by blocks with fancy indexing and cast to a compact dtype, so
+    that no full size float64 temporary is created.
+
+    Attributes
+    ----------
+        time_matrix (numpy.ndarray): square matrix between all locations
+        services_matrix_index (numpy.ndarray): location of every service in time_matrix
+    """
+    services_matrix_index = numpy.asarray(services_matrix_index)
+    num_services = services_matrix_index.shape[0]
+    matrix = numpy.empty((num_services, num_services), dtype=dtype)
+    for start in range(0, num_services, ROWS_CHUNK_SIZE):
+        rows = services_matrix_index[start:start + ROWS_CHUNK_SIZE]
+        matrix[start:start + ROWS_CHUNK_SIZE] = time_matrix[rows[:, None], services_matrix_index]
+    return matrix
+
 class ProcessClusteringInitialPaths(AbstractKnowledgeSource):
     """
     Create all vehicles attributes from problem
+
+    Attributes
+    ----------
+        linkage (str): linkage of the agglomerative clustering
+        seed (int): seed of the k-medoids clusterings
+        num_clusters (int): clusters to build, one per vehicle if None
     """
 
+    def __init__(self, blackboard, linkage=LINKAGE_COMPLETE, seed=0, num_clusters=None):
+        super().__init__(blackboard)
+        self.linkage = linkage
+        self.seed = seed
+        self.num_clusters = num_clusters
+
     def verify(self):
 
         if self.blackboard.num_vehicle is None:
@@ -26,75 +69,237 @@ class ProcessClusteringInitialPaths(AbstractKnowledgeSource):
 
         return True
 
+    def services_distances(self, services_matrix_index, matrix_index=0):
+        """Distances between services used by the clustering : travel time in the
+        matrix_index matrix, plus the time window gap with -time_window_clustering"""
+        if self.blackboard.time_window_clustering:
+            num_services = services_matrix_index.shape[0]
+            return time_window_distances(
+                self.blackboard.time_matrices[matrix_index],
+                services_matrix_index,
+                self.blackboard.start_tw[:num_services],
+                self.blackboard.end_tw[:num_services],
+                self.blackboard.durations[:num_services],
+                self.blackboard.time_window_weight
+            )
+        return time_distances(self.blackboard.time_matrices[matrix_index], services_matrix_index)
+
+    def bound_labels(self, services_matrix_index, num_clusters):
+        """Clusters bound to the vehicles : cluster i is measured with the matrix of
+        vehicle i and, with -depot_seeding, seeded around its depot
+
+        Returns
+        -------
+            numpy.ndarray : vehicle of every service (rests excluded)
+        """
+        vehicles_matrix_index = numpy.asarray(self.blackboard.vehicles_matrix_index)
+        profiles_distances = [
+            self.services_distances(services_matrix_index, matrix_index)
+            for matrix_index in range(len(self.blackboard.time_matrices))
+        ]
+        depot_times, vehicle_depot = None, None
+        if self.blackboard.depot_seeding:
+            depot_times, vehicle_depot = depots_times(
+                self.blackboard.time_matrices,
+                services_matrix_index,
+                vehicles_matrix_index,
+                self.blackboard.vehicle_start_index,
+                self.blackboard.vehicle_end_index
+            )
+            log.info(f"Clustering around {depot_times.shape[1]} depots")
+            vehicle_depot = vehicle_depot[:num_clusters]
+        labels, _ = bound_k_medoids(
+            profiles_distances,
+            services_matrix_index.shape[0],
+            vehicles_matrix_index[:num_clusters],
+            depot_times,
+            vehicle_depot,
+            seed=self.seed,
+            num_starts=VEHICLE_BOUND_STARTS
+        )
+        return labels
+
+    def balanced_labels(self, labels, services_matrix_index, cluster_vehicles):
+        """Rebuild the clusters so that they fit the capacities and working times
+        of their vehicles, starting from the medoids of the given clusters
+
+        Attributes
+        ----------
+            cluster_vehicles (numpy.ndarray): vehicle of every cluster
+
+        Returns
+        -------
+            numpy.ndarray : vehicle of every service (rests excluded)
+        """
+        num_services = services_matrix_index.shape[0]
+        distances = self.services_distances(services_matrix_index)
+        rests_durations = numpy.zeros(self.blackboard.num_vehicle)
+        for rest, vehicle in self.blackboard.rests:
+            rests_durations[vehicle] += rest.get("duration", 0)
+        capacities = capacity_limits(self.blackboard.vehicle_capacities[cluster_vehicles], self.blackboard.num_units)
+        budgets = working_time_budgets(
+            self.blackboard.vehicles_TW_starts[cluster_vehicles],
+            self.blackboard.vehicles_TW_ends[cluster_vehicles],
+            self.blackboard.vehicles_duration_max[cluster_vehicles],
+            rests_durations[cluster_vehicles]
+        )
+        workloads = self.blackboard.durations[:num_services] + self.blackboard.setup_durations[:num_services]
+        # Sticky vehicles as clusters
+        sticky_clusters = {
+            service: numpy.flatnonzero(numpy.isin(cluster_vehicles, vehicles))
+            for service, vehicles in self.blackboard.service_sticky_vehicles.items()
+            if len(vehicles) > 0
+        }
+        labels, _ = balanced_k_medoids(
+            distances,
+            num_services,
+            cluster_medoids(distances, labels, cluster_vehicles.size),
+            self.blackboard.services_volumes[:num_services],
+            capacities,
+            workloads,
+            budgets,
+            sticky_clusters,
+            seed=self.seed
+        )
+        return cluster_vehicles[labels]
+
+    def assigned_vehicles(self, labels, services_matrix_index, num_clusters):
+        """Give every cluster to the vehicle whose depots, shift, capacities and
+        sticky services fit it best
+
+        Returns
+        -------
+            numpy.ndarray : vehicle of every cluster
+        """
+        num_services = services_matrix_index.shape[0]
+        num_vehicle = self.blackboard.num_vehicle
+        costs = assignment_costs(
+            cluster_depot_times(
+                labels, num_clusters, services_matrix_index, self.blackboard.time_matrices,
+                self.blackboard.vehicles_matrix_index, self.blackboard.vehicle_start_index, self.blackboard.vehicle_end_index
+            ),
+            cluster_overloads(
+                labels, num_clusters, self.blackboard.services_volumes[:num_services],
+                capacity_limits(self.blackboard.vehicle_capacities, self.blackboard.num_units)
+            ),
+            shift_incompatibilities(
+                labels, num_clusters, self.blackboard.start_tw[:num_services], self.blackboard.end_tw[:num_services],
+                self.blackboard.vehicles_TW_starts, self.blackboard.vehicles_TW_ends
+            ),
+            sticky_violations(labels, num_clusters, num_vehicle, self.blackboard.service_sticky_vehicles)
+        )
+        return assign_clusters(costs)
+
+    def insert_unrouted(self, unassigned):
+        """Insert the services missing from the given routes where they add the
+        least travel time, the routes being kept as they are
+
+        Returns
+        -------
+            numpy.ndarray : services still unassigned (rests, capacities or sticky vehicles)
+        """
+        service_matrix_index = self.blackboard.service_matrix_index
+        located = service_matrix_index[unassigned] >= 0
+        uninserted = insert_services(
+            self.blackboard.paths,
+            unassigned[located],
+            self.blackboard.time_matrices,
+            service_matrix_index,
+            numpy.asarray(self.blackboard.vehicles_matrix_index),
+            self.blackboard.vehicle_start_index,
+            self.blackboard.vehicle_end_index,
+            self.blackboard.services_volumes,
+            capacity_limits(self.blackboard.vehicle_capacities, self.blackboard.num_units),
+            self.blackboard.service_sticky_vehicles
+        )
+        log.info(f"{numpy.count_nonzero(located) - uninserted.size} unrouted services inserted in the routes")
+        return numpy.sort(numpy.concatenate((uninserted, unassigned[~located])))
+
     def process(self):
 
         log.info("Process Initial Solution")
         log.debug("-- Clustering")
         num_vehicle = self.blackboard.num_vehicle
-        # recalculate matrix for AgglomerativeClustering
-        # TODO : use custom metric 'precomputed'
-
-        matrix = []
-
-        time_matrix = self.blackboard.problem["matrices"][0]["time"]
-        matrix_size = self.blackboard.problem["matrices"][0]["size"]
         problem     = self.blackboard.problem
 
         routes = problem.get("routes", [])
 
-        log.info(f" routes : {routes}")
+        log.info(f" routes : {len(routes)}")
         log.info(f"vehicle_id_index {self.blackboard.vehicle_id_index}")
 
         if len(routes) > 0:
-            service_id_to_index = {value: key for key, value in self.blackboard.service_index_to_id.items()}
-            self.blackboard.unassigned_services = numpy.full(self.blackboard.num_services + 1, -1, dtype=numpy.int32)
+            service_id_to_index = self.blackboard.service_id_to_index
             self.blackboard.paths = numpy.full((num_vehicle, self.blackboard.num_services + 1), -1, dtype=numpy.int32)
+            assigned = numpy.zeros(self.blackboard.num_services, dtype=bool)
             for route in routes:
-                vehicle_id = route.get("vehicleId")
-                vehicle_index = self.blackboard.vehicle_id_index[vehicle_id]
-                for service_index_in_route, service_id in enumerate(route.get("serviceIds")):
-                    service_index = service_id_to_index[service_id]
-                    self.blackboard.paths[vehicle_index, service_index_in_route] = service_index
-            for service_index in range (self.blackboard.num_services):
-                if not numpy.any(numpy.isin(self.blackboard.paths, service_index)):
-                    self.blackboard.unassigned_services[service_index] = service_index
-            mask = self.blackboard.unassigned_services == -1
-
-            self.blackboard.unassigned_services = numpy.concatenate((self.blackboard.unassigned_services[~mask], self.blackboard.unassigned_services[mask]))
-
+                vehicle_index = self.blackboard.vehicle_id_index[route.get("vehicleId")]
+                service_ids = route.get("serviceIds")
+                route_services = numpy.fromiter((service_id_to_index[service_id] for service_id in service_ids), dtype=numpy.int32, count=len(service_ids))
+                self.blackboard.paths[vehicle_index, :route_services.size] = route_services
+                assigned[route_services] = True
+            unassigned = numpy.flatnonzero(~assigned)
+            # -only_first_solution returns the given routes as they are
+            if self.blackboard.insert_unrouted and not self.blackboard.only_first_solution and unassigned.size > 0:
+                unassigned = self.insert_unrouted(unassigned)
+            # Unassigned services first, in index order, then -1
+            self.blackboard.unassigned_services = numpy.full(self.blackboard.num_services + 1, -1, dtype=numpy.int32)
+            self.blackboard.unassigned_services[:unassigned.size] = unassigned
 
         else :
             self.blackboard.unassigned_services = numpy.full(self.blackboard.num_services + 1, -1, dtype=numpy.int32)
-            for serviceFrom in problem["services"]:
-                matrix_row = []
-                for serviceTo in problem["services"]:
-                    matrix_row.append(time_matrix[serviceFrom["matrixIndex"] * matrix_size + serviceTo["matrixIndex"]])
-                matrix.append(matrix_row)
+            # Rests (at the end of service_matrix_index) have no location and are not clustered
+            num_services_without_rests = len(problem["services"])
+            services_matrix_index = self.blackboard.service_matrix_index[:num_services_without_rests]
+            num_clusters = min(self.num_clusters or num_vehicle, num_services_without_rests)
+            method = select_clustering_method(
+                self.blackboard.clustering_method,
+                self.blackboard.clustering_threshold,
+                num_services_without_rests
+            )
+            log.info(f"Clustering {num_services_without_rests} services with {method}")
+
+            # Clusters measured with the matrix of their vehicle when the fleet uses several
+            vehicle_bound = self.blackboard.depot_seeding or \
+                numpy.unique(numpy.asarray(self.blackboard.vehicles_matrix_index)[:num_clusters]).size > 1
+            if vehicle_bound:
+                labels = self.bound_labels(services_matrix_index, num_clusters)
+            elif method == CLUSTERING_KMEDOIDS:
+                distances = self.services_distances(services_matrix_index)
+                labels, _ = k_medoids(distances, num_services_without_rests, num_clusters, seed=self.seed)
+            else:
+                if self.blackboard.time_window_clustering:
+                    matrix = dense_distances(self.services_distances(services_matrix_index), num_services_without_rests)
+                else:
+                    matrix = services_time_matrix(self.blackboard.time_matrices[0], services_matrix_index)
+                AgglomerativeClustering = timed_import("sklearn.cluster").AgglomerativeClustering
+                labels = AgglomerativeClustering(n_clusters=num_clusters, metric='precomputed', linkage=self.linkage).fit(matrix).labels_
 
-            matrix = numpy.array(matrix)
+            # Cluster i goes to vehicle i unless the clusters are assigned to the vehicles
+            cluster_vehicles = numpy.arange(num_clusters)
+            if self.blackboard.cluster_assignment and not vehicle_bound:
+                cluster_vehicles = self.assigned_vehicles(labels, services_matrix_index, num_clusters)
+            if self.blackboard.balanced_clustering:
+                labels = self.balanced_labels(labels, services_matrix_index, cluster_vehicles)
+            else:
+                labels = cluster_vehicles[labels]
 
-            cluster = AgglomerativeClustering(n_clusters=min(num_vehicle, matrix.shape[0]), metric='precomputed', linkage='complete').fit(matrix)
             log.debug("-- Compute initial solution")
             num_services = numpy.zeros(num_vehicle, dtype=int)
-            for i in range(0, cluster.labels_.size):
-                vehicle = cluster.labels_[i]
+            for i in range(0, labels.size):
+                vehicle = labels[i]
                 num_services[vehicle] += 1
 
             max_capacity = numpy.max(num_services) + 10 #Add margin to let algorithm the possibility to optimize something
             num_services = numpy.zeros(num_vehicle, dtype=int)
             self.blackboard.paths = numpy.full((num_vehicle, self.blackboard.num_services + 1), -1, dtype=numpy.int32)
-            for i in range(0, cluster.labels_.size):
-                vehicle = cluster.labels_[i]
+            for i in range(0, labels.size):
+                vehicle = labels[i]
                 position = num_services[vehicle]
                 self.blackboard.paths[vehicle][position] = i
                 num_services[vehicle] += 1
 
-            reverse_services_dict = {}
-            for index, service_id in self.blackboard.service_index_to_id.items():
-                reverse_services_dict[service_id] = index
-
             for rest in self.blackboard.rests:
                 vehicle = rest[1]
-                index = reverse_services_dict[rest[0].get("id")]
+                index = self.blackboard.service_id_to_index[rest[0].get("id")]
                 self.blackboard.paths[vehicle][num_services[vehicle]] = index
                 num_services[vehicle] += 1
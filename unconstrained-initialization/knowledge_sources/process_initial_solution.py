@@ -6,9 +6,47 @@ log = log.getLogger(Path(__file__).stem)
 
 #KS imports
 import numpy
-from sklearn.cluster import KMeans, AgglomerativeClustering, OPTICS, SpectralClustering, MiniBatchKMeans, DBSCAN
-from fastvrpy.core.solutions import cvrptw
-
+from lazy_imports import timed_import
+
+
+def build_solution(blackboard, paths, unassigned_services):
+    """CVRPTW solution of the blackboard problem with the given paths and unassigned services"""
+    cvrptw = timed_import("fastvrpy.core.solutions.cvrptw")
+    return cvrptw.CVRPTW(
+        paths = paths,
+        distance_matrix = blackboard.distance_matrices,
+        time_matrix = blackboard.time_matrices,
+        num_services = blackboard.num_services,
+        start_time_windows = blackboard.start_tw,
+        end_time_windows = blackboard.end_tw,
+        time_windows_margin = blackboard.services_max_lateness,
+        durations = blackboard.durations,
+        setup_durations = blackboard.setup_durations,
+        services_volumes = blackboard.services_volumes,
+        service_matrix_index = blackboard.service_matrix_index,
+        cost_distance_multiplier = blackboard.cost_distance_multiplier,
+        cost_time_multiplier = blackboard.cost_time_multiplier,
+        vehicle_capacities = blackboard.vehicle_capacities,
+        previous_vehicle = blackboard.previous_vehicle,
+        vehicle_max_distance = blackboard.vehicles_distance_max,
+        vehicle_max_travel_time = blackboard.vehicles_duration_max,
+        vehicle_fixed_costs = blackboard.vehicles_fixed_costs,
+        vehicle_overload_multiplier = blackboard.vehicles_overload_multiplier,
+        vehicle_start_time_window = blackboard.vehicles_TW_starts,
+        vehicle_end_time_window = blackboard.vehicles_TW_ends,
+        vehicle_time_window_margin = blackboard.vehicle_time_window_margin,
+        vehicle_matrix_index = blackboard.vehicles_matrix_index,
+        vehicle_start_index = blackboard.vehicle_start_index,
+        vehicle_end_index = blackboard.vehicle_end_index,
+        vehicle_start_mode = blackboard.force_start,
+        free_approach = blackboard.free_approach,
+        free_return = blackboard.free_return,
+        unassigned_services = unassigned_services,
+        predecessor_successor_gap = None,
+        is_break = blackboard.is_break,
+        sticky_vehicles = blackboard.service_sticky_vehicles,
+        num_units = blackboard.num_units
+    )
 
 
 class ProcessInitialSolution(AbstractKnowledgeSource):
@@ -121,38 +159,4 @@ class ProcessInitialSolution(AbstractKnowledgeSource):
         return True
 
     def process(self):
-        self.blackboard.solution = cvrptw.CVRPTW(
-            paths = self.blackboard.paths,
-            distance_matrix = self.blackboard.distance_matrices,
-            time_matrix = self.blackboard.time_matrices,
-            num_services = self.blackboard.num_services,
-            start_time_windows = self.blackboard.start_tw,
-            end_time_windows = self.blackboard.end_tw,
-            time_windows_margin = self.blackboard.services_max_lateness,
-            durations = self.blackboard.durations,
-            setup_durations = self.blackboard.setup_durations,
-            services_volumes = self.blackboard.services_volumes,
-            service_matrix_index = self.blackboard.service_matrix_index,
-            cost_distance_multiplier = self.blackboard.cost_distance_multiplier,
-            cost_time_multiplier = self.blackboard.cost_time_multiplier,
-            vehicle_capacities = self.blackboard.vehicle_capacities,
-            previous_vehicle = self.blackboard.previous_vehicle,
-            vehicle_max_distance = self.blackboard.vehicles_distance_max,
-            vehicle_max_travel_time = self.blackboard.vehicles_duration_max,
-            vehicle_fixed_costs = self.blackboard.vehicles_fixed_costs,
-            vehicle_overload_multiplier = self.blackboard.vehicles_overload_multiplier,
-            vehicle_start_time_window = self.blackboard.vehicles_TW_starts,
-            vehicle_end_time_window = self.blackboard.vehicles_TW_ends,
-            vehicle_time_window_margin = self.blackboard.vehicle_time_window_margin,
-            vehicle_matrix_index = self.blackboard.vehicles_matrix_index,
-            vehicle_start_index = self.blackboard.vehicle_start_index,
-            vehicle_end_index = self.blackboard.vehicle_end_index,
-            vehicle_start_mode = self.blackboard.force_start,
-            free_approach = self.blackboard.free_approach,
-            free_return = self.blackboard.free_return,
-            unassigned_services = self.blackboard.unassigned_services,
-            predecessor_successor_gap = None,
-            is_break = self.blackboard.is_break,
-            sticky_vehicles = self.blackboard.service_sticky_vehicles,
-            num_units = self.blackboard.num_units
-        )
+        self.blackboard.solution = build_solution(self.blackboard, self.blackboard.paths, self.blackboard.unassigned_services)
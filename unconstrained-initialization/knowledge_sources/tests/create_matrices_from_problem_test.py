@@ -4,6 +4,7 @@ import pytest
 from knowledge_sources.create_matrices_from_problem import CreateMatricesFromProblem
 import schema
 import numpy
+import copy
 
 @pytest.mark.parametrize("problem", [None, "Coucou"])
 def test_verify_problem_error(problem):
@@ -63,3 +64,50 @@ def test_process():
     knowledge_source.process()
     # assert (blackboard.distance_matrices == numpy.array([[[5,3,1,1],[5,6,7],[8,9,10]]], dtype=numpy.float64)).all()
     assert (blackboard.time_matrices == numpy.array([[[0, 6, 4], [8, 0, 7], [2, 3, 0]]], dtype=numpy.float64)).all()
+
+def test_process_empty_time_matrix():
+    distance_only = copy.deepcopy(problem)
+    distance_only["matrices"][0]["time"] = []
+    blackboard = Mock(problem = distance_only)
+    knowledge_source = CreateMatricesFromProblem(blackboard)
+
+    assert knowledge_source.verify() == True
+    knowledge_source.process()
+    assert (blackboard.time_matrices == 0).all()
+    assert blackboard.distance_matrices.shape == (1, 3, 3)
+
+def invalid_problem(**matrix_update):
+    invalid = copy.deepcopy(problem)
+    invalid["matrices"][0].update(matrix_update)
+    return invalid
+
+@pytest.mark.parametrize("matrix_update", [
+    {"time": [0, 1, 2, 3, 4]},
+    {"time": numpy.array([0, 1, numpy.nan, 3, 0, 5, 6, 7, 0], dtype=numpy.float32)},
+    {"distance": [0, 1, 2, 3, 0, float("inf"), 6, 7, 0]},
+    {"distance": numpy.array([0, 1, 2, 3, 0, 5, 6, -7, 0])},
+    {"time": [0, 1, 2, 3]},
+])
+def test_verify_invalid_matrix(matrix_update):
+    blackboard = Mock(problem = invalid_problem(**matrix_update))
+    knowledge_source = CreateMatricesFromProblem(blackboard)
+
+    with pytest.raises(schema.SchemaError):
+        knowledge_source.verify()
+
+def test_verify_index_out_of_matrix():
+    invalid = copy.deepcopy(problem)
+    invalid["services"][1]["matrixIndex"] = 3
+    blackboard = Mock(problem = invalid)
+    knowledge_source = CreateMatricesFromProblem(blackboard)
+
+    with pytest.raises(schema.SchemaError, match="services matrixIndex of element 1"):
+        knowledge_source.verify()
+
+def test_verify_vehicle_without_depot():
+    valid = copy.deepcopy(problem)
+    valid["vehicles"][0]["startIndex"] = -1
+    blackboard = Mock(problem = valid)
+    knowledge_source = CreateMatricesFromProblem(blackboard)
+
+    assert knowledge_source.verify() == True
@@ -0,0 +1,85 @@
+from unittest.mock import Mock, patch
+import pytest
+import numpy
+
+from google.protobuf.json_format import MessageToDict
+from knowledge_sources.deserialize_problem import DeserializeProblem, decode_problem
+import localsearch_vrp_pb2
+
+def build_problem():
+    problem = localsearch_vrp_pb2.Problem()
+    vehicle = problem.vehicles.add()
+    vehicle.id = "vehicle_1"
+    vehicle.start_index = 0
+    vehicle.end_index = 0
+    vehicle.time_window.start = 10
+    vehicle.time_window.end = 1000
+    capacity = vehicle.capacities.add()
+    capacity.limit = 12.5
+    for index in range(2):
+        service = problem.services.add()
+        service.id = f"service_{index}"
+        service.matrix_index = index + 1
+        service.duration = 20
+        service.quantities.append(1.5)
+        time_window = service.time_windows.add()
+        time_window.start = 0
+        time_window.end = 500
+    for multiplier in [1, 2]:
+        matrix = problem.matrices.add()
+        matrix.size = 3
+        matrix.time.extend([multiplier * value for value in [0, 2, 3, 4, 0, 6, 7, 8, 0.5]])
+        matrix.distance.extend([multiplier * value for value in [1, 2, 3, 4, 5, 6, 7, 8, 9]])
+    route = problem.routes.add()
+    route.vehicle_id = "vehicle_1"
+    route.service_ids.append("service_1")
+    return problem
+
+def test_verify_no_instance():
+    blackboard = Mock(instance = None)
+    knowledge_source = DeserializeProblem(blackboard)
+
+    with pytest.raises(AttributeError):
+        knowledge_source.verify()
+
+def test_decode_problem_same_as_message_to_dict():
+    message = build_problem()
+    expected = MessageToDict(message, including_default_value_fields=True)
+
+    problem = decode_problem(message.SerializeToString())
+
+    for key in ["vehicles", "services", "relations", "routes"]:
+        assert problem[key] == expected[key]
+    assert len(problem["matrices"]) == 2
+    for matrix, expected_matrix in zip(problem["matrices"], expected["matrices"]):
+        assert matrix["size"] == expected_matrix["size"]
+        assert isinstance(matrix["time"], numpy.ndarray)
+        assert (matrix["time"] == numpy.array(expected_matrix["time"], dtype=numpy.float32)).all()
+        assert (matrix["distance"] == numpy.array(expected_matrix["distance"], dtype=numpy.float32)).all()
+        assert matrix["value"].size == 0
+
+def test_decode_problem_unpacked_matrix():
+    message = build_problem()
+    data = bytearray(message.SerializeToString())
+    # Matrix with size 2 and time encoded as non packed repeated floats
+    matrix = bytearray(b"\x08\x02")
+    for value in [0, 1, 1, 0]:
+        matrix += b"\x15" + numpy.array([value], dtype="<f4").tobytes()
+    data += b"\x2a" + bytes([len(matrix)]) + matrix
+
+    problem = decode_problem(bytes(data))
+
+    assert len(problem["matrices"]) == 3
+    assert problem["matrices"][2]["size"] == 2
+    assert (problem["matrices"][2]["time"] == numpy.array([0, 1, 1, 0], dtype=numpy.float32)).all()
+
+def test_process(tmp_path):
+    instance = tmp_path / "instance"
+    instance.write_bytes(build_problem().SerializeToString())
+    blackboard = Mock(instance = str(instance))
+    knowledge_source = DeserializeProblem(blackboard)
+
+    knowledge_source.process()
+
+    assert [service["id"] for service in blackboard.problem["services"]] == ["service_0", "service_1"]
+    assert blackboard.problem["matrices"][1]["time"][1] == 4
@@ -85,3 +85,183 @@ def test_process(file_exists):
     assert blackboard.time_limit == 8
     assert blackboard.instance == "instance.txt"
     assert blackboard.output_file == "solution.txt"
+
+
+
+@patch('sys.argv', [ "scrip.py"])
+def test_process_explicit_arguments():
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"])
+    knowledge_source.process()
+
+    assert blackboard.time_limit == 3
+    assert blackboard.instance == "instance.txt"
+    assert blackboard.output_file == "solution.txt"
+
+
+@pytest.mark.parametrize("arguments,profile", [
+    ([], None),
+    (["-profile"], "all"),
+    (["-profile", "-performance_report"], "all"),
+    (["-profile", "ProcessClusteringInitialPaths"], "ProcessClusteringInitialPaths"),
+])
+def test_process_profile(arguments, profile):
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"] + arguments)
+    knowledge_source.process()
+
+    assert blackboard.profile == profile
+
+
+@patch("os.path.exists")
+@pytest.mark.parametrize("arguments", [
+    ["-clustering_method", "ward"],
+    ["-clustering_threshold", "many"],
+    ["-time_window_weight", "heavy"],
+    ["-clustering_method"],
+    ["-clustering_threshold"],
+    ["-time_window_weight"],
+])
+def test_verify_clustering_options(file_exists, arguments):
+    file_exists.return_value = True
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"] + arguments)
+
+    with pytest.raises(ValueError):
+        knowledge_source.verify()
+
+
+def test_process_clustering_options():
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000",
+                                                 "-clustering_method", "kmedoids", "-clustering_threshold", "2000", "-balanced_clustering",
+                                                 "-depot_seeding", "-time_window_clustering", "-time_window_weight", "0.5"])
+    knowledge_source.process()
+
+    assert blackboard.clustering_method == "kmedoids"
+    assert blackboard.clustering_threshold == 2000
+    assert blackboard.balanced_clustering == True
+    assert blackboard.cluster_assignment == True
+    assert blackboard.depot_seeding == True
+    assert blackboard.time_window_clustering == True
+    assert blackboard.time_window_weight == 0.5
+
+
+def test_process_no_cluster_assignment():
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000",
+                                                 "-no_cluster_assignment"])
+    knowledge_source.process()
+
+    assert blackboard.cluster_assignment == False
+
+
+def test_process_no_insert_unrouted():
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"])
+    knowledge_source.process()
+    assert blackboard.insert_unrouted == True
+
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000",
+                                                 "-no_insert_unrouted"])
+    knowledge_source.process()
+    assert blackboard.insert_unrouted == False
+
+
+@patch("os.path.exists")
+@pytest.mark.parametrize("arguments", [
+    ["-cores", "0"],
+    ["-cores", "all"],
+    ["-multi_start", "-2"],
+    ["-multi_start_time_fraction", "1.5"],
+    ["-multi_start_time_fraction", "half"],
+    ["-multi_start"],
+    ["-decomposition_routes", "0"],
+    ["-portfolio", "many"],
+    ["-portfolio_rounds", "0"],
+])
+def test_verify_parallel_options(file_exists, arguments):
+    file_exists.return_value = True
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"] + arguments)
+
+    with pytest.raises(ValueError):
+        knowledge_source.verify()
+
+
+def test_process_parallel_options():
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"])
+    knowledge_source.process()
+    assert blackboard.cores is None
+    assert blackboard.multi_start == 1
+    assert blackboard.decomposition == False
+    assert blackboard.decomposition_routes == 8
+    assert blackboard.portfolio == 1
+    assert blackboard.portfolio_rounds == 1
+    assert blackboard.ruin_recreate == False
+
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000",
+                                                 "-cores", "8", "-multi_start", "16", "-multi_start_time_fraction", "0.2",
+                                                 "-decomposition", "-decomposition_routes", "4", "-portfolio", "6", "-portfolio_rounds", "3",
+                                                 "-ruin_recreate"])
+    knowledge_source.process()
+    assert blackboard.cores == 8
+    assert blackboard.multi_start == 16
+    assert blackboard.multi_start_time_fraction == 0.2
+    assert blackboard.decomposition == True
+    assert blackboard.decomposition_routes == 4
+    assert blackboard.portfolio == 6
+    assert blackboard.portfolio_rounds == 3
+    assert blackboard.ruin_recreate == True
+
+
+@patch("os.path.exists")
+@pytest.mark.parametrize("arguments", [
+    ["-no_solution_improvement_limit", "few"],
+    ["-minimum_duration", "1.5"],
+    ["-init_duration", "-1"],
+    ["-time_out_multiplier", "0"],
+    ["-time_out_multiplier", "twice"],
+    ["-minimum_duration"],
+])
+def test_verify_stopping_options(file_exists, arguments):
+    file_exists.return_value = True
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"] + arguments)
+
+    with pytest.raises(ValueError):
+        knowledge_source.verify()
+
+
+def test_process_stopping_options():
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"])
+    knowledge_source.process()
+    assert blackboard.no_solution_improvement_limit is None
+    assert blackboard.minimum_duration == 0
+    assert blackboard.time_out_multiplier is None
+    assert blackboard.init_duration is None
+    assert blackboard.time_limit == 3
+
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000",
+                                                 "-no_solution_improvement_limit", "10", "-minimum_duration", "500",
+                                                 "-time_out_multiplier", "2", "-init_duration", "1000"])
+    knowledge_source.process()
+    assert blackboard.no_solution_improvement_limit == 10
+    assert blackboard.minimum_duration == 0.5
+    assert blackboard.time_out_multiplier == 2
+    assert blackboard.init_duration == 1000
+    assert blackboard.time_limit == 1
+
+
+def test_process_only_first_solution():
+    blackboard = Mock()
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000"])
+    knowledge_source.process()
+    assert blackboard.only_first_solution == False
+
+    knowledge_source = GetArguments(blackboard, ["-instance_file", "instance.txt", "-solution_file", "solution.txt", "-time_limit_in_ms", "3000",
+                                                 "-only_first_solution"])
+    knowledge_source.process()
+    assert blackboard.only_first_solution == True
@@ -0,0 +1,72 @@
+from unittest.mock import Mock
+import numpy
+import pytest
+
+import warmup
+from parallel import fork_map
+from heuristics.clustering import CLUSTERING_AGGLOMERATIVE, CLUSTERING_KMEDOIDS, LINKAGE_COMPLETE, LINKAGE_AVERAGE
+from knowledge_sources.multi_start_initial_paths import MultiStartInitialPaths, clustering_variants, candidate_paths
+
+def test_clustering_variants_agglomerative():
+    variants = clustering_variants(10, CLUSTERING_AGGLOMERATIVE, False, 10)
+
+    assert len(variants) == 10
+    # The configured clustering is left out
+    assert variants[0] == {"clustering_method": CLUSTERING_AGGLOMERATIVE, "linkage": LINKAGE_COMPLETE, "seed": 0,
+                           "num_clusters": 10, "balanced_clustering": True}
+    assert [variant["linkage"] for variant in variants[:7]] == [LINKAGE_COMPLETE] * 3 + [LINKAGE_AVERAGE] * 4
+    assert [variant["num_clusters"] for variant in variants[:3]] == [10, 8, 8]
+    assert [variant["balanced_clustering"] for variant in variants[:3]] == [True, False, True]
+    assert [variant["clustering_method"] for variant in variants[7:]] == [CLUSTERING_KMEDOIDS] * 3
+
+def test_clustering_variants_kmedoids():
+    variants = clustering_variants(6, CLUSTERING_KMEDOIDS, True, 1)
+
+    assert [variant["clustering_method"] for variant in variants] == [CLUSTERING_KMEDOIDS] * 6
+    assert [variant["seed"] for variant in variants] == [0, 1, 1, 2, 2, 3]
+    assert [variant["num_clusters"] for variant in variants] == [1] * 6
+    assert [variant["balanced_clustering"] for variant in variants] == [False] + [True, False] * 2 + [True]
+
+@pytest.mark.parametrize("method,balanced", [(CLUSTERING_AGGLOMERATIVE, False), (CLUSTERING_KMEDOIDS, True)])
+def test_clustering_variants_distinct(method, balanced):
+    variants = clustering_variants(12, method, balanced, 5)
+
+    settings = [tuple(variant.values()) for variant in variants]
+    assert len(set(settings)) == 12
+    assert (method, LINKAGE_COMPLETE, 0, 5, balanced) not in settings
+
+def test_candidate_paths():
+    blackboard, = warmup.warm_up([warmup.synthetic_problem(num_services=12, num_vehicles=3)],
+                                 knowledge_sources=warmup.WARM_UP_KNOWLEDGE_SOURCES[:-2])
+    variants = clustering_variants(12, CLUSTERING_AGGLOMERATIVE, False, 3)
+
+    results = fork_map(candidate_paths, [None] + variants, shared=blackboard, processes=4)
+
+    assert numpy.array_equal(results[0][0], blackboard.paths)
+    for paths, unassigned_services in results:
+        assert paths.shape == blackboard.paths.shape
+        assert sorted(paths[paths >= 0]) == list(range(blackboard.num_services))
+        assert (unassigned_services == -1).all()
+    # Fewer clusters than vehicles leave a vehicle empty
+    for (paths, _), variant in zip(results[1:], variants):
+        assert numpy.count_nonzero((paths >= 0).any(axis=1)) <= variant["num_clusters"]
+    # Every candidate differs from the configured clustering
+    for paths, _ in results[1:]:
+        assert not numpy.array_equal(paths, blackboard.paths)
+
+@pytest.mark.parametrize("multi_start,routes,only_first_solution", [
+    (1, [], False),
+    (4, [{"vehicleId": "vehicle_0", "serviceIds": []}], False),
+    (4, [], True),
+])
+def test_process_no_multi_start(multi_start, routes, only_first_solution):
+    blackboard = Mock()
+    blackboard.multi_start = multi_start
+    blackboard.only_first_solution = only_first_solution
+    blackboard.problem = {"routes": routes}
+    blackboard.time_limit = 10
+    knowledge_source = MultiStartInitialPaths(blackboard)
+    knowledge_source.process()
+
+    assert blackboard.time_limit == 10
+    assert isinstance(blackboard.initial_candidates, Mock)
@@ -0,0 +1,90 @@
+from unittest.mock import Mock
+import numpy
+import pytest
+
+import warmup
+from knowledge_sources.optimize_decomposition import OptimizeDecomposition, group_problem, merged_paths
+
+@pytest.fixture(scope="module")
+def blackboard():
+    blackboard, = warmup.warm_up([warmup.synthetic_problem(num_services=10, num_vehicles=4, num_rests=1)],
+                                 knowledge_sources=warmup.WARM_UP_KNOWLEDGE_SOURCES[:-2])
+    return blackboard
+
+def test_group_problem(blackboard):
+    vehicles = numpy.array([1, 3])
+
+    group, services = group_problem(blackboard, vehicles)
+
+    paths = blackboard.paths[vehicles]
+    assert (services == numpy.sort(paths[paths >= 0])).all()
+    assert group.num_services == services.size
+    assert group.num_vehicle == 2
+    assert group.paths.shape == (2, services.size + 1)
+    assert (numpy.where(group.paths >= 0, services[group.paths], -1) == paths[:, :services.size + 1]).all()
+    assert (group.unassigned_services == -1).all()
+    assert (group.durations == blackboard.durations[services]).all()
+    assert (group.vehicle_capacities == blackboard.vehicle_capacities[vehicles]).all()
+    assert group.free_approach.size == 4
+    # Locations of the services and of the depot only
+    located = group.service_matrix_index >= 0
+    assert group.time_matrices.shape[1] == numpy.count_nonzero(located) + 1
+    for service in numpy.flatnonzero(located):
+        assert group.time_matrices[0, group.service_matrix_index[service], group.vehicle_start_index[0]] == \
+            blackboard.time_matrices[0, blackboard.service_matrix_index[services[service]], blackboard.vehicle_start_index[1]]
+    # Rests stick to their vehicle in the group
+    for service in numpy.flatnonzero(group.is_break):
+        vehicle = blackboard.service_sticky_vehicles[services[service]][0]
+        assert (group.service_sticky_vehicles[service] == numpy.flatnonzero(vehicles == vehicle)).all()
+    assert len(group.problem["vehicles"]) == 2
+    assert len(group.problem["services"]) == numpy.count_nonzero(located)
+    assert "matrices" not in group.problem
+    assert "matrices" in blackboard.problem
+
+def test_group_problem_sticky_out_of_group(blackboard):
+    vehicles = numpy.array([0, 1])
+    service = blackboard.paths[1, 0]
+    sticky_vehicles = dict(blackboard.service_sticky_vehicles)
+    sticky_vehicles[service] = numpy.array([2, 3], dtype=numpy.int32)
+    blackboard.service_sticky_vehicles, original = sticky_vehicles, blackboard.service_sticky_vehicles
+    try:
+        group, services = group_problem(blackboard, vehicles)
+    finally:
+        blackboard.service_sticky_vehicles = original
+
+    local_service = numpy.searchsorted(services, service)
+    assert (group.service_sticky_vehicles[local_service] == [1]).all()
+
+def test_group_problem_previous_vehicle(blackboard):
+    previous_vehicle = blackboard.previous_vehicle
+    blackboard.previous_vehicle = numpy.array([-1, -1, 0, 2], dtype=numpy.int32)
+    try:
+        group, _ = group_problem(blackboard, numpy.array([0, 3, 2]))
+    finally:
+        blackboard.previous_vehicle = previous_vehicle
+
+    assert (group.previous_vehicle == [-1, 2, 0]).all()
+
+def test_merged_paths():
+    paths = numpy.array([[0, 1, -1, -1, -1], [2, -1, -1, -1, -1], [3, -1, -1, -1, -1]])
+    unassigned_services = numpy.array([4, -1, -1, -1, -1])
+
+    merged, unassigned = merged_paths(paths, unassigned_services, [numpy.array([0, 2]), numpy.array([1])],
+                                      [numpy.array([[-1, -1, -1], [1, 3, -1]]), None])
+
+    assert (merged == numpy.array([[-1, -1, -1, -1, -1], [2, -1, -1, -1, -1], [1, 3, -1, -1, -1]])).all()
+    assert (unassigned == [0, 4, -1, -1, -1]).all()
+
+@pytest.mark.parametrize("decomposition,num_vehicle,only_first_solution", [(False, 40, False), (True, 8, False), (True, 40, True)])
+def test_process_no_decomposition(decomposition, num_vehicle, only_first_solution):
+    blackboard = Mock()
+    blackboard.decomposition = decomposition
+    blackboard.only_first_solution = only_first_solution
+    blackboard.num_vehicle = num_vehicle
+    blackboard.decomposition_routes = 8
+    blackboard.time_limit = 10
+    knowledge_source = OptimizeDecomposition(blackboard)
+    knowledge_source.process()
+
+    assert blackboard.time_limit == 10
+    assert isinstance(blackboard.paths, Mock)
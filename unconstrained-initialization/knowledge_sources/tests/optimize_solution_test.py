@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+import numpy
+import pytest
+
+import warmup
+from knowledge_sources import optimize_solution
+from knowledge_sources.optimize_solution import OptimizeSolution, solution_result, portfolio_starts, perturbed_start, ruined_services, \
+    recreated_paths, stagnated, optimize_until_stagnation, RUIN_OPERATORS
+
+@pytest.fixture(scope="module")
+def blackboard():
+    blackboard, = warmup.warm_up([warmup.synthetic_problem(num_services=30, num_vehicles=3, num_rests=1)],
+                                 knowledge_sources=warmup.WARM_UP_KNOWLEDGE_SOURCES[:-2])
+    return blackboard
+
+def test_solution_result():
+    solution = SimpleNamespace(total_cost=12.5, paths=numpy.array([[3, 0, -1, -1, -1], [2, -1, -1, -1, -1]]))
+
+    cost, paths, unassigned_services = solution_result(solution, 4)
+
+    assert cost == 12.5
+    assert (paths == solution.paths).all()
+    assert paths is not solution.paths
+    assert (unassigned_services == [1, -1, -1, -1, -1]).all()
+
+def test_portfolio_starts():
+    paths, unassigned_services = numpy.zeros((2, 3)), numpy.full(3, -1)
+    candidates = [(1, "paths_1", "unassigned_1"), (2, "paths_2", "unassigned_2")]
+
+    assert portfolio_starts(candidates, paths, unassigned_services, 3) == \
+        [("paths_1", "unassigned_1", False), ("paths_2", "unassigned_2", False), ("paths_1", "unassigned_1", True)]
+    starts = portfolio_starts(None, paths, unassigned_services, 2)
+    assert len(starts) == 2
+    assert all(start[0] is paths and start[1] is unassigned_services for start in starts)
+    # Only the first member starts from the given paths as they are
+    assert [start[2] for start in starts] == [False, True]
+
+def test_perturbed_start(blackboard):
+    unassigned_services = numpy.full(blackboard.num_services + 1, -1, dtype=numpy.int32)
+
+    starts = [perturbed_start(blackboard, blackboard.paths, unassigned_services, seed) for seed in range(4)]
+
+    for paths, unassigned in starts:
+        assert not numpy.array_equal(paths, blackboard.paths)
+        assert sorted(numpy.concatenate((paths[paths >= 0], unassigned[unassigned >= 0]))) == list(range(blackboard.num_services))
+    assert not numpy.array_equal(starts[0][0], starts[1][0])
+
+@pytest.mark.parametrize("operator", RUIN_OPERATORS)
+def test_ruined_services(blackboard, operator):
+    paths = blackboard.paths
+    path_starts = numpy.tile(numpy.arange(paths.shape[1]) * 100.0, (paths.shape[0], 1))
+
+    removed = ruined_services(blackboard, paths, path_starts, operator, numpy.random.default_rng(0))
+
+    # 10% of the 33 routed services, never the rests
+    assert 1 <= removed.size <= 3
+    assert numpy.unique(removed).size == removed.size
+    assert (blackboard.is_break[removed] == 0).all()
+    assert numpy.isin(removed, paths).all()
+
+def test_recreated_paths(blackboard):
+    removed = numpy.array([0, 5, 7])
+    unassigned_services = numpy.full(blackboard.num_services + 1, -1, dtype=numpy.int32)
+    unassigned_services[0] = 12
+    paths = blackboard.paths.copy()
+    paths[paths == 12] = -1
+    paths = numpy.array([numpy.concatenate((path[path >= 0], path[path < 0])) for path in paths])
+
+    recreated, recreated_unassigned = recreated_paths(blackboard, paths, unassigned_services, removed)
+
+    assert sorted(recreated[recreated >= 0]) == list(range(blackboard.num_services))
+    assert (recreated_unassigned == -1).all()
+    # Rests stay in their path
+    for rest in numpy.flatnonzero(blackboard.is_break):
+        assert (recreated == rest).any(axis=1).nonzero()[0].tolist() == blackboard.service_sticky_vehicles[rest].tolist()
+
+@pytest.mark.parametrize("limit,multiplier,minimum_duration,elapsed,best_elapsed,without_improvement,expected", [
+    (None, None, 0, 100, 1, 99, False),
+    (3, None, 0, 10, 7, 3, True),
+    (3, None, 0, 10, 8, 2, False),
+    (3, None, 20, 10, 7, 3, False),
+    (None, 2, 0, 9, 3, 6, True),
+    (None, 2, 0, 8, 3, 5, False),
+    (None, 2, 10, 9, 3, 6, False),
+    (5, 2, 0, 9, 3, 1, True),
+])
+def test_stagnated(limit, multiplier, minimum_duration, elapsed, best_elapsed, without_improvement, expected):
+    blackboard = SimpleNamespace(no_solution_improvement_limit=limit, time_out_multiplier=multiplier, minimum_duration=minimum_duration)
+
+    assert stagnated(blackboard, elapsed, best_elapsed, without_improvement) == expected
+
+@pytest.mark.parametrize("costs,limit,multiplier,expected_bursts", [
+    # No improvement after the first burst : the time out counts from its end
+    ([10, 10, 10, 10, 10, 10], None, 2, 3),
+    ([10, 9, 8, 8, 8, 8, 8, 8, 8, 8], None, 1, 6),
+    ([10, 9, 9, 9, 9, 9, 9, 9, 9, 9], 2, None, 4),
+    ([10, 9, 8, 7], None, 2, 4),
+])
+def test_optimize_until_stagnation(monkeypatch, costs, limit, multiplier, expected_bursts):
+    clock = SimpleNamespace(now=0)
+    solution = SimpleNamespace(total_cost=20)
+    bursts = []
+    def optimize(blackboard, solution, max_execution_time):
+        clock.now += max_execution_time
+        solution.total_cost = costs[len(bursts)]
+        bursts.append(max_execution_time)
+    monkeypatch.setattr(optimize_solution, "optimize", optimize)
+    monkeypatch.setattr(optimize_solution, "time", SimpleNamespace(perf_counter=lambda: clock.now))
+    blackboard = SimpleNamespace(no_solution_improvement_limit=limit, time_out_multiplier=multiplier, minimum_duration=0)
+
+    optimize_until_stagnation(blackboard, solution, len(costs))
+
+    assert len(bursts) == expected_bursts
+
+def test_process_only_first_solution():
+    blackboard = Mock()
+    blackboard.only_first_solution = True
+    solution = blackboard.solution
+    knowledge_source = OptimizeSolution(blackboard)
+    knowledge_source.process()
+
+    assert blackboard.solution is solution
@@ -3,7 +3,7 @@ import pytest
 import numpy
 import copy
 
-from knowledge_sources.process_clustering_initial_paths import ProcessClusteringInitialPaths
+from knowledge_sources.process_clustering_initial_paths import ProcessClusteringInitialPaths, services_time_matrix
 
 def paths_contains(paths, values):
 
@@ -37,8 +37,303 @@ def test_process():
                                                         [1,5,1,1,1,0]]]),
                       vehicle_start_index = [4,5],
                       vehicle_end_index   = [4,5],
-                      num_vehicle = 2)
+                      num_vehicle = 2,
+                      vehicles_matrix_index = numpy.array([0, 0]),
+                      num_services = 4,
+                      service_matrix_index = numpy.array([0,1,2,3]),
+                      problem = {"services": [{}, {}, {}, {}]},
+                      rests = [],
+                      service_id_to_index = {"0": 0, "1": 1, "2": 2, "3": 3},
+                      clustering_method = "auto",
+                      clustering_threshold = 5000,
+                      balanced_clustering = False,
+                      cluster_assignment = False,
+                      depot_seeding = False,
+                      time_window_clustering = False)
     knowledge_source = ProcessClusteringInitialPaths(blackboard)
 
     knowledge_source.process()
     assert paths_contains(blackboard.paths, [[0,1],[2,3]])
+
+    blackboard.clustering_method = "kmedoids"
+    knowledge_source.process()
+    assert paths_contains(blackboard.paths, [[0,1],[2,3]])
+
+
+def test_process_balanced():
+    time_matrices = numpy.array([[[0,1,9,9,9],
+                                  [1,0,9,9,9],
+                                  [9,9,0,1,9],
+                                  [9,9,1,0,9],
+                                  [9,9,9,9,0]]])
+    blackboard = Mock(time_matrices = time_matrices,
+                      num_vehicle = 2,
+                      vehicles_matrix_index = numpy.array([0, 0]),
+                      num_services = 4,
+                      num_units = 1,
+                      service_matrix_index = numpy.array([0,1,2,3]),
+                      problem = {"services": [{}, {}, {}, {}]},
+                      rests = [],
+                      service_id_to_index = {"0": 0, "1": 1, "2": 2, "3": 3},
+                      service_sticky_vehicles = {},
+                      services_volumes = numpy.array([[1],[1],[1],[1]]),
+                      vehicle_capacities = numpy.array([[3],[1]]),
+                      durations = numpy.zeros(4),
+                      setup_durations = numpy.zeros(4),
+                      vehicles_TW_starts = numpy.array([0, 0]),
+                      vehicles_TW_ends = numpy.array([-1, -1]),
+                      vehicles_duration_max = numpy.array([-1, -1]),
+                      clustering_method = "agglomerative",
+                      clustering_threshold = 5000,
+                      balanced_clustering = True,
+                      cluster_assignment = False,
+                      depot_seeding = False,
+                      time_window_clustering = False)
+    knowledge_source = ProcessClusteringInitialPaths(blackboard)
+
+    knowledge_source.process()
+
+    assert (blackboard.paths[0] >= 0).sum() == 3
+    assert (blackboard.paths[1] >= 0).sum() == 1
+    assert sorted(blackboard.paths[blackboard.paths >= 0]) == [0, 1, 2, 3]
+
+
+def test_process_cluster_assignment():
+    # Vehicle 0 starts and ends at 4, next to services 2 and 3, vehicle 1 at 5, next to 0 and 1
+    time_matrices = numpy.array([[[0,1,9,9,9,1],
+                                  [1,0,9,9,9,1],
+                                  [9,9,0,1,1,9],
+                                  [9,9,1,0,1,9],
+                                  [9,9,1,1,0,9],
+                                  [1,1,9,9,9,0]]])
+    blackboard = Mock(time_matrices = time_matrices,
+                      num_vehicle = 2,
+                      num_services = 4,
+                      num_units = 1,
+                      service_matrix_index = numpy.array([0,1,2,3]),
+                      problem = {"services": [{}, {}, {}, {}]},
+                      rests = [],
+                      service_id_to_index = {"0": 0, "1": 1, "2": 2, "3": 3},
+                      service_sticky_vehicles = {},
+                      services_volumes = numpy.zeros((4, 1)),
+                      vehicle_capacities = numpy.array([[-1],[-1]]),
+                      start_tw = numpy.zeros((4, 1)),
+                      end_tw = numpy.full((4, 1), -1),
+                      vehicles_TW_starts = numpy.array([0, 0]),
+                      vehicles_TW_ends = numpy.array([-1, -1]),
+                      vehicles_matrix_index = numpy.array([0, 0]),
+                      vehicle_start_index = numpy.array([4, 5]),
+                      vehicle_end_index = numpy.array([4, 5]),
+                      clustering_method = "kmedoids",
+                      clustering_threshold = 5000,
+                      balanced_clustering = False,
+                      cluster_assignment = True,
+                      depot_seeding = False,
+                      time_window_clustering = False)
+    knowledge_source = ProcessClusteringInitialPaths(blackboard)
+
+    knowledge_source.process()
+
+    assert sorted(blackboard.paths[0][blackboard.paths[0] >= 0]) == [2, 3]
+    assert sorted(blackboard.paths[1][blackboard.paths[1] >= 0]) == [0, 1]
+
+    blackboard.cluster_assignment = False
+    blackboard.depot_seeding = True
+    knowledge_source.process()
+
+    assert sorted(blackboard.paths[0][blackboard.paths[0] >= 0]) == [2, 3]
+    assert sorted(blackboard.paths[1][blackboard.paths[1] >= 0]) == [0, 1]
+
+
+def test_process_time_window_clustering():
+    # Services 0 and 2 are next to each other but in the morning, 1 and 3 in the afternoon
+    time_matrices = numpy.array([[[0,9,1,9,5],
+                                  [9,0,9,1,5],
+                                  [1,9,0,9,5],
+                                  [9,1,9,0,5],
+                                  [5,5,5,5,0]]])
+    blackboard = Mock(time_matrices = time_matrices,
+                      num_vehicle = 2,
+                      vehicles_matrix_index = numpy.array([0, 0]),
+                      num_services = 4,
+                      service_matrix_index = numpy.array([0,1,0,1]),
+                      problem = {"services": [{}, {}, {}, {}]},
+                      rests = [],
+                      service_id_to_index = {"0": 0, "1": 1, "2": 2, "3": 3},
+                      start_tw = numpy.array([[0],[0],[500],[500]]),
+                      end_tw = numpy.array([[100],[100],[600],[600]]),
+                      durations = numpy.zeros(4),
+                      clustering_method = "agglomerative",
+                      clustering_threshold = 5000,
+                      balanced_clustering = False,
+                      cluster_assignment = False,
+                      depot_seeding = False,
+                      time_window_clustering = False,
+                      time_window_weight = 1)
+    knowledge_source = ProcessClusteringInitialPaths(blackboard)
+
+    knowledge_source.process()
+    assert paths_contains(blackboard.paths, [[0,2],[1,3]])
+
+    blackboard.time_window_clustering = True
+    knowledge_source.process()
+    assert paths_contains(blackboard.paths, [[0,1],[2,3]])
+
+    blackboard.clustering_method = "kmedoids"
+    knowledge_source.process()
+    assert paths_contains(blackboard.paths, [[0,1],[2,3]])
+
+
+def test_process_vehicles_matrices():
+    # Services 2 and 3 are only reachable quickly with the second matrix (bikes)
+    trucks = numpy.array([[0,1,50,50,1],
+                          [1,0,50,50,1],
+                          [50,50,0,1,50],
+                          [50,50,1,0,50],
+                          [1,1,50,50,0]])
+    bikes = numpy.array([[0,9,9,9,9],
+                         [9,0,9,9,9],
+                         [9,9,0,1,9],
+                         [9,9,1,0,9],
+                         [9,9,9,9,0]])
+    blackboard = Mock(time_matrices = numpy.array([trucks, bikes]),
+                      num_vehicle = 2,
+                      vehicles_matrix_index = numpy.array([1, 0]),
+                      vehicle_start_index = numpy.array([4, 4]),
+                      vehicle_end_index = numpy.array([4, 4]),
+                      num_services = 4,
+                      service_matrix_index = numpy.array([0,1,2,3]),
+                      problem = {"services": [{}, {}, {}, {}]},
+                      rests = [],
+                      service_id_to_index = {"0": 0, "1": 1, "2": 2, "3": 3},
+                      clustering_method = "agglomerative",
+                      clustering_threshold = 5000,
+                      balanced_clustering = False,
+                      cluster_assignment = True,
+                      depot_seeding = False,
+                      time_window_clustering = False)
+    knowledge_source = ProcessClusteringInitialPaths(blackboard)
+
+    knowledge_source.process()
+
+    assert sorted(blackboard.paths[0][blackboard.paths[0] >= 0]) == [2, 3]
+    assert sorted(blackboard.paths[1][blackboard.paths[1] >= 0]) == [0, 1]
+
+
+@pytest.mark.parametrize("depots", [[4, 5], [5, 4]])
+def test_process_balanced_cluster_assignment(depots):
+    # The balanced clusters keep the vehicle their cluster is assigned to, whatever the order of the vehicles
+    time_matrices = numpy.array([[[0,1,9,9,9,1],
+                                  [1,0,9,9,9,1],
+                                  [9,9,0,1,1,9],
+                                  [9,9,1,0,1,9],
+                                  [9,9,1,1,0,9],
+                                  [1,1,9,9,9,0]]])
+    blackboard = Mock(time_matrices = time_matrices,
+                      num_vehicle = 2,
+                      num_services = 4,
+                      num_units = 1,
+                      service_matrix_index = numpy.array([0,1,2,3]),
+                      problem = {"services": [{}, {}, {}, {}]},
+                      rests = [],
+                      service_id_to_index = {"0": 0, "1": 1, "2": 2, "3": 3},
+                      service_sticky_vehicles = {},
+                      services_volumes = numpy.ones((4, 1)),
+                      vehicle_capacities = numpy.array([[2],[2]]),
+                      durations = numpy.zeros(4),
+                      setup_durations = numpy.zeros(4),
+                      start_tw = numpy.zeros((4, 1)),
+                      end_tw = numpy.full((4, 1), -1),
+                      vehicles_TW_starts = numpy.array([0, 0]),
+                      vehicles_TW_ends = numpy.array([-1, -1]),
+                      vehicles_duration_max = numpy.array([-1, -1]),
+                      vehicles_matrix_index = numpy.array([0, 0]),
+                      vehicle_start_index = numpy.array(depots),
+                      vehicle_end_index = numpy.array(depots),
+                      clustering_method = "kmedoids",
+                      clustering_threshold = 5000,
+                      balanced_clustering = True,
+                      cluster_assignment = True,
+                      depot_seeding = False,
+                      time_window_clustering = False)
+    knowledge_source = ProcessClusteringInitialPaths(blackboard)
+
+    knowledge_source.process()
+
+    # Depot 4 is next to services 2 and 3, depot 5 next to 0 and 1
+    vehicle_near_2_3 = depots.index(4)
+    assert sorted(blackboard.paths[vehicle_near_2_3][blackboard.paths[vehicle_near_2_3] >= 0]) == [2, 3]
+    assert sorted(blackboard.paths[1 - vehicle_near_2_3][blackboard.paths[1 - vehicle_near_2_3] >= 0]) == [0, 1]
+
+
+def test_process_routes():
+    blackboard = Mock(num_vehicle = 2,
+                      num_services = 5,
+                      problem = {"services": [{}, {}, {}, {}, {}],
+                                 "routes": [{"vehicleId": "v1", "serviceIds": ["3", "0"]}, {"vehicleId": "v0", "serviceIds": ["2"]}]},
+                      vehicle_id_index = {"v0": 0, "v1": 1},
+                      service_id_to_index = {"0": 0, "1": 1, "2": 2, "3": 3, "4": 4},
+                      insert_unrouted = False)
+    knowledge_source = ProcessClusteringInitialPaths(blackboard)
+
+    knowledge_source.process()
+
+    assert blackboard.paths.tolist() == [[2, -1, -1, -1, -1, -1], [3, 0, -1, -1, -1, -1]]
+    assert blackboard.unassigned_services.tolist() == [1, 4, -1, -1, -1, -1]
+
+
+def routes_insert_unrouted_blackboard(only_first_solution):
+    # Locations on a line : services 0, 1, 2 next to the depot 5 of vehicle 1, services 3, 4 next to the depot 6 of vehicle 0
+    positions = numpy.array([0, 1, 2, 11, 12, -1, 13])
+    time_matrices = numpy.abs(positions[:, None] - positions[None, :])[None].astype(numpy.float64)
+    return Mock(time_matrices = time_matrices,
+                      num_vehicle = 2,
+                      num_services = 5,
+                      num_units = 1,
+                      service_matrix_index = numpy.array([0, 1, 2, 3, 4]),
+                      vehicles_matrix_index = numpy.array([0, 0]),
+                      vehicle_start_index = numpy.array([6, 5]),
+                      vehicle_end_index = numpy.array([6, 5]),
+                      services_volumes = numpy.ones((5, 1)),
+                      vehicle_capacities = numpy.array([[-1], [2]]),
+                      service_sticky_vehicles = {},
+                      problem = {"services": [{}, {}, {}, {}, {}],
+                                 "routes": [{"vehicleId": "v0", "serviceIds": ["3"]}, {"vehicleId": "v1", "serviceIds": ["0"]}]},
+                      vehicle_id_index = {"v0": 0, "v1": 1},
+                      service_id_to_index = {"0": 0, "1": 1, "2": 2, "3": 3, "4": 4},
+                      insert_unrouted = True,
+                      only_first_solution = only_first_solution)
+
+
+def test_process_routes_insert_unrouted():
+    blackboard = routes_insert_unrouted_blackboard(only_first_solution = False)
+    knowledge_source = ProcessClusteringInitialPaths(blackboard)
+
+    knowledge_source.process()
+
+    # Vehicle 1 can carry only one more service : the closest one, 2 goes to vehicle 0
+    assert sorted(blackboard.paths[1][blackboard.paths[1] >= 0]) == [0, 1]
+    assert sorted(blackboard.paths[0][blackboard.paths[0] >= 0]) == [2, 3, 4]
+    assert (blackboard.unassigned_services == -1).all()
+
+
+def test_process_routes_only_first_solution():
+    blackboard = routes_insert_unrouted_blackboard(only_first_solution = True)
+    knowledge_source = ProcessClusteringInitialPaths(blackboard)
+
+    knowledge_source.process()
+
+    # The given routes are returned as they are
+    assert blackboard.paths.tolist() == [[3, -1, -1, -1, -1, -1], [0, -1, -1, -1, -1, -1]]
+    assert blackboard.unassigned_services.tolist() == [1, 2, 4, -1, -1, -1]
+
+
+def test_services_time_matrix(monkeypatch):
+    monkeypatch.setattr("knowledge_sources.process_clustering_initial_paths.ROWS_CHUNK_SIZE", 2)
+    time_matrix = numpy.arange(36, dtype=numpy.float64).reshape(6, 6)
+    services_matrix_index = numpy.array([4, 0, 2, 2, 5])
+
+    matrix = services_time_matrix(time_matrix, services_matrix_index)
+
+    assert matrix.dtype == numpy.float32
+    assert (matrix == time_matrix[numpy.ix_(services_matrix_index, services_matrix_index)]).all()
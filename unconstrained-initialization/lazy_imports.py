@@ -0,0 +1,54 @@
+"""Lazy imports of the heavy dependencies and import-time accounting
+
+The knowledge sources import sklearn and fastvrpy through timed_import when they
+process, so that a stage only pays for the libraries it uses. Every first import
+done through timed_import is recorded and can be reported with import_time_report
+(python3 main.py -import_time_report).
+"""
+import importlib
+import sys
+import time
+
+# Heavy dependencies only needed by the solving knowledge sources
+SOLVER_MODULES = [
+    "sklearn.cluster",
+    "scipy.optimize",
+    "fastvrpy.core.solutions.cvrptw",
+    "fastvrpy.solver",
+]
+
+# Time (ms) taken by the first import of each module, in import order
+IMPORT_TIMES = {}
+
+
+def timed_import(name):
+    """Import a module by name and record how long its first import took
+
+    Returns
+    -------
+        module : the imported module (the submodule for dotted names)
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES.setdefault(name, (time.perf_counter() - start) * 1000)
+    return module
+
+
+def import_modules(names):
+    for name in names:
+        timed_import(name)
+
+
+def import_time_report():
+    """Lines 'time_ms module' of the recorded imports, slowest first
+
+    The time of a module includes the dependencies it was the first to import.
+    """
+    lines = [f"{'ms':>10}  module"]
+    for name, elapsed in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]):
+        lines.append(f"{elapsed:>10.1f}  {name}")
+    lines.append(f"{sum(IMPORT_TIMES.values()):>10.1f}  total")
+    return lines
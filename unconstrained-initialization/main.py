@@ -1,22 +1,29 @@
 
 from blackboard.blackboard import Blackboard
 from controller.controller import Controller
+from lazy_imports import timed_import, import_modules, import_time_report, SOLVER_MODULES
 import traceback
 import os, sys
 import logging as log
 
-from knowledge_sources.create_services_attributes_from_problem import CreateServicesAttributesFromProblem
-from knowledge_sources.create_vehicles_attributes_from_problem import CreateVehiclesAttributesFromProblem
-from knowledge_sources.create_matrices_from_problem import CreateMatricesFromProblem
-from knowledge_sources.deserialize_problem import DeserializeProblem
 from knowledge_sources.get_arguments import GetArguments
-from knowledge_sources.optimize_solution import OptimizeSolution
-from knowledge_sources.process_clustering_initial_paths import ProcessClusteringInitialPaths
-from knowledge_sources.process_initial_solution import ProcessInitialSolution
-from knowledge_sources.create_services_attributes_from_problem import CreateServicesAttributesFromProblem
-from knowledge_sources.parse_and_serialize_solution import ParseAndSerializeSolution
-from knowledge_sources.print_kpis import PrintKpis
-from knowledge_sources.create_dictionnary_index_to_id import CreateDictionnaryIndexId
+
+# Knowledge sources run after GetArguments, in order : (module, class)
+# Their modules are imported when the pipeline is built
+KNOWLEDGE_SOURCES = [
+    ("knowledge_sources.deserialize_problem", "DeserializeProblem"),
+    ("knowledge_sources.create_vehicles_attributes_from_problem", "CreateVehiclesAttributesFromProblem"),
+    ("knowledge_sources.create_services_attributes_from_problem", "CreateServicesAttributesFromProblem"),
+    ("knowledge_sources.create_dictionnary_index_to_id", "CreateDictionnaryIndexId"),
+    ("knowledge_sources.create_matrices_from_problem", "CreateMatricesFromProblem"),
+    ("knowledge_sources.process_clustering_initial_paths", "ProcessClusteringInitialPaths"),
+    ("knowledge_sources.multi_start_initial_paths", "MultiStartInitialPaths"),
+    ("knowledge_sources.optimize_decomposition", "OptimizeDecomposition"),
+    ("knowledge_sources.process_initial_solution", "ProcessInitialSolution"),
+    ("knowledge_sources.optimize_solution", "OptimizeSolution"),
+    ("knowledge_sources.parse_and_serialize_solution", "ParseAndSerializeSolution"),
+    ("knowledge_sources.print_kpis", "PrintKpis"),
+]
 
 
 
@@ -25,6 +32,19 @@ def main():
     """Main function to run the model
     """
     log_config()
+    if "-import_time_report" in sys.argv[1:]:
+        report_import_times()
+    else:
+        run()
+
+
+def run(arguments=None):
+    """Run the whole pipeline on one instance
+
+    Attributes
+    ----------
+        arguments (list): command line arguments of the job, sys.argv[1:] if None
+    """
     log.info("----------Start working------------")
 
     try:
@@ -32,17 +52,10 @@ def main():
         blackboard = Blackboard()
 
         # Add the knowledge sources
-        blackboard.add_knowledge_source(GetArguments(blackboard))
-        blackboard.add_knowledge_source(DeserializeProblem(blackboard))
-        blackboard.add_knowledge_source(CreateVehiclesAttributesFromProblem(blackboard))
-        blackboard.add_knowledge_source(CreateServicesAttributesFromProblem(blackboard))
-        blackboard.add_knowledge_source(CreateDictionnaryIndexId(blackboard))
-        blackboard.add_knowledge_source(CreateMatricesFromProblem(blackboard))
-        blackboard.add_knowledge_source(ProcessClusteringInitialPaths(blackboard))
-        blackboard.add_knowledge_source(ProcessInitialSolution(blackboard))
-        blackboard.add_knowledge_source(OptimizeSolution(blackboard))
-        blackboard.add_knowledge_source(ParseAndSerializeSolution(blackboard))
-        blackboard.add_knowledge_source(PrintKpis(blackboard))
+        blackboard.add_knowledge_source(GetArguments(blackboard, arguments))
+        for module, knowledge_source in KNOWLEDGE_SOURCES:
+            knowledge_source_class = getattr(timed_import(module), knowledge_source)
+            blackboard.add_knowledge_source(knowledge_source_class(blackboard))
 
         # Initialize the controller and run it
         controller = Controller(blackboard)
@@ -58,11 +71,25 @@ def main():
 
 
 
-def log_config():
+def report_import_times():
+    """Import every module of the pipeline and report the import time of each one
+    """
+    import_modules(module for module, _ in KNOWLEDGE_SOURCES)
+    import_modules(SOLVER_MODULES)
+    for line in import_time_report():
+        log.info(line)
+        print(line)
+
+
+def log_config(force=False):
     """Setup the logger
 
     The logger will write its output in a new file every day at midnight
 
+    Attributes
+    ----------
+        force (bool): replace the handlers already set, to log in the new working directory
+
     Returns
     -------
     log : logging.getLogger
@@ -78,7 +105,7 @@ def log_config():
     LOGGING_MODE = log.INFO
 
     #(PATH_TO_LOG, when="midnight", interval=1, encoding="utf8")
-    log.basicConfig(filename=PATH_TO_LOG, format=LOG_FORMAT, level=LOGGING_MODE)
+    log.basicConfig(filename=PATH_TO_LOG, format=LOG_FORMAT, level=LOGGING_MODE, force=force)
 
 
 if __name__ == '__main__':
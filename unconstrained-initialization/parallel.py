@@ -0,0 +1,76 @@
+"""Process pool for the stages trading idle cores for solution quality
+
+The tasks run in forked children which inherit the data they work on through
+SHARED (typically the blackboard) : nothing but the task arguments and results
+is pickled. The heavy modules (fastvrpy, sklearn) must be imported before
+fork_map is called so that the children do not import them again.
+
+A task which raises or does not finish before the deadline gives None : the
+stages keep the results they got and carry on with the pipeline.
+"""
+import multiprocessing
+import os
+import time
+import traceback
+import logging as log
+log = log.getLogger("parallel")
+
+# Data inherited by the forked children, set by fork_map
+SHARED = None
+
+# Fraction of the time limit given to the multi-start by default
+DEFAULT_MULTI_START_TIME_FRACTION = 0.1
+
+
+def available_cores():
+    """Cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def run_task(function, argument):
+    try:
+        return function(SHARED, argument)
+    except Exception:
+        log.error(f"Parallel task {argument} failed\n{traceback.format_exc()}")
+        return None
+
+
+def fork_map(function, arguments, shared=None, processes=None, timeout=None):
+    """Run function(shared, argument) for every argument in forked processes
+
+    Attributes
+    ----------
+        function (function): module level function, its result must be picklable
+        shared (object): data given to every task without being pickled
+        processes (int): processes of the pool, available_cores() if None
+        timeout (float): seconds after which the unfinished tasks are abandoned
+
+    Returns
+    -------
+        list : result of every argument, None for the failed or unfinished tasks
+    """
+    global SHARED
+    arguments = list(arguments)
+    if len(arguments) == 0:
+        return []
+    processes = min(processes or available_cores(), len(arguments))
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    SHARED = shared
+    pool = multiprocessing.get_context("fork").Pool(processes)
+    try:
+        tasks = [pool.apply_async(run_task, (function, argument)) for argument in arguments]
+        results = []
+        for argument, task in zip(arguments, tasks):
+            remaining = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            try:
+                results.append(task.get(remaining))
+            except multiprocessing.TimeoutError:
+                log.warning(f"Parallel task {argument} did not finish in time")
+                results.append(None)
+        return results
+    finally:
+        pool.terminate()
+        pool.join()
+        SHARED = None
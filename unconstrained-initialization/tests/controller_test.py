@@ -0,0 +1,98 @@
+from unittest.mock import Mock
+import json
+import pytest
+
+import numpy
+
+from controller.controller import Controller, reset_peak_rss
+
+class KnowledgeSource(object):
+    def __init__(self, verified=True):
+        self.verified = verified
+        self.processed = False
+
+    def verify(self):
+        return self.verified
+
+    def process(self):
+        self.processed = True
+
+def test_run_writes_performance_report(tmp_path):
+    knowledge_sources = [KnowledgeSource(), KnowledgeSource()]
+    blackboard = Mock(knowledge_sources = knowledge_sources, performance_report = True, output_file = str(tmp_path / "solution"))
+
+    Controller(blackboard).run_knowledge_sources()
+
+    assert all(knowledge_source.processed for knowledge_source in knowledge_sources)
+    report = json.loads((tmp_path / "solution.performance.json").read_text())
+    assert report["status"] == "ok"
+    assert [(measure["knowledge_source"], measure["step"]) for measure in report["knowledge_sources"]] == [
+        ("KnowledgeSource", "verify"), ("KnowledgeSource", "process"),
+        ("KnowledgeSource", "verify"), ("KnowledgeSource", "process"),
+    ]
+    for measure in report["knowledge_sources"]:
+        assert measure["wall_time"] >= 0
+        assert measure["cpu_time"] >= 0
+        assert measure["peak_rss"] > 0
+
+class AllocatingKnowledgeSource(KnowledgeSource):
+    def process(self):
+        numpy.ones(25_000_000).sum()
+
+def test_peak_rss_per_step(tmp_path):
+    if not reset_peak_rss():
+        pytest.skip("peak resident set size can not be reset")
+    knowledge_sources = [AllocatingKnowledgeSource(), KnowledgeSource()]
+    blackboard = Mock(knowledge_sources = knowledge_sources, performance_report = True, output_file = str(tmp_path / "solution"))
+
+    Controller(blackboard).run_knowledge_sources()
+
+    report = json.loads((tmp_path / "solution.performance.json").read_text())
+    allocating, other = report["knowledge_sources"][1], report["knowledge_sources"][3]
+    # 200 MB allocated and freed by the first knowledge source only
+    assert allocating["peak_rss"] - other["peak_rss"] > 100_000_000
+    assert report["peak_rss"] >= allocating["peak_rss"]
+
+def test_report_written_when_verify_fails(tmp_path):
+    knowledge_sources = [KnowledgeSource(), KnowledgeSource(verified=False)]
+    blackboard = Mock(knowledge_sources = knowledge_sources, performance_report = True, output_file = str(tmp_path / "solution"))
+
+    with pytest.raises(AssertionError):
+        Controller(blackboard).run_knowledge_sources()
+
+    report = json.loads((tmp_path / "solution.performance.json").read_text())
+    assert report["status"] == "failed"
+    assert len(report["knowledge_sources"]) == 3
+
+def test_no_report_by_default(tmp_path):
+    blackboard = Mock(knowledge_sources = [KnowledgeSource()], performance_report = False, output_file = str(tmp_path / "solution"))
+
+    Controller(blackboard).run_knowledge_sources()
+
+    assert not (tmp_path / "solution.performance.json").exists()
+
+@pytest.mark.parametrize("profile", ["all", "KnowledgeSource"])
+def test_profile(tmp_path, monkeypatch, profile):
+    monkeypatch.chdir(tmp_path)
+    blackboard = Mock(knowledge_sources = [KnowledgeSource()], performance_report = False, output_file = None, profile = profile)
+
+    Controller(blackboard).run_knowledge_sources()
+
+    assert len(list(tmp_path.glob(f"init_vrp_{profile}_*.prof"))) == 1
+
+def test_profile_other_knowledge_source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    blackboard = Mock(knowledge_sources = [KnowledgeSource()], performance_report = False, output_file = None, profile = "OptimizeSolution")
+
+    Controller(blackboard).run_knowledge_sources()
+
+    assert list(tmp_path.glob("*.prof")) == []
+
+def test_profile_unknown_knowledge_source(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    blackboard = Mock(knowledge_sources = [KnowledgeSource()], performance_report = False, output_file = None, profile = "KnowledgeSourc")
+
+    Controller(blackboard).run_knowledge_sources()
+
+    assert list(tmp_path.glob("*.prof")) == []
+    assert "-profile KnowledgeSourc matches no knowledge source" in caplog.text
@@ -0,0 +1,18 @@
+import sys
+
+import lazy_imports
+
+def test_timed_import_records_first_import():
+    sys.modules.pop("colorsys", None)
+    lazy_imports.IMPORT_TIMES.pop("colorsys", None)
+
+    module = lazy_imports.timed_import("colorsys")
+
+    assert module is sys.modules["colorsys"]
+    assert lazy_imports.IMPORT_TIMES["colorsys"] >= 0
+    assert any(line.endswith("  colorsys") for line in lazy_imports.import_time_report())
+
+def test_timed_import_returns_submodule():
+    module = lazy_imports.timed_import("os.path")
+
+    assert module is sys.modules["os.path"]
@@ -0,0 +1,43 @@
+import os
+import time
+
+import parallel
+
+def shared_square(shared, argument):
+    return shared[argument] ** 2
+
+def failing(shared, argument):
+    if argument == 1:
+        raise ValueError("failing task")
+    return argument
+
+def sleeping(shared, argument):
+    time.sleep(argument)
+    return argument
+
+def process_id(shared, argument):
+    return os.getpid()
+
+def test_fork_map_shared():
+    assert parallel.fork_map(shared_square, [2, 0, 1], shared=[3, 4, 5], processes=2) == [25, 9, 16]
+    assert parallel.SHARED is None
+
+def test_fork_map_empty():
+    assert parallel.fork_map(shared_square, [], shared=[]) == []
+
+def test_fork_map_failing_task():
+    assert parallel.fork_map(failing, [0, 1, 2], processes=3) == [0, None, 2]
+
+def test_fork_map_timeout():
+    start = time.perf_counter()
+
+    assert parallel.fork_map(sleeping, [0, 30], processes=2, timeout=1) == [0, None]
+    assert time.perf_counter() - start < 10
+
+def test_fork_map_children():
+    process_ids = parallel.fork_map(process_id, range(2), processes=2)
+
+    assert os.getpid() not in process_ids
+
+def test_available_cores():
+    assert parallel.available_cores() >= 1
@@ -0,0 +1,39 @@
+import pytest
+
+import warmup
+from knowledge_sources.deserialize_problem import decode_problem
+
+# Stages before the solver : no fastvrpy needed
+STAGES_BEFORE_SOLVER = warmup.WARM_UP_KNOWLEDGE_SOURCES[:-2]
+
+@pytest.mark.parametrize("specialization", warmup.SPECIALIZATIONS)
+def test_synthetic_problem(specialization):
+    problem = decode_problem(warmup.synthetic_problem(num_services=6, num_vehicles=3, **specialization))
+
+    assert len(problem["services"]) == 6
+    assert len(problem["vehicles"]) == 3
+    assert len(problem["matrices"]) == specialization.get("num_matrices", 1)
+    for vehicle in problem["vehicles"]:
+        assert len(vehicle["capacities"]) == specialization.get("num_units", 1)
+        assert len(vehicle.get("rests", [])) == specialization.get("num_rests", 0)
+    for service in problem["services"]:
+        assert len(service["timeWindows"]) == specialization.get("num_time_windows", 1)
+
+def test_warm_up_stages_before_solver():
+    problems = [warmup.synthetic_problem(**specialization) for specialization in warmup.SPECIALIZATIONS]
+
+    blackboards = warmup.warm_up(problems, knowledge_sources=STAGES_BEFORE_SOLVER)
+
+    assert len(blackboards) == len(warmup.SPECIALIZATIONS)
+    for blackboard, specialization in zip(blackboards, warmup.SPECIALIZATIONS):
+        assert blackboard.time_matrices.shape[0] == specialization.get("num_matrices", 1)
+        assert blackboard.num_units == specialization.get("num_units", 1)
+        # Every service (and rest) is in a path
+        num_services = 8 + 2 * specialization.get("num_rests", 0)
+        assert sorted(blackboard.paths[blackboard.paths >= 0]) == list(range(num_services))
+
+def test_kernels_report_without_fastvrpy(monkeypatch):
+    monkeypatch.delitem(warmup.sys.modules, "fastvrpy", raising=False)
+
+    assert warmup.compiled_kernels("numpy") == (0, 0)
+    assert warmup.kernels_report() == "fastvrpy not loaded, kernel cache unknown"
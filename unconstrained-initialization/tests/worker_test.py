@@ -0,0 +1,90 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import pytest
+
+import worker
+
+def test_pop_option():
+    arguments = ["-socket", "worker.sock", "-serve", "-time_limit_in_ms", "1000"]
+
+    assert worker.pop_option(arguments, "-socket") == "worker.sock"
+    assert worker.pop_option(arguments, "-serve", has_value=False) == True
+    assert worker.pop_option(arguments, "-missing") is None
+    assert arguments == ["-time_limit_in_ms", "1000"]
+
+def test_request_round_trip():
+    client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client, server:
+        worker.send_request(client, ["-instance_file", "instance.txt"])
+        request, file_descriptors = worker.receive_request(server)
+
+    assert request == {"arguments": ["-instance_file", "instance.txt"], "cwd": os.getcwd()}
+    assert len(file_descriptors) == 2
+    for file_descriptor in file_descriptors:
+        os.close(file_descriptor)
+
+def wait_for_socket(socket_path, server, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        assert server.poll() is None, "worker exited before listening"
+        assert time.monotonic() < deadline, "worker not listening"
+        time.sleep(0.1)
+
+def test_serve_runs_job(tmp_path):
+    import warmup
+    server_dir, client_dir = tmp_path / "server", tmp_path / "client"
+    server_dir.mkdir()
+    client_dir.mkdir()
+    instance = client_dir / "instance"
+    instance.write_bytes(warmup.synthetic_problem())
+    solution = client_dir / "solution"
+    socket_path = str(tmp_path / "worker.sock")
+    worker_path = os.path.abspath(worker.__file__)
+    server = subprocess.Popen([sys.executable, worker_path, "-serve", "-socket", socket_path], cwd=server_dir)
+    try:
+        wait_for_socket(socket_path, server)
+        client = subprocess.run([sys.executable, worker_path, "-socket", socket_path, "-time_limit_in_ms", "1000",
+                                 "-instance_file", str(instance), "-solution_file", str(solution), "-performance_report"],
+                                cwd=client_dir, capture_output=True, text=True, timeout=120)
+    finally:
+        server.terminate()
+        server.wait()
+
+    # The job output reaches the client
+    assert f"output_file :  {solution}" in client.stdout
+    # The job logs in the client directory, the worker in its own
+    job_log = (client_dir / "init_vrp.log").read_text()
+    assert "Start working" in job_log and "End working" in job_log
+    assert "Start working" not in (server_dir / "init_vrp.log").read_text()
+    report = json.loads((client_dir / "solution.performance.json").read_text())
+    assert report["knowledge_sources"][0]["knowledge_source"] == "GetArguments"
+    assert "DeserializeProblem" in [measure["knowledge_source"] for measure in report["knowledge_sources"]]
+
+def test_wait_job_kills_job_on_hang_up():
+    client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    pid = os.fork()
+    if pid == 0:
+        client.close()
+        os.setpgid(0, 0)
+        time.sleep(60)
+        os._exit(0)
+    os.setpgid(pid, pid)
+    with server:
+        client.close()
+        start = time.monotonic()
+        assert worker.wait_job(server, pid) is None
+    assert time.monotonic() - start < 10
+    with pytest.raises(ChildProcessError):
+        os.waitpid(pid, os.WNOHANG)
+
+def test_wait_job_returns_status():
+    client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    pid = os.fork()
+    if pid == 0:
+        os._exit(3)
+    with client, server:
+        assert worker.wait_job(server, pid) == 3
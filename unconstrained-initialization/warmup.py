@@ -0,0 +1,194 @@
+"""Warm-up of the solver on tiny synthetic problems
+
+Runs the pipeline from the attributes creation to the optimization on problems
+built in memory, so that the lazy initializations of numpy, sklearn and the
+compilation of the fastvrpy kernels happen before the first real job. Every
+specialization used by ProcessInitialSolution and OptimizeSolution is exercised
+(multi-unit, multi time windows, rests, multi-matrix).
+
+With a cache directory (NUMBA_CACHE_DIR) the kernels numba compiles with
+cache=True are stored on disk and later processes using the same directory load
+them instead of compiling again. Whether this applies depends on how the installed
+fastvrpy is built, which could not be checked against fastvrpy 0.5.2 here :
+extension modules (Cython) are compiled at install time and jits without
+cache=True are compiled again by every process, the directory has no effect on
+them. kernels_report tells which kernels of the loaded fastvrpy are cached, it is
+printed after the warm-up.
+
+Usage:
+    python3 warmup.py [-cache_dir DIR] [-time_limit_in_ms 1000]
+"""
+import os
+import sys
+import time
+import logging as log
+log = log.getLogger("warmup")
+
+import numpy
+
+import localsearch_vrp_pb2
+
+KERNEL_CACHE_DIR_ENV = "NUMBA_CACHE_DIR"
+
+# Knowledge sources run on the synthetic problems, in order : (module, class)
+WARM_UP_KNOWLEDGE_SOURCES = [
+    ("knowledge_sources.create_vehicles_attributes_from_problem", "CreateVehiclesAttributesFromProblem"),
+    ("knowledge_sources.create_services_attributes_from_problem", "CreateServicesAttributesFromProblem"),
+    ("knowledge_sources.create_dictionnary_index_to_id", "CreateDictionnaryIndexId"),
+    ("knowledge_sources.create_matrices_from_problem", "CreateMatricesFromProblem"),
+    ("knowledge_sources.process_clustering_initial_paths", "ProcessClusteringInitialPaths"),
+    ("knowledge_sources.process_initial_solution", "ProcessInitialSolution"),
+    ("knowledge_sources.optimize_solution", "OptimizeSolution"),
+]
+
+SPECIALIZATIONS = [
+    {},
+    {"num_units": 2},
+    {"num_time_windows": 2},
+    {"num_rests": 1},
+    {"num_matrices": 2},
+    {"num_units": 2, "num_time_windows": 2, "num_rests": 1, "num_matrices": 2},
+]
+
+
+def set_kernel_cache_dir(cache_dir):
+    """Store the compiled kernels in cache_dir
+
+    Must be called before fastvrpy is imported.
+    """
+    if "fastvrpy" in sys.modules:
+        log.warning(f"fastvrpy already imported, kernel cache directory {cache_dir} may be ignored")
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ[KERNEL_CACHE_DIR_ENV] = cache_dir
+
+
+def compiled_kernels(package="fastvrpy"):
+    """Numba dispatchers found in the loaded modules of package
+
+    Returns
+    -------
+        (int, int) : number of dispatchers and number of them cached on disk
+    """
+    kernels, cached = set(), 0
+    for name, module in list(sys.modules.items()):
+        if module is None or (name != package and not name.startswith(package + ".")):
+            continue
+        for value in list(vars(module).values()):
+            if id(value) in kernels or not type(value).__module__.startswith("numba") or not hasattr(value, "_cache"):
+                continue
+            kernels.add(id(value))
+            cached += type(value._cache).__name__ != "NullCache"
+    return len(kernels), cached
+
+
+def kernels_report():
+    """Line describing the kernel cache of the loaded fastvrpy"""
+    if "fastvrpy" not in sys.modules:
+        return "fastvrpy not loaded, kernel cache unknown"
+    kernels, cached = compiled_kernels()
+    if kernels == 0:
+        return "no numba kernel in fastvrpy, the kernel cache directory has no effect"
+    return f"{cached}/{kernels} fastvrpy numba kernels cached in {os.environ.get(KERNEL_CACHE_DIR_ENV, 'the default directory')}"
+
+
+def synthetic_problem(num_services=8, num_vehicles=2, num_units=1, num_time_windows=1, num_rests=0, num_matrices=1):
+    """Serialized localsearch_vrp Problem with services around a single depot"""
+    generator = numpy.random.default_rng(0)
+    size = num_services + 1
+    coordinates = generator.random((size, 2)) * 1000
+    times = numpy.abs(coordinates[:, None, :] - coordinates[None, :, :]).sum(axis=2)
+
+    problem = localsearch_vrp_pb2.Problem()
+    for vehicle_index in range(num_vehicles):
+        vehicle = problem.vehicles.add()
+        vehicle.id = f"vehicle_{vehicle_index}"
+        vehicle.matrix_index = vehicle_index % num_matrices
+        vehicle.start_index = num_services
+        vehicle.end_index = num_services
+        vehicle.cost_time_multiplier = 1
+        vehicle.time_window.start = 0
+        vehicle.time_window.end = 36000
+        for _ in range(num_units):
+            capacity = vehicle.capacities.add()
+            capacity.limit = num_services
+        for rest_index in range(num_rests):
+            rest = vehicle.rests.add()
+            rest.id = f"rest_{vehicle_index}_{rest_index}"
+            rest.duration = 600
+            rest.time_window.start = 14400
+            rest.time_window.end = 18000
+    tw_length = 36000 // num_time_windows
+    for service_index in range(num_services):
+        service = problem.services.add()
+        service.id = f"service_{service_index}"
+        service.matrix_index = service_index
+        service.duration = 60
+        service.quantities.extend([1] * num_units)
+        for tw_index in range(num_time_windows):
+            time_window = service.time_windows.add()
+            time_window.start = tw_index * tw_length
+            time_window.end = (tw_index + 1) * tw_length
+    for matrix_index in range(num_matrices):
+        matrix = problem.matrices.add()
+        matrix.size = size
+        matrix.time.extend((times * (matrix_index + 1)).ravel())
+        matrix.distance.extend(times.ravel())
+    return problem.SerializeToString()
+
+
+def warm_up(problems=None, time_limit=1, knowledge_sources=None):
+    """Run the solving knowledge sources on synthetic problems
+
+    Attributes
+    ----------
+        problems (list): serialized problems, one per SPECIALIZATIONS entry if None
+        time_limit (int): optimization time in seconds per problem
+        knowledge_sources (list): (module, class) run in order, WARM_UP_KNOWLEDGE_SOURCES if None
+
+    Returns
+    -------
+        list : the blackboards of the problems
+    """
+    from blackboard.blackboard import Blackboard
+    from controller.controller import Controller
+    from knowledge_sources.deserialize_problem import decode_problem
+    from lazy_imports import timed_import
+
+    if problems is None:
+        problems = [synthetic_problem(**specialization) for specialization in SPECIALIZATIONS]
+    if knowledge_sources is None:
+        knowledge_sources = WARM_UP_KNOWLEDGE_SOURCES
+
+    blackboards = []
+    for problem in problems:
+        start = time.perf_counter()
+        blackboard = Blackboard()
+        blackboard.problem = decode_problem(problem)
+        blackboard.time_limit = time_limit
+        for module, knowledge_source in knowledge_sources:
+            blackboard.add_knowledge_source(getattr(timed_import(module), knowledge_source)(blackboard))
+        Controller(blackboard).run_knowledge_sources()
+        blackboards.append(blackboard)
+        log.info(f"Warm-up problem done in {time.perf_counter() - start:.2f}s")
+    log.info(kernels_report())
+    return blackboards
+
+
+def warmup_main():
+    arguments = sys.argv[1:]
+    if "-cache_dir" in arguments:
+        set_kernel_cache_dir(arguments[arguments.index("-cache_dir") + 1])
+    import main
+
+    main.log_config()
+    time_limit = 1
+    if "-time_limit_in_ms" in arguments:
+        time_limit = max(int(arguments[arguments.index("-time_limit_in_ms") + 1]) // 1000, 1)
+
+    start = time.perf_counter()
+    warm_up(time_limit=time_limit)
+    print(f"Warm-up done in {time.perf_counter() - start:.2f}s, {kernels_report()}")
+
+
+if __name__ == '__main__':
+    warmup_main()
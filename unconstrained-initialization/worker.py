@@ -0,0 +1,289 @@
+"""Persistent worker for the unconstrained initialization
+
+Starting python3 main.py for every job means paying the interpreter startup and
+the imports of numpy, sklearn and fastvrpy each time. A worker keeps them loaded
+and runs the jobs it receives on a local Unix socket.
+
+Server:
+    python3 worker.py -serve -socket /tmp/unconstrained_initialization.sock [-fork [-max_children 8]] [-cache_dir DIR]
+
+Before listening the server warms the solver up on a synthetic problem. With -fork
+every job runs in a child forked from this warm process : jobs run concurrently,
+start without any import or initialization and share the read-only pages of the
+loaded libraries (copy-on-write). With -cache_dir the compiled solver kernels are
+read from (and stored in) DIR, see warmup.py.
+
+Client (same arguments as main.py):
+    python3 worker.py -socket /tmp/unconstrained_initialization.sock -time_limit_in_ms 10000 \
+        -instance_file instance -solution_file solution
+
+The client only imports the standard library. It sends the job arguments and its
+working directory as one JSON line and passes its stdout/stderr file descriptors
+(SCM_RIGHTS) so that the job output reaches the caller exactly as with main.py.
+The job runs and logs (init_vrp.log) in the client working directory.
+The worker answers with a JSON line {"status": <exit code>}. If no worker listens
+on the socket the client runs the job in process.
+
+Every job runs in its own process group, in a child of the process handling the
+connection. Killing the client (the way a caller cancels a job) closes the
+connection : the worker then kills the job and every process it started, so that a
+cancelled job neither keeps running nor blocks the sequential worker.
+"""
+import array
+import gc
+import json
+import os
+import select
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+import logging as log
+log = log.getLogger("worker")
+
+MAX_MESSAGE_SIZE = 65536
+
+# Seconds between two checks of the job child when pidfd_open is not available
+JOB_POLL_INTERVAL = 0.1
+
+
+def send_request(connection, arguments):
+    message = json.dumps({"arguments": arguments, "cwd": os.getcwd()}).encode() + b"\n"
+    file_descriptors = array.array("i", [sys.stdout.fileno(), sys.stderr.fileno()])
+    connection.sendmsg([message], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, file_descriptors)])
+
+
+def receive_request(connection):
+    """Read the JSON line request and the file descriptors sent with it
+
+    Returns
+    -------
+        (dict, list) : the request and the received file descriptors
+    """
+    file_descriptors = array.array("i")
+    fds_size = socket.CMSG_SPACE(2 * file_descriptors.itemsize)
+    data, ancdata, _, _ = connection.recvmsg(MAX_MESSAGE_SIZE, fds_size)
+    for level, kind, fds_data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            file_descriptors.frombytes(fds_data[:len(fds_data) - (len(fds_data) % file_descriptors.itemsize)])
+    while data and not data.endswith(b"\n"):
+        chunk = connection.recv(MAX_MESSAGE_SIZE)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data), list(file_descriptors)
+
+
+def receive_line(connection):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = connection.recv(MAX_MESSAGE_SIZE)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def run_job(request, file_descriptors):
+    """Run one job with the caller stdout/stderr and working directory, logging
+    in that directory as main.py would
+
+    Returns
+    -------
+        int : exit status, as main.py would have returned it
+    """
+    import main
+
+    saved_cwd = os.getcwd()
+    saved_fds = [os.dup(1), os.dup(2)]
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        for target, file_descriptor in zip((1, 2), file_descriptors):
+            os.dup2(file_descriptor, target)
+        os.chdir(request.get("cwd", saved_cwd))
+        main.log_config(force=True)
+        main.run(request["arguments"])
+        return 0
+    except Exception:
+        log.critical(traceback.format_exc())
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.chdir(saved_cwd)
+        for target, file_descriptor in zip((1, 2), saved_fds):
+            os.dup2(file_descriptor, target)
+            os.close(file_descriptor)
+        for file_descriptor in file_descriptors:
+            os.close(file_descriptor)
+
+
+def start_job(request, file_descriptors):
+    """Fork a child running the job in a new process group
+
+    Returns
+    -------
+        int : pid of the child
+    """
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.setpgid(0, 0)
+            status = run_job(request, file_descriptors)
+        finally:
+            os._exit(status)
+    # Also set by the parent : the group exists whichever process runs first
+    os.setpgid(pid, pid)
+    for file_descriptor in file_descriptors:
+        os.close(file_descriptor)
+    return pid
+
+
+def hung_up(connection):
+    """True if the client closed the connection (data sent after the request is dropped)"""
+    try:
+        return not connection.recv(MAX_MESSAGE_SIZE)
+    except ConnectionError:
+        return True
+
+
+def wait_job(connection, pid):
+    """Wait for the job child, killing its process group if the client hangs up
+
+    Returns
+    -------
+        int : exit status of the job, None if it was cancelled
+    """
+    pidfd = os.pidfd_open(pid) if hasattr(os, "pidfd_open") else None
+    try:
+        while True:
+            finished, status = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                return os.waitstatus_to_exitcode(status)
+            watched = [connection] if pidfd is None else [connection, pidfd]
+            readable, _, _ = select.select(watched, [], [], JOB_POLL_INTERVAL if pidfd is None else None)
+            if connection in readable and hung_up(connection):
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                return None
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+class JobHandler(socketserver.BaseRequestHandler):
+    """Handle one job per connection"""
+
+    def handle(self):
+        try:
+            request, file_descriptors = receive_request(self.request)
+        except (OSError, ValueError):
+            log.error(f"Invalid request : {traceback.format_exc()}")
+            return
+        log.info(f"Job {request.get('arguments')}")
+        status = wait_job(self.request, start_job(request, file_descriptors))
+        if status is None:
+            log.warning(f"Job {request.get('arguments')} cancelled : client disconnected")
+            return
+        self.request.sendall(json.dumps({"status": status}).encode() + b"\n")
+
+
+class WorkerServer(socketserver.UnixStreamServer):
+    """Sequential worker : one job at a time"""
+
+
+class ForkingWorkerServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Fork server : every job runs in a copy-on-write child of the warm process"""
+
+
+def serve(socket_path, server_class=WorkerServer, max_children=None):
+    """Load and warm the solver modules once then serve jobs until interrupted"""
+    import main
+    import warmup
+    from lazy_imports import import_modules, SOLVER_MODULES
+
+    main.log_config()
+    import_modules(module for module, _ in main.KNOWLEDGE_SOURCES)
+    try:
+        import_modules(SOLVER_MODULES)
+        warmup.warm_up()
+    except Exception:
+        log.error(f"Warm-up failed : {traceback.format_exc()}")
+    # Objects allocated so far are never collected : the garbage collector
+    # does not touch (and copy) their pages in the forked children
+    gc.freeze()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with server_class(socket_path, JobHandler) as server:
+        if max_children is not None:
+            server.max_children = max_children
+        log.info(f"Worker listening on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+def submit(socket_path, arguments):
+    """Run a job on the worker listening on socket_path, in process if there is none
+
+    Returns
+    -------
+        int : exit status of the job
+    """
+    try:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+    except OSError:
+        connection.close()
+        import main
+        main.log_config()
+        main.run(arguments)
+        return 0
+
+    with connection:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        send_request(connection, arguments)
+        response = receive_line(connection)
+    if not response:
+        return 1
+    return json.loads(response).get("status", 1)
+
+
+def pop_option(arguments, name, has_value=True):
+    if name not in arguments:
+        return None
+    index = arguments.index(name)
+    value = arguments[index + 1] if has_value else True
+    del arguments[index:index + (2 if has_value else 1)]
+    return value
+
+
+def worker_main():
+    arguments = sys.argv[1:]
+    socket_path = pop_option(arguments, "-socket")
+    if socket_path is None:
+        raise AttributeError("Input argument '-socket' not specified")
+
+    if pop_option(arguments, "-serve", has_value=False):
+        cache_dir = pop_option(arguments, "-cache_dir")
+        if cache_dir is not None:
+            import warmup
+            warmup.set_kernel_cache_dir(cache_dir)
+        server_class = ForkingWorkerServer if pop_option(arguments, "-fork", has_value=False) else WorkerServer
+        max_children = pop_option(arguments, "-max_children")
+        serve(socket_path, server_class, None if max_children is None else int(max_children))
+    else:
+        sys.exit(submit(socket_path, arguments))
+
+
+if __name__ == '__main__':
+    worker_main()
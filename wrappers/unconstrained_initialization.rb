@@ -21,7 +21,16 @@ require './wrappers/ortools_result_pb'
 module Wrappers
   class UnconstrainedInitialization < Ortools
     def initialize(hash = {})
-      hash[:exec_ortools] = 'python3 unconstrained-initialization/main.py'
+      # Kernels numba compiles with cache=True are shared through this directory (filled by
+      # unconstrained-initialization/warmup.py, which reports whether the installed fastvrpy has any)
+      cache_env = hash[:kernel_cache_dir] && "NUMBA_CACHE_DIR=#{hash[:kernel_cache_dir]} "
+      hash[:exec_ortools] =
+        if hash[:worker_socket]
+          # Jobs are run by a persistent worker (python3 unconstrained-initialization/worker.py -serve -fork)
+          "#{cache_env}python3 unconstrained-initialization/worker.py -socket #{hash[:worker_socket]}"
+        else
+          "#{cache_env}python3 unconstrained-initialization/main.py"
+        end
       super(hash)
     end
   end